@@ -6,13 +6,48 @@ import json
 # Add the src folder to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from scoring import (check_salutation, check_keyword_presence, check_flow, 
-                    calculate_speech_rate, check_grammar, check_vocabulary_richness,
-                    check_filler_words, check_sentiment)
+from scoring import Transcript, warm_up
+from grader import run_analyses, build_report
+from incremental import IncrementalGrader
 
 # page config
 st.set_page_config(page_title="Speech Grader", layout="wide")
 
+
+@st.cache_resource
+def load_analysis_resources():
+    """Load the shared NLP resources once per server process (not per rerun)"""
+    warm_up()
+    return True
+
+
+@st.cache_data(max_entries=1000, show_spinner=False)
+def analyze_transcript(transcript_text, duration_seconds):
+    """
+    Run every scorer; results are memoized per (text, duration)
+    so reruns and resubmissions of the same transcript are instant.
+    Returns: scorer results, JSON report
+    """
+    load_analysis_resources()
+    transcript = Transcript(transcript_text)
+    results = run_analyses(transcript, duration_seconds)
+    return results, build_report(results, transcript.word_count)
+
+
+def analyze_live(transcript_text, duration_seconds):
+    """
+    Re-score only the sentences changed since this session's last analysis,
+    so long speeches can be scored as they are typed.
+    Returns: scorer results, JSON report
+    """
+    if "incremental_grader" not in st.session_state:
+        load_analysis_resources()
+        st.session_state.incremental_grader = IncrementalGrader()
+    grader = st.session_state.incremental_grader
+    results = grader.update(transcript_text, duration_seconds)
+    return results, grader.report()
+
+
 def main():
     # Header
     st.title("🎓 Speech Grader ")
@@ -39,22 +74,33 @@ def main():
             help="Enter how long the speech took in seconds"
         )
     
+    with col2:
+        live_scoring = st.checkbox(
+            "Score as I type",
+            help="Re-score after every edit, re-analyzing only the changed sentences"
+        )
+    
     # Analyze button
     analyze_clicked = st.button("Analyze Speech", type="primary", use_container_width=True)
     
-    if analyze_clicked:
+    if analyze_clicked or (live_scoring and transcript_text.strip()):
         if transcript_text.strip():
             with st.spinner("Analyzing speech..."):
                 try:
                     # Run all analyses
-                    salutation_score, salutation_feedback = check_salutation(transcript_text)
-                    must_score, good_score, keyword_feedback = check_keyword_presence(transcript_text)
-                    flow_score, flow_feedback = check_flow(transcript_text)
-                    speech_score, wpm, speech_feedback = calculate_speech_rate(transcript_text, duration_seconds)
-                    grammar_score, error_count, grammar_feedback = check_grammar(transcript_text)
-                    vocab_score, ttr, vocab_feedback = check_vocabulary_richness(transcript_text)
-                    filler_score, filler_rate, filler_feedback = check_filler_words(transcript_text)
-                    sentiment_score, positivity, sentiment_feedback = check_sentiment(transcript_text)
+                    if live_scoring:
+                        results, output_data = analyze_live(transcript_text, duration_seconds)
+                    else:
+                        results, output_data = analyze_transcript(transcript_text, duration_seconds)
+
+                    salutation_score, salutation_feedback = results["salutation"]
+                    must_score, good_score, keyword_feedback = results["keywords"]
+                    flow_score, flow_feedback = results["flow"]
+                    speech_score, wpm, speech_feedback = results["speech_rate"]
+                    grammar_score, error_count, grammar_feedback = results["grammar"]
+                    vocab_score, ttr, vocab_feedback = results["vocabulary"]
+                    filler_score, filler_rate, filler_feedback = results["filler_words"]
+                    sentiment_score, positivity, sentiment_feedback = results["sentiment"]
                     
                     # Calculate totals
                     content_score = salutation_score + must_score + good_score + flow_score
@@ -135,23 +181,7 @@ def main():
                     st.write("---")
                     st.write("**💡 Suggestions for Improvement**")
                     
-                    suggestions = []
-                    if salutation_score < 3:
-                        suggestions.append("• Start with a proper greeting like 'Hello everyone' or 'Good morning'")
-                    if must_score < 16:
-                        suggestions.append("• Include all basic details: name, age, school, family, hobbies")
-                    if good_score < 6:
-                        suggestions.append("• Add personal touches like dreams, fun facts, or special family details")
-                    if speech_score < 8:
-                        suggestions.append("• Practice speaking at a steady pace (110-140 words per minute)")
-                    if grammar_score < 8:
-                        suggestions.append("• Review basic grammar rules for spoken English")
-                    if vocab_score < 8:
-                        suggestions.append("• Use more varied vocabulary in your speech")
-                    if filler_score < 12:
-                        suggestions.append("• Reduce filler words like 'um', 'uh', 'like' for clearer speech")
-                    if sentiment_score < 12:
-                        suggestions.append("• Show more enthusiasm and positivity in your delivery")
+                    suggestions = output_data["improvement_suggestions"]
                     
                     if suggestions:
                         for suggestion in suggestions:
@@ -163,38 +193,6 @@ def main():
                     st.write("---")
                     st.subheader("📄 JSON Output")
                     
-                    # Create the JSON structure
-                    output_data = {
-                        "overall_score": total_score,
-                        "word_count": len(transcript_text.split()),
-                        "criteria": [
-                            {
-                                "criterion": "Content & Structure",
-                                "score": content_score,
-                                "max_score": 40,
-                                "components": [
-                                    {"name": "Salutation", "score": salutation_score, "max_score": 5, "feedback": salutation_feedback},
-                                    {"name": "Must-have Keywords", "score": must_score, "max_score": 20, "feedback": keyword_feedback},
-                                    {"name": "Good-to-have Keywords", "score": good_score, "max_score": 10, "feedback": keyword_feedback},
-                                    {"name": "Flow", "score": flow_score, "max_score": 5, "feedback": flow_feedback}
-                                ]
-                            },
-                            {
-                                "criterion": "Delivery & Style", 
-                                "score": delivery_score,
-                                "max_score": 60,
-                                "components": [
-                                    {"name": "Speech Rate", "score": speech_score, "max_score": 10, "feedback": speech_feedback},
-                                    {"name": "Grammar", "score": grammar_score, "max_score": 10, "feedback": grammar_feedback},
-                                    {"name": "Vocabulary", "score": vocab_score, "max_score": 10, "feedback": vocab_feedback},
-                                    {"name": "Filler Words", "score": filler_score, "max_score": 15, "feedback": filler_feedback},
-                                    {"name": "Sentiment", "score": sentiment_score, "max_score": 15, "feedback": sentiment_feedback}
-                                ]
-                            }
-                        ],
-                        "improvement_suggestions": suggestions
-                    }
-
                     # Display JSON in expandable section
                     with st.expander("View JSON Output", expanded=False):
                         st.json(output_data)
@@ -0,0 +1,214 @@
+"""
+Deterministic synthetic self-introductions for benchmarks and equivalence tests.
+
+Transcripts are built from the default rubric itself, so across a corpus every
+salutation level, keyword category, flow phrase, filler word and grammar rule
+is exercised, along with texts that miss them. The same seed always gives the
+same texts.
+
+Usage:
+    python benchmarks/corpus.py --count 1000 --words 150 > corpus.jsonl
+    python benchmarks/corpus.py --count 10 --words 20000 --seed 7 > long.jsonl
+
+In Python:
+    from corpus import generate_transcript, generate_corpus
+    text = generate_transcript(random.Random(1), words=500)
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from rubric import get_default_rubric  # noqa: E402
+
+NAMES = ["Akash", "Priya", "Rahul", "Ananya", "Rohan", "Meera", "Arjun", "Isha", "Kabir", "Diya"]
+SCHOOLS = ["Delhi Public School", "St. Mary's School", "Kendriya Vidyalaya", "Green Valley High"]
+CITIES = ["Pune", "Mumbai", "Delhi", "Chennai", "Kolkata", "Jaipur", "Lucknow"]
+RELATIVES = ["mother", "father", "sister", "brother", "grandmother", "uncle"]
+JOBS = ["doctor", "teacher", "engineer", "pilot", "scientist", "artist", "farmer"]
+HOBBIES = ["cricket", "football", "chess", "painting", "reading", "dancing", "singing", "coding"]
+ADJECTIVES = ["kind", "funny", "curious", "helpful", "quiet", "brave", "creative", "cheerful"]
+TOPICS = ["science", "history", "music", "mathematics", "nature", "space", "computers", "cooking"]
+
+# Sentences a student might say, by rubric category. Placeholders are filled
+# from the lists above.
+DETAIL_SENTENCES = [
+    "my name is {name}",
+    "myself {name} and i am from {city}",
+    "you can call me {name}",
+    "i am {age} years old",
+    "my age is {age}",
+    "i am studying in class {grade} at {school}",
+    "i study in grade {grade} of {school}",
+    "there are {count} people in my family",
+    "my {relative} is a {job} and my {relative2} is a {job2}",
+    "my parents are very {adjective}",
+    "my hobby is {hobby}",
+    "my hobbies are {hobby} and {hobby2}",
+    "i like to play {hobby} with my friends",
+    "i enjoy {hobby} in my free time",
+    "playing {hobby} is my favorite thing to do",
+    "i live in {city} and i was born in {city2}",
+    "a special thing about my family is that we always eat dinner together",
+    "my family is small but very {adjective}",
+    "my dream is to become a {job}",
+    "when i grow up i want to be a {job}",
+    "my goal is to learn more about {topic}",
+    "my ambition is to work in {topic}",
+    "i think i am unique because i practice {hobby} every morning",
+    "a fun fact about me is that i can solve a rubik's cube",
+    "one interesting thing people don't know about me is that i love {topic}",
+    "i am good at {hobby} and i won an award last year",
+    "my biggest achievement is winning the {topic} quiz and i am proud of it",
+    "my strength is that i am very {adjective}",
+]
+
+# Sentences that trigger the default grammar rules
+GRAMMAR_ERROR_SENTENCES = [
+    "i like to play, playing {hobby} every day",
+    "one of my friend is {name}",
+    "some of my teacher are very {adjective}",
+    "i enjoy is {hobby}",
+    "i love are {topic}",
+    "i watch movies on sunday",
+    "i see birds in the park",
+    "sometimes i talk by myself when i practice",
+]
+
+FILLER_SENTENCES = [
+    "it is a very {adjective} place",
+    "we go there every summer",
+    "that is what i do after school",
+    "i think it helps me a lot",
+]
+
+POSITIVE_SENTENCES = [
+    "i am really excited to be here",
+    "i love my school and my friends",
+    "learning about {topic} is amazing and fun",
+    "i feel happy and proud when i help others",
+    "my teachers are wonderful and fantastic",
+    "i am passionate about {topic} and it is the best subject",
+    "my friends say i am an excellent {hobby} player",
+]
+
+NEGATIVE_SENTENCES = [
+    "sometimes i feel nervous and sad before exams",
+    "i do not like getting up early",
+    "homework can be boring and tiring",
+]
+
+
+def _rubric_phrases(rubric):
+    salutations = [phrase for level in rubric.salutation["levels"] for phrase in level["phrases"]]
+    closings = list(rubric.flow["closing"])
+    fillers = [filler.strip() for filler in rubric.filler_words["words"]]
+    return salutations, closings, fillers
+
+
+def _fill(template, rng):
+    return template.format(
+        name=rng.choice(NAMES), school=rng.choice(SCHOOLS), city=rng.choice(CITIES),
+        city2=rng.choice(CITIES), relative=rng.choice(RELATIVES), relative2=rng.choice(RELATIVES),
+        job=rng.choice(JOBS), job2=rng.choice(JOBS), hobby=rng.choice(HOBBIES),
+        hobby2=rng.choice(HOBBIES), adjective=rng.choice(ADJECTIVES), topic=rng.choice(TOPICS),
+        age=rng.randint(8, 17), grade=rng.randint(3, 12), count=rng.randint(3, 7),
+    )
+
+
+def _with_fillers(sentence, rng, fillers, filler_rate):
+    words = sentence.split()
+    out = []
+    for word in words:
+        if rng.random() < filler_rate:
+            # Fillers only count when they stand alone, so some carry a comma
+            out.append(rng.choice(fillers) + ("," if rng.random() < 0.3 else ""))
+        out.append(word)
+    return " ".join(out)
+
+
+def generate_transcript(rng, words=150, filler_rate=0.04, grammar_error_rate=0.15,
+                        salutation_rate=0.85, closing_rate=0.8, rubric=None):
+    """
+    One synthetic self-introduction of about `words` words (never fewer).
+    rng: random.Random, so callers control determinism
+    filler_rate: chance of a filler word before each word
+    grammar_error_rate: share of sentences taken from GRAMMAR_ERROR_SENTENCES
+    """
+    rubric = rubric or get_default_rubric()
+    salutations, closings, fillers = _rubric_phrases(rubric)
+
+    sentences = []
+    if rng.random() < salutation_rate:
+        sentences.append(f"{rng.choice(salutations)} everyone")
+    closing = None
+    if rng.random() < closing_rate:
+        closing = rng.choice(closings) + rng.choice(["", " for listening", " so much"])
+
+    # Keep the closing out of the count so the body fills the target
+    target = words - (len(closing.split()) if closing else 0)
+    count = sum(len(sentence.split()) for sentence in sentences)
+    details = DETAIL_SENTENCES[:]
+    rng.shuffle(details)
+    position = 0
+    while count < target:
+        roll = rng.random()
+        if roll < grammar_error_rate:
+            template = rng.choice(GRAMMAR_ERROR_SENTENCES)
+        elif roll < grammar_error_rate + 0.1:
+            template = rng.choice(POSITIVE_SENTENCES + NEGATIVE_SENTENCES + FILLER_SENTENCES)
+        else:
+            template = details[position % len(details)]
+            position += 1
+        sentence = _with_fillers(_fill(template, rng), rng, fillers, filler_rate)
+        sentences.append(sentence)
+        count += len(sentence.split())
+    if closing:
+        sentences.append(closing)
+
+    # Mixed capitalisation and the odd missing full stop, like real transcripts
+    text = ". ".join(sentence[0].upper() + sentence[1:] if rng.random() < 0.8 else sentence
+                     for sentence in sentences)
+    return text + "." if rng.random() < 0.9 else text
+
+
+def generate_corpus(count, words=150, seed=0, with_durations=True, **options):
+    """
+    Yields: (transcript, duration_seconds) pairs; `count` of them, always the same for a seed.
+    words: int, or (min, max) to vary the length
+    with_durations: durations spoken at 70-190 wpm; otherwise None (estimated)
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        length = rng.randint(*words) if isinstance(words, (tuple, list)) else words
+        text = generate_transcript(rng, length, **options)
+        duration_seconds = None
+        if with_durations:
+            duration_seconds = round(len(text.split()) / rng.uniform(70, 190) * 60, 1)
+        yield text, duration_seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic transcript corpus as JSONL")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--words", type=int, default=150)
+    parser.add_argument("--max-words", type=int, default=None, help="vary the length between --words and this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-durations", action="store_true")
+    args = parser.parse_args(argv)
+
+    words = (args.words, args.max_words) if args.max_words else args.words
+    corpus = generate_corpus(args.count, words, seed=args.seed, with_durations=not args.no_durations)
+    for index, (text, duration_seconds) in enumerate(corpus):
+        record = {"id": f"synthetic-{args.seed}-{index}", "transcript": text}
+        if duration_seconds is not None:
+            record["duration_seconds"] = duration_seconds
+        sys.stdout.write(json.dumps(record) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
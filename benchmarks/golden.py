@@ -0,0 +1,369 @@
+"""
+Golden-output equivalence checks for the optimized grading paths.
+
+`record` runs the reference implementation (every check_* scorer called on
+its own with the plain transcript string, as the app originally did) over a
+generated corpus and, optionally, real transcripts, and stores each result in
+a JSONL golden file. `check` grades the same transcripts through every
+alternative execution mode and compares scores, metrics and feedback strings
+exactly against the golden results.
+
+Modes:
+    reference        the reference scorers again (catches changes to the scorers themselves)
+    single           grader.run_analyses with one shared Transcript
+    incremental      incremental.IncrementalGrader, typing the text in and editing it
+    streaming        streaming.StreamingGrader, fed the text as timestamped chunks
+    chunked          chunked.ChunkedGrader with tiny windows, fed the text in 13-character pieces
+    batch            batch.grade_batch reports
+    cached           cache.ResultCache reports, on the miss and on the hit
+    stored           reports written to a result_store.ResultStore and read back by id
+    lexicalrichness  vocabulary counted by LexicalRichness instead of the built-in counter
+    vectorized       vectorized.py bands for speech rate, vocabulary and sentiment
+
+For every mismatch the transcript is shrunk (sentences first, then words)
+to a minimal text on which the mode still disagrees with the reference.
+
+Usage:
+    python benchmarks/golden.py record --output golden.jsonl --count 2000
+    python benchmarks/golden.py record --output golden.jsonl --corpus submissions.jsonl
+    python benchmarks/golden.py check --golden golden.jsonl
+    python benchmarks/golden.py check --golden golden.jsonl --modes streaming cached --workers 4
+Exits with status 1 when any mode disagrees.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+
+import lexical  # noqa: E402
+from batch import grade_batch  # noqa: E402
+from cache import ResultCache  # noqa: E402
+from chunked import ChunkedGrader  # noqa: E402
+from corpus import generate_corpus  # noqa: E402
+from grade_cli import read_submissions  # noqa: E402
+from grader import SCORERS, build_report, grade_transcript, run_analyses  # noqa: E402
+from incremental import IncrementalGrader  # noqa: E402
+from rubric import get_default_rubric  # noqa: E402
+from scoring import Transcript, warm_up  # noqa: E402
+from streaming import StreamingGrader  # noqa: E402
+
+MAX_DIFFS = 5
+
+
+def _plain(value):
+    """Results as they look after a JSON round trip (tuples become lists)"""
+    return json.loads(json.dumps(value))
+
+
+def reference_results(text, duration_seconds=None):
+    """Every scorer called on its own with the plain string"""
+    return {name: scorer(text, duration_seconds) if name == "speech_rate" else scorer(text)
+            for name, scorer in SCORERS.items()}
+
+
+def expected_output(kind, results, word_count):
+    if kind == "report":
+        return build_report(results, word_count)
+    if kind == "cached reports":
+        report = build_report(results, word_count)
+        return {"miss": report, "hit": report}
+    return results
+
+
+# Modes --------------------------------------------------------------------------
+# Each mode grades a list of (text, duration_seconds) pairs.
+# Returns: (kind of output, [output per pair]), the kind being "results" (as from
+# run_analyses), "partial" (some scorers' results), "report" or "cached reports"
+
+def mode_reference(pairs, options):
+    return "results", [reference_results(text, duration_seconds) for text, duration_seconds in pairs]
+
+
+def mode_single(pairs, options):
+    return "results", [run_analyses(text, duration_seconds) for text, duration_seconds in pairs]
+
+
+def mode_incremental(pairs, options):
+    outputs = []
+    for text, duration_seconds in pairs:
+        grader = IncrementalGrader()
+        # Type the text in, then insert and remove a sentence at the start
+        for end in (len(text) // 3, 2 * len(text) // 3, len(text)):
+            grader.update(text[:end], duration_seconds)
+        grader.update("Hello. " + text, duration_seconds)
+        outputs.append(grader.update(text, duration_seconds))
+    return "results", outputs
+
+
+def mode_streaming(pairs, options):
+    outputs = []
+    for text, duration_seconds in pairs:
+        # An overlap far smaller than a sentence, so most of each sentence is settled before it ends
+        grader = StreamingGrader(overlap=48)
+        pieces = text.split(" ")
+        chunks = [" ".join(pieces[start:start + 7]) for start in range(0, len(pieces), 7)]
+        # Timestamps spread over the duration; all zero when it is unknown
+        total = duration_seconds or 0
+        for index, chunk in enumerate(chunks):
+            end = total if index == len(chunks) - 1 else total * (index + 1) / len(chunks)
+            grader.add_chunk(chunk, total * index / len(chunks), end)
+        outputs.append(grader.scores())
+    return "results", outputs
+
+
+def mode_chunked(pairs, options):
+    outputs = []
+    for text, duration_seconds in pairs:
+        # Windows far smaller than a transcript, so phrases and rules cross every kind of cut
+        grader = ChunkedGrader(chunk_size=16, overlap=48)
+        for start in range(0, len(text), 13):
+            grader.feed(text[start:start + 13])
+        outputs.append(grader.finish(duration_seconds))
+    return "results", outputs
+
+
+def mode_batch(pairs, options):
+    texts = [text for text, _ in pairs]
+    durations = [duration_seconds for _, duration_seconds in pairs]
+    return "report", list(grade_batch(texts, durations, workers=options.workers))
+
+
+def mode_cached(pairs, options):
+    cache = ResultCache(max_entries=len(pairs) + 1, ttl_seconds=None)
+    misses = [cache.get_or_grade(text, duration_seconds) for text, duration_seconds in pairs]
+    hits = [cache.get_or_grade(text, duration_seconds) for text, duration_seconds in pairs]
+    return "cached reports", [{"miss": miss, "hit": hit} for miss, hit in zip(misses, hits)]
+
+
+def mode_stored(pairs, options):
+    from result_store import ResultStore
+
+    with tempfile.TemporaryDirectory() as directory, ResultStore(directory) as store:
+        for index, (text, duration_seconds) in enumerate(pairs):
+            store.put(index, grade_transcript(text, duration_seconds))
+        # Read back out of order, so every lookup goes through the index
+        return "report", [store.get(index) for index in reversed(range(len(pairs)))][::-1]
+
+
+def mode_lexicalrichness(pairs, options):
+    backend = lexical.get_backend()
+    lexical.set_backend("lexicalrichness")
+    try:
+        return mode_single(pairs, options)
+    finally:
+        lexical.set_backend(backend)
+
+
+def mode_vectorized(pairs, options):
+    import vectorized
+
+    word_counts = []
+    ttrs = []
+    vocabulary_words = []
+    compounds = []
+    for text, duration_seconds in pairs:
+        transcript = Transcript(text)
+        word_counts.append(transcript.word_count)
+        words, terms = lexical.count_words_and_terms(transcript.tokens)
+        vocabulary_words.append(words)
+        ttrs.append(terms / words if words else 0)
+        compounds.append(SCORERS["sentiment"](transcript)[1])
+
+    wpm, estimated = vectorized.speech_rates(word_counts, [d for _, d in pairs])
+    speech_scores, speech_codes = vectorized.speech_rate_bands(wpm)
+    speech_feedback = vectorized.speech_rate_feedback(speech_codes, wpm, estimated)
+    vocab_scores, vocab_ttr, vocab_codes = vectorized.vocabulary_bands(ttrs, vocabulary_words)
+    vocab_feedback = vectorized.vocabulary_feedback(vocab_codes, vocab_ttr, vocabulary_words)
+    sentiment_scores, sentiment_codes = vectorized.sentiment_bands(compounds)
+    sentiment_feedback = vectorized.sentiment_feedback(sentiment_codes, compounds)
+
+    outputs = []
+    for row in range(len(pairs)):
+        outputs.append({
+            "speech_rate": (int(speech_scores[row]), float(wpm[row]), speech_feedback[row]),
+            "vocabulary": (int(vocab_scores[row]), float(vocab_ttr[row]), vocab_feedback[row]),
+            "sentiment": (int(sentiment_scores[row]), compounds[row], sentiment_feedback[row]),
+        })
+    return "partial", outputs
+
+
+MODES = {
+    "reference": mode_reference,
+    "single": mode_single,
+    "incremental": mode_incremental,
+    "streaming": mode_streaming,
+    "chunked": mode_chunked,
+    "batch": mode_batch,
+    "cached": mode_cached,
+    "stored": mode_stored,
+    "lexicalrichness": mode_lexicalrichness,
+    "vectorized": mode_vectorized,
+}
+
+
+# Comparison and minimization ----------------------------------------------------
+
+def diff(expected, actual, path=""):
+    """[(path, expected, actual)] for every leaf that differs"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        diffs = []
+        for key in list(expected) + [key for key in actual if key not in expected]:
+            diffs.extend(diff(expected.get(key), actual.get(key), f"{path}/{key}"))
+        return diffs
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        diffs = []
+        for index, (left, right) in enumerate(zip(expected, actual)):
+            diffs.extend(diff(left, right, f"{path}[{index}]"))
+        return diffs
+    return [] if expected == actual else [(path or "/", expected, actual)]
+
+
+def compare_one(mode, text, duration_seconds, options, expected_results=None):
+    """Differences between a mode and the reference (or recorded results) for one transcript"""
+    kind, (output,) = MODES[mode]([(text, duration_seconds)], options)
+    if expected_results is None:
+        expected_results = _plain(reference_results(text, duration_seconds))
+    if kind == "partial":
+        expected_results = {name: expected_results[name] for name in output}
+    word_count = Transcript(text).word_count
+    return diff(expected_output(kind, expected_results, word_count), _plain(output))
+
+
+def minimize(text, still_fails, max_checks=300):
+    """
+    Shrink `text` while still_fails(text) holds: drop runs of sentences, then of words,
+    halving the run length when nothing can be dropped (delta debugging).
+    """
+    checks = 0
+    for separator in (". ", " "):
+        pieces = text.split(separator)
+        run = max(len(pieces) // 2, 1)
+        while len(pieces) > 1 and checks < max_checks:
+            removed = False
+            for start in range(0, len(pieces), run):
+                candidate = pieces[:start] + pieces[start + run:]
+                if not candidate:
+                    continue
+                checks += 1
+                if still_fails(separator.join(candidate)):
+                    pieces = candidate
+                    removed = True
+                    break
+                if checks >= max_checks:
+                    break
+            if not removed:
+                if run == 1:
+                    break
+                run = max(run // 2, 1)
+        text = separator.join(pieces)
+    return text
+
+
+# Commands -----------------------------------------------------------------------
+
+def record(args):
+    rubric_version = get_default_rubric().version
+    submissions = []
+    for index, (text, duration_seconds) in enumerate(
+            generate_corpus(args.count, (args.min_words, args.max_words), seed=args.seed)):
+        submissions.append((f"synthetic-{args.seed}-{index}", text, duration_seconds))
+    for path in args.corpus:
+        with open(path, encoding="utf-8") as corpus_file:
+            for index, (submission_id, text, duration_seconds, _) in enumerate(read_submissions(corpus_file)):
+                submissions.append((submission_id or f"{os.path.basename(path)}:{index}", text, duration_seconds))
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        for submission_id, text, duration_seconds in submissions:
+            record = {
+                "id": submission_id,
+                "transcript": text,
+                "duration_seconds": duration_seconds,
+                "word_count": Transcript(text).word_count,
+                "rubric": rubric_version,
+                "results": _plain(reference_results(text, duration_seconds)),
+            }
+            output.write(json.dumps(record) + "\n")
+    print(f"recorded {len(submissions)} golden results in {args.output}", file=sys.stderr)
+    return 0
+
+
+def check(args):
+    with open(args.golden, encoding="utf-8") as golden_file:
+        records = [json.loads(line) for line in golden_file if line.strip()]
+    rubric_version = get_default_rubric().version
+    if any(record["rubric"] != rubric_version for record in records):
+        print("warning: the golden file was recorded with a different rubric", file=sys.stderr)
+
+    pairs = [(record["transcript"], record["duration_seconds"]) for record in records]
+    failures = []
+    for mode in args.modes:
+        kind, outputs = MODES[mode](pairs, args)
+        mismatched = 0
+        for record, output in zip(records, outputs):
+            expected = record["results"]
+            if kind == "partial":
+                expected = {name: expected[name] for name in output}
+            diffs = diff(expected_output(kind, expected, record["word_count"]), _plain(output))
+            if not diffs:
+                continue
+            mismatched += 1
+            if mismatched > args.max_reports:
+                continue
+            text, duration_seconds = record["transcript"], record["duration_seconds"]
+            minimal = minimize(text, lambda candidate: bool(compare_one(mode, candidate, duration_seconds, args)))
+            minimal_diffs = compare_one(mode, minimal, duration_seconds, args)
+            failures.append({
+                "mode": mode,
+                "id": record["id"],
+                "diffs": [list(entry) for entry in diffs[:MAX_DIFFS]],
+                "minimized_transcript": minimal,
+                "minimized_diffs": [list(entry) for entry in minimal_diffs[:MAX_DIFFS]],
+                "duration_seconds": duration_seconds,
+            })
+        status = "OK" if not mismatched else f"{mismatched} MISMATCHED"
+        print(f"{mode}: {len(records)} transcripts {status}")
+
+    for failure in failures:
+        print(f"\n[{failure['mode']}] {failure['id']}")
+        for path, expected, actual in failure["diffs"]:
+            print(f"    {path}: expected {expected!r}, got {actual!r}")
+        print(f"    minimized ({failure['duration_seconds']}s): {failure['minimized_transcript']!r}")
+        for path, expected, actual in failure["minimized_diffs"]:
+            print(f"        {path}: expected {expected!r}, got {actual!r}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as report:
+            json.dump(failures, report, indent=2)
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record golden grading results and check other modes against them")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="grade a corpus with the reference scorers")
+    record_parser.add_argument("--output", required=True, metavar="PATH")
+    record_parser.add_argument("--count", type=int, default=1000, help="generated transcripts")
+    record_parser.add_argument("--min-words", type=int, default=5)
+    record_parser.add_argument("--max-words", type=int, default=600)
+    record_parser.add_argument("--seed", type=int, default=0)
+    record_parser.add_argument("--corpus", nargs="*", default=[], metavar="JSONL",
+                               help="real transcripts, in grade_cli.py's input format")
+
+    check_parser = commands.add_parser("check", help="compare every mode with a golden file")
+    check_parser.add_argument("--golden", required=True, metavar="PATH")
+    check_parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    check_parser.add_argument("--workers", type=int, default=2, help="processes for the batch mode")
+    check_parser.add_argument("--max-reports", type=int, default=5, help="mismatches minimized and shown per mode")
+    check_parser.add_argument("--report", default=None, metavar="PATH", help="write the mismatches as JSON")
+
+    args = parser.parse_args(argv)
+    warm_up()
+    return record(args) if args.command == "record" else check(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
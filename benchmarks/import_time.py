@@ -0,0 +1,86 @@
+"""
+Startup-time benchmark for the scoring modules.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+compares the median cumulative import time of each module against a budget.
+
+Target: importing `scoring` must stay under 50 ms. The NLP libraries it uses
+(vaderSentiment, lexicalrichness and their numpy/scipy/matplotlib stack) take
+seconds to import, so any of them leaking back to module level blows the budget.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 30 --runs 9
+Exits with status 1 when a module is over budget.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+DEFAULT_MODULES = ["scoring"]
+DEFAULT_BUDGET_MS = 50.0
+
+
+def measure_import(module, python=sys.executable):
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+    Returns: cumulative time of the module (ms), {imported name: cumulative ms}
+    for everything imported after interpreter startup
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True, check=True
+    )
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        if name.strip() == "site" and not name.startswith("  "):
+            # Everything imported so far belongs to interpreter startup
+            timings = {}
+            continue
+        timings[name.strip()] = int(cumulative_us) / 1000
+
+    return timings.get(module, 0.0), timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check import time of the scoring modules")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per module")
+    args = parser.parse_args(argv)
+
+    over_budget = []
+    for module in args.modules:
+        totals = []
+        slowest = {}
+        for _ in range(args.runs):
+            total, timings = measure_import(module)
+            totals.append(total)
+            slowest = timings
+        median = statistics.median(totals)
+        status = "OK" if median <= args.budget_ms else "OVER BUDGET"
+        print(f"{module}: {median:.1f} ms (budget {args.budget_ms:.0f} ms) {status}")
+
+        ranked = sorted(slowest.items(), key=lambda item: item[1], reverse=True)
+        for name, ms in ranked[1:args.top + 1]:
+            print(f"    {name}: {ms:.1f} ms")
+
+        if median > args.budget_ms:
+            over_budget.append(module)
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Check that a custom rubric also grades submissions tagged with the default language.
+
+Grades a generated corpus (benchmarks/corpus.py) against a custom rubric,
+rubrics/default.json with other grammar and salutation bands, three ways:
+untagged, and tagged "en" and "en-US". Each goes through grade_cli's JSONL
+path (read_submissions, worker processes) and through grade_batch in this
+process. Every tagged report must equal the untagged one, and the custom
+rubric must change some reports compared with the default rubric (otherwise
+the check proves nothing).
+
+Usage:
+    python benchmarks/language_check.py
+    python benchmarks/language_check.py --count 500 --workers 4
+Exits with status 1 when a tagged report differs.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+
+from batch import grade_batch  # noqa: E402
+from corpus import generate_corpus  # noqa: E402
+from grade_cli import grade_lines  # noqa: E402
+
+DEFAULT_RUBRIC = os.path.join(BENCHMARKS_DIR, '..', 'rubrics', 'default.json')
+TAGS = (None, "en", "en-US")
+
+
+def write_custom_rubric(directory):
+    with open(DEFAULT_RUBRIC, encoding="utf-8") as rubric_file:
+        data = json.load(rubric_file)
+    data["grammar"]["no_errors_score"] = 9
+    data["grammar"]["scores"] = [7, 5, 3]
+    data["salutation"]["missing_score"] = 1
+    path = os.path.join(directory, "custom.json")
+    with open(path, "w", encoding="utf-8") as rubric_file:
+        json.dump(data, rubric_file)
+    return path
+
+
+def cli_reports(pairs, tag, rubric_path, workers):
+    lines = []
+    for number, (text, duration_seconds) in enumerate(pairs):
+        record = {"id": number, "transcript": text, "duration_seconds": duration_seconds}
+        if tag is not None:
+            record["language"] = tag
+        lines.append(json.dumps(record))
+    out = io.StringIO()
+    grade_lines(lines, out, workers=workers, rubric_path=rubric_path)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def batch_reports(pairs, tag, rubric_path):
+    texts = [text for text, _ in pairs]
+    durations = [duration_seconds for _, duration_seconds in pairs]
+    return list(grade_batch(texts, durations, workers=1, rubric_path=rubric_path, languages=[tag] * len(pairs)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=200, help="generated transcripts")
+    parser.add_argument("--workers", type=int, default=2, help="processes for the JSONL path")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    pairs = list(generate_corpus(args.count, (5, 300), seed=args.seed))
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        rubric_path = write_custom_rubric(directory)
+        default = batch_reports(pairs, None, None)
+        for name, grade in (("cli", lambda tag: cli_reports(pairs, tag, rubric_path, args.workers)),
+                            ("batch", lambda tag: batch_reports(pairs, tag, rubric_path))):
+            untagged = grade(None)
+            changed = sum(1 for report, reference in zip(untagged, default)
+                          if report["overall_score"] != reference["overall_score"])
+            if not changed:
+                print(f"{name}: the custom rubric changed no report")
+                failed = True
+            for tag in TAGS[1:]:
+                differing = sum(1 for report, reference in zip(grade(tag), untagged) if report != reference)
+                failed |= bool(differing)
+                print(f"{name} {tag}: {len(pairs)} transcripts, {differing} differ from untagged"
+                      f" ({changed} changed by the custom rubric)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
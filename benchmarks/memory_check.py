@@ -0,0 +1,124 @@
+"""
+Peak-memory check for chunked grading of long transcripts.
+
+Writes a long synthetic transcript (benchmarks/corpus.py) to a temporary file
+and grades it with chunked.grade_file under tracemalloc, for several chunk
+sizes. Memory that only lives while a window is scanned (the few copies of
+the window and its matches) must stay within --budget times the window, i.e.
+the chunk size plus the overlap kept for phrases crossing a cut. What the grader keeps between windows is reported separately: it grows
+with the vocabulary and with the number of sentiment-laden words (16 bytes
+each), not with the length of the text.
+
+With --verify the whole text is also graded with grader.grade_transcript,
+whose report must be identical and whose peak is shown for comparison. VADER
+is quadratic in the text length, so that takes minutes on long transcripts.
+
+Usage:
+    python benchmarks/memory_check.py
+    python benchmarks/memory_check.py --words 20000 --chunk-sizes 4096 65536 --verify
+Exits with status 1 when a chunk size is over budget or --verify finds a difference.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+
+from chunked import DEFAULT_OVERLAP, ChunkedGrader  # noqa: E402
+from corpus import generate_corpus  # noqa: E402
+from grader import build_report, grade_transcript  # noqa: E402
+from scoring import warm_up  # noqa: E402
+
+DEFAULT_WORDS = 100000
+DEFAULT_CHUNK_SIZES = [4096, 16384, 65536]
+DEFAULT_BUDGET = 24
+
+
+def measure_chunked(path, duration_seconds, chunk_size, overlap=DEFAULT_OVERLAP):
+    """
+    Grade the file with a ChunkedGrader under tracemalloc.
+    Returns: report, peak bytes while feeding, bytes still held by the grader
+    after the last piece, peak bytes overall (finish() works on what was kept)
+    """
+    tracemalloc.start()
+    try:
+        grader = ChunkedGrader(chunk_size=chunk_size, overlap=overlap)
+        with open(path, encoding="utf-8", newline="") as transcript_file:
+            for piece in iter(lambda: transcript_file.read(chunk_size), ""):
+                grader.feed(piece)
+            del piece
+        retained, feeding_peak = tracemalloc.get_traced_memory()
+        report = build_report(grader.finish(duration_seconds), grader.word_count)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return report, feeding_peak, retained, peak
+
+
+def measure_whole(path, duration_seconds):
+    """grader.grade_transcript on the whole file. Returns: report, peak bytes"""
+    tracemalloc.start()
+    try:
+        with open(path, encoding="utf-8", newline="") as transcript_file:
+            text = transcript_file.read()
+        report = grade_transcript(text, duration_seconds)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return report, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check peak memory of chunked grading")
+    parser.add_argument("--words", type=int, default=DEFAULT_WORDS, help="length of the transcript")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=DEFAULT_CHUNK_SIZES)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help="allowed window memory, in multiples of chunk size + overlap")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verify", action="store_true",
+                        help="also grade the whole text and require the same report")
+    args = parser.parse_args(argv)
+
+    # Loading VADER and the rubric is a one-off cost, not part of any window
+    warm_up()
+    (text, duration_seconds), = generate_corpus(1, args.words, seed=args.seed)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt", delete=False) as transcript_file:
+        transcript_file.write(text)
+        path = transcript_file.name
+    size = len(text)
+    del text
+
+    failed = False
+    try:
+        print(f"transcript: {args.words} words, {size / 1024:.0f} KiB")
+        reports = []
+        for chunk_size in args.chunk_sizes:
+            report, feeding_peak, retained, peak = measure_chunked(path, duration_seconds, chunk_size)
+            reports.append(report)
+            window = feeding_peak - retained
+            ratio = window / (chunk_size + DEFAULT_OVERLAP)
+            over = ratio > args.budget
+            failed |= over
+            print(f"chunk {chunk_size:>7}: peak {peak / 1024:.0f} KiB, kept between windows"
+                  f" {retained / 1024:.0f} KiB, window {window / 1024:.0f} KiB"
+                  f" ({ratio:.1f}x chunk + overlap, budget {args.budget:.0f}x)"
+                  f"{' OVER BUDGET' if over else ''}")
+
+        if any(report != reports[0] for report in reports):
+            print("chunk sizes disagree")
+            failed = True
+        if args.verify:
+            report, peak = measure_whole(path, duration_seconds)
+            same = report == reports[0]
+            failed |= not same
+            print(f"whole text: peak {peak / 1024:.0f} KiB, report {'identical' if same else 'DIFFERS'}")
+    finally:
+        os.remove(path)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Timing benchmarks for the scoring pipeline.
+
+Times every scorer in grader.SCORERS, the full per-transcript pipeline
+(grader.grade_transcript, as app.py runs it) and batch.grade_batch, on transcripts from benchmarks/corpus.py. The corpus is
+seeded, so runs on the same machine grade the same texts.
+
+Each scorer is timed on a plain string, so its time includes the tokenization
+it triggers itself. Results are written as JSON and can be compared against a
+stored baseline; the run fails when a benchmark's median got slower than
+--max-regression times the baseline's.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --output latest.json
+    python benchmarks/run_benchmarks.py --sizes 20 200 --batch-sizes 1 100 --only scorer
+    python benchmarks/run_benchmarks.py --full     # batches up to 100k transcripts
+Exits with status 1 when a benchmark regressed.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+
+from batch import grade_batch  # noqa: E402
+from corpus import generate_corpus  # noqa: E402
+from grader import SCORERS, grade_transcript  # noqa: E402
+from scoring import warm_up  # noqa: E402
+
+DEFAULT_SIZES = [20, 200, 2000, 20000]
+DEFAULT_BATCH_SIZES = [1, 100, 1000]
+FULL_BATCH_SIZES = [1, 100, 1000, 10000, 100000]
+DEFAULT_MAX_REGRESSION = 1.2
+GROUPS = ("scorer", "pipeline", "batch")
+
+
+def time_callable(func, repeat=5, min_time=0.2):
+    """
+    Time `func` like timeit: loops per sample are chosen so one sample takes at least `min_time`.
+    Returns: {"median_s", "min_s", "samples_s", "loops"}, times per call
+    """
+    timer = timeit.Timer(func)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    samples = [elapsed / loops] + [t / loops for t in timer.repeat(repeat - 1, loops)]
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "samples_s": samples,
+        "loops": loops,
+    }
+
+
+def bench_scorers(sizes, repeat, min_time):
+    results = {}
+    for size in sizes:
+        (text, duration_seconds), = generate_corpus(1, size, seed=size)
+        for name, scorer in SCORERS.items():
+            if name == "speech_rate":
+                func = lambda: scorer(text, duration_seconds)  # noqa: E731
+            else:
+                func = lambda: scorer(text)  # noqa: E731
+            results[f"scorer.{name}.words={size}"] = time_callable(func, repeat, min_time)
+            print(f"  scorer {name:<13} {size:>6} words: {_format(results[f'scorer.{name}.words={size}'])}",
+                  file=sys.stderr)
+    return results
+
+
+def bench_pipeline(sizes, repeat, min_time):
+    results = {}
+    for size in sizes:
+        (text, duration_seconds), = generate_corpus(1, size, seed=size)
+        key = f"pipeline.sequential.words={size}"
+        # What app.analyze_transcript does on a cache miss
+        results[key] = time_callable(lambda: grade_transcript(text, duration_seconds), repeat, min_time)
+        print(f"  pipeline sequential {size:>6} words: {_format(results[key])}", file=sys.stderr)
+    return results
+
+
+def bench_batches(batch_sizes, words, workers, repeat):
+    results = {}
+    for batch_size in batch_sizes:
+        pairs = list(generate_corpus(batch_size, words, seed=batch_size))
+        texts = [text for text, _ in pairs]
+        durations = [duration_seconds for _, duration_seconds in pairs]
+        # Large batches take long enough that a single sample is stable
+        runs = repeat if batch_size <= 1000 else 1
+        samples = []
+        for _ in range(runs):
+            start = timeit.default_timer()
+            for _ in grade_batch(texts, durations, workers=workers):
+                pass
+            samples.append(timeit.default_timer() - start)
+        median = statistics.median(samples)
+        key = f"batch.workers={workers}.size={batch_size}"
+        results[key] = {
+            "median_s": median,
+            "min_s": min(samples),
+            "samples_s": samples,
+            "loops": 1,
+            "items": batch_size,
+            "items_per_s": batch_size / median,
+        }
+        print(f"  batch {batch_size:>7} x {words} words: {_format(results[key])}"
+              f" ({results[key]['items_per_s']:.0f} transcripts/s)", file=sys.stderr)
+    return results
+
+
+def _format(result):
+    median = result["median_s"]
+    if median < 1e-3:
+        return f"{median * 1e6:.1f} us"
+    if median < 1:
+        return f"{median * 1e3:.2f} ms"
+    return f"{median:.2f} s"
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, max_regression=DEFAULT_MAX_REGRESSION):
+    """
+    Compare medians with a baseline run.
+    Returns: [(name, baseline median, current median, ratio)] for benchmarks in both, and the regressed names
+    """
+    rows = []
+    regressed = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        rows.append((name, before["median_s"], result["median_s"], ratio))
+        if ratio > max_regression:
+            regressed.append(name)
+    return rows, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scorers, the pipeline and batch grading")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="transcript lengths in words")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=None,
+                        help=f"transcripts per batch (default: {DEFAULT_BATCH_SIZES})")
+    parser.add_argument("--full", action="store_true", help=f"batch sizes {FULL_BATCH_SIZES}")
+    parser.add_argument("--batch-words", type=int, default=150, help="words per transcript in batches")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="batch grading processes")
+    parser.add_argument("--only", choices=GROUPS, nargs="+", default=list(GROUPS))
+    parser.add_argument("--repeat", type=int, default=5, help="samples per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per sample, at least")
+    parser.add_argument("--output", default=None, metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--baseline", default=None, metavar="PATH", help="results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help="fail when a median is more than this many times the baseline's")
+    args = parser.parse_args(argv)
+    batch_sizes = args.batch_sizes or (FULL_BATCH_SIZES if args.full else DEFAULT_BATCH_SIZES)
+
+    # Loading VADER and the rubric is a one-off cost, not part of any benchmark
+    warm_up()
+    results = {}
+    if "scorer" in args.only:
+        results.update(bench_scorers(args.sizes, args.repeat, args.min_time))
+    if "pipeline" in args.only:
+        results.update(bench_pipeline(args.sizes, args.repeat, args.min_time))
+    if "batch" in args.only:
+        results.update(bench_batches(batch_sizes, args.batch_words, args.workers, args.repeat))
+
+    run = {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "benchmarks": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(run, output, indent=2)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)["benchmarks"]
+    rows, regressed = compare(results, baseline, args.max_regression)
+    for name, before, after, ratio in rows:
+        status = "REGRESSED" if name in regressed else ""
+        print(f"{name}: {before * 1e3:.3f} ms -> {after * 1e3:.3f} ms ({ratio:.2f}x) {status}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
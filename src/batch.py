@@ -0,0 +1,163 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from cache import ResultCache
+from grader import grade_transcript
+from languages import get_registry
+from rubric import load_compiled_rubric
+from scoring import Transcript, warm_up
+
+# Per-process rubric and result cache, set up by _init_worker
+_rubric = None
+_cache = None
+
+
+def _init_worker(cache_path=None, rubric_path=None):
+    """Pay for the VADER lexicon and the compiled rubric once per worker process"""
+    global _rubric, _cache
+    warm_up()
+    # Loads the artifact the parent already compiled into the rubric cache
+    _rubric = load_compiled_rubric(rubric_path) if rubric_path is not None else None
+    _cache = ResultCache(path=cache_path, rubric=_rubric) if cache_path is not None else None
+
+
+def _worker_pid(hold_seconds=0.0):
+    """The worker's process id, after keeping it busy for `hold_seconds` (see server warm-up)"""
+    time.sleep(hold_seconds)
+    return os.getpid()
+
+
+def _grade_chunk(chunk, timings=False, metrics=False, minhash=None):
+    reports = []
+    for item in chunk:
+        text, duration_seconds = item[0], item[1]
+        # (text, duration, language tag) items are graded with that language's rubric
+        language = item[2] if len(item) > 2 else None
+        rubric = _rubric_for(language)
+        transcript = Transcript(text)
+        # Timed runs bypass the cache so every report is actually measured
+        if _cache is not None and not timings:
+            report = _cache.get_or_grade(transcript, duration_seconds, rubric=rubric, metrics=metrics)
+        else:
+            report = grade_transcript(transcript, duration_seconds, timings=timings, rubric=rubric,
+                                      metrics=metrics)
+        if minhash is not None:
+            # From the tokens the vocabulary scorer already computed
+            report["minhash"] = minhash.signature(transcript.tokens)
+        reports.append(report)
+    return reports
+
+
+def _rubric_for(language):
+    """The rubric for an item's language tag; the default language is graded with the worker's rubric"""
+    if language is None:
+        return _rubric
+    registry = get_registry()
+    if _rubric is not None and registry.resolve(language) == registry.default_language:
+        return _rubric
+    return registry.rubric(language)
+
+
+def _paired(transcripts, durations, name="durations"):
+    if durations is None:
+        for text in transcripts:
+            yield text, None
+        return
+
+    missing = object()
+    durations = iter(durations)
+    for text in transcripts:
+        duration_seconds = next(durations, missing)
+        if duration_seconds is missing:
+            raise ValueError(f"{name} is shorter than transcripts")
+        yield text, duration_seconds
+    if next(durations, missing) is not missing:
+        raise ValueError(f"{name} is longer than transcripts")
+
+
+def _chunked(items, chunksize):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def grade_batch(transcripts, durations=None, workers=None, chunksize=64, max_in_flight=None,
+                cache_path=None, timings=False, rubric_path=None, metrics=False, minhash=None, languages=None):
+    """
+    Grade many transcripts over a pool of worker processes.
+
+    transcripts: iterable of transcript strings (read lazily)
+    durations: iterable of durations in seconds (None entries allowed), or None
+    workers: number of processes, defaults to the CPU count; 1 grades in this process
+    chunksize: transcripts sent to a worker per task
+    max_in_flight: chunks submitted but not yet yielded, defaults to 2 per worker
+    cache_path: SQLite file shared by the workers' result caches (see cache.ResultCache)
+    timings: add per-scorer "timings" to every report (skips the cache)
+    rubric_path: rubric file to grade against instead of the default rubric
+    metrics: add the raw "metrics" (wpm, ttr, ...) to every report, see grader.report_metrics
+    minhash: similarity.MinHasher; adds every transcript's signature (bytes, or None
+    when it has no words) under "minhash", for a similarity.SimilarityIndex
+    languages: iterable of language tags (None entries allowed), or None; each
+    transcript with a tag is graded with that language's rubric (see languages.py),
+    loaded by each worker the first time it sees the language
+
+    Yields: one report per transcript (as built by grader.grade_transcript),
+    in input order. Only `max_in_flight` chunks are held in memory at a time.
+    """
+    items = _paired(transcripts, durations)
+    if languages is not None:
+        items = ((text, duration_seconds, language)
+                 for (text, duration_seconds), language in _paired(items, languages, "languages"))
+    return grade_pairs(items, workers=workers, chunksize=chunksize,
+                       max_in_flight=max_in_flight, cache_path=cache_path, timings=timings,
+                       rubric_path=rubric_path, metrics=metrics, minhash=minhash)
+
+
+def grade_pairs(items, workers=None, chunksize=64, max_in_flight=None, cache_path=None,
+                timings=False, rubric_path=None, metrics=False, minhash=None):
+    """
+    Same as grade_batch, for an iterable of (transcript, duration_seconds) pairs
+    or (transcript, duration_seconds, language tag) triples
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1 or chunksize < 1:
+        raise ValueError("workers and chunksize must be at least 1")
+    if max_in_flight is None:
+        max_in_flight = workers * 2
+    elif max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1")
+    if rubric_path is not None:
+        # Validate and compile once here, so workers only read the cached artifact
+        load_compiled_rubric(rubric_path)
+    return _grade_chunks(_chunked(items, chunksize), workers, max_in_flight, cache_path, timings,
+                         rubric_path, metrics, minhash)
+
+
+def _grade_chunks(chunks, workers, max_in_flight, cache_path, timings, rubric_path, metrics, minhash):
+    if workers == 1:
+        _init_worker(cache_path, rubric_path)
+        for chunk in chunks:
+            yield from _grade_chunk(chunk, timings, metrics, minhash)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cache_path, rubric_path)) as executor:
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(_grade_chunk, chunk, timings, metrics, minhash))
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Stopped early (or failed): drop work that has not started yet
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from grader import grade_transcript
+from rubric import get_default_rubric
+from scoring import as_transcript, get_grammar_backend, grammar_fallback_count
+
+DEFAULT_MAX_ROWS = 100000
+# Writes to the SQLite tier between two prunes of it
+_PRUNE_EVERY = 256
+
+
+def normalize_transcript(text):
+    """
+    Normalize a transcript for cache lookups. Only differences that can never
+    change a grade are folded together (Windows/old-Mac line endings).
+    """
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def cache_key(text, duration_seconds=None, rubric_version=None):
+    """
+    sha256 of (normalized transcript, duration, rubric version)
+    rubric_version: CompiledRubric.version, defaults to the default rubric's
+    """
+    if rubric_version is None:
+        rubric_version = get_default_rubric().version
+    duration = "none" if duration_seconds is None else repr(float(duration_seconds))
+    digest = hashlib.sha256()
+    for part in (rubric_version, duration, normalize_transcript(as_transcript(text).text)):
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of graded reports.
+
+    An in-memory LRU tier bounded by `max_entries` and `ttl_seconds`, backed
+    by an optional SQLite file (`path`) shared by processes and restarts.
+    The file keeps at most `max_rows` reports, dropping expired ones and then
+    the oldest when it is opened and every few hundred writes.
+    Reports are stored as JSON, so callers always get a fresh copy. Keys
+    include the rubric's version hash, so editing a rubric never serves
+    reports graded against the old one.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, path=None, rubric=None, max_rows=DEFAULT_MAX_ROWS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.rubric = rubric or get_default_rubric()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()  # key -> (stored at, report JSON)
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_writes = 0  # since the last prune
+        if path is not None:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, report TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+            self._prune()
+            self._db.commit()
+
+    def key(self, text, duration_seconds=None, rubric=None):
+        """rubric: the rubric the report is graded against, when not this cache's (e.g. another language's)"""
+        version = (rubric or self.rubric).version
+        backend = get_grammar_backend()
+        if backend != "regex":
+            # LanguageTool grades grammar differently, so its reports get their own entries
+            version = f"{version}+{backend}"
+        return cache_key(text, duration_seconds, version)
+
+    def _expired(self, created, now):
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def get(self, text, duration_seconds=None, rubric=None):
+        """The cached report, or None"""
+        key = self.key(text, duration_seconds, rubric)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry[0], time.monotonic()):
+                    del self._entries[key]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(entry[1])
+
+            if self._db is not None:
+                row = self._db.execute("SELECT report, created FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    report_json, created = row
+                    if self._expired(created, time.time()):
+                        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                        self._db.commit()
+                        self.expirations += 1
+                    else:
+                        self._remember(key, report_json, age=time.time() - created)
+                        self.disk_hits += 1
+                        return json.loads(report_json)
+
+            self.misses += 1
+            return None
+
+    def put(self, text, duration_seconds, report, rubric=None):
+        key = self.key(text, duration_seconds, rubric)
+        report_json = json.dumps(report)
+        with self._lock:
+            self._remember(key, report_json)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO results (key, report, created) VALUES (?, ?, ?)",
+                                 (key, report_json, time.time()))
+                self._disk_writes += 1
+                if self._disk_writes >= _PRUNE_EVERY:
+                    self._prune()
+                self._db.commit()
+
+    def _prune(self):
+        """Delete expired rows, then the oldest beyond max_rows; the caller commits"""
+        self._disk_writes = 0
+        if self.ttl_seconds is not None:
+            self.expirations += self._db.execute("DELETE FROM results WHERE created < ?",
+                                                 (time.time() - self.ttl_seconds,)).rowcount
+        if self.max_rows is not None:
+            self.evictions += self._db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)).rowcount
+
+    def _remember(self, key, report_json, age=0.0):
+        self._entries[key] = (time.monotonic() - age, report_json)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_grade(self, text, duration_seconds=None, grade=None, rubric=None, metrics=False):
+        """
+        Return the cached report, grading (and caching) it on a miss.
+        grade: callable(text, duration_seconds) building the report,
+        defaults to grade_transcript with `rubric` (this cache's unless given)
+        metrics: keep the report's "metrics"; reports are cached with them, so
+        runs with and without metrics share entries
+        """
+        report = self.get(text, duration_seconds, rubric)
+        if report is None or (metrics and "metrics" not in report):
+            fallbacks = grammar_fallback_count()
+            if grade is None:
+                report = grade_transcript(text, duration_seconds, rubric=rubric or self.rubric, metrics=True)
+            else:
+                report = grade(text, duration_seconds)
+            # Reports graded with the regex rules because LanguageTool did not answer are not kept
+            if grammar_fallback_count() == fallbacks:
+                self.put(text, duration_seconds, report, rubric)
+        if not metrics:
+            report.pop("metrics", None)
+        return report
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,459 @@
+"""
+Memory-bounded grading of very long transcripts.
+
+grader.grade_transcript holds the text several times over (the lowered copy,
+sentence and token lists, the copies VADER and the vocabulary count make).
+ChunkedGrader instead reads the transcript in pieces and scans it in windows
+of about `chunk_size` characters, keeping only running counts between them:
+
+- Windows are cut at whitespace, so words, vocabulary tokens and sentences
+  (split on '.') are counted piece by piece, and lowercasing is unaffected.
+- Each window is scanned again from `overlap` characters before its end, so
+  rubric phrases and grammar rule matches that cross a cut are found once,
+  with the context before and after them that the whole-text scan sees.
+- Sentiment runs VADER's per-word rules on a window of the three words before
+  and two after each word. Only words with a non-zero valence are kept, so
+  VADER's whole-text rules (the 'but' contrast, capitalisation emphasis and
+  punctuation emphasis) can be applied at the end, exactly as it does. This
+  reuses vaderSentiment internals; with a version that lacks them, sentiment
+  is scored on the whole text instead, which holds all of it in memory.
+
+Results equal grader.run_analyses on the whole text as long as no grammar rule
+match (with its lookahead) is longer than `overlap`, and no single word is
+longer than `chunk_size`. While a window is scanned it is copied a few times
+(benchmarks/memory_check.py measures 12-20 times `chunk_size` + `overlap`);
+between windows only the set of distinct words, the valences of
+sentiment-laden words (16 bytes each) and running counts are kept. VADER's
+cost on the whole text grows with its length squared; here it is linear.
+Vocabulary is always counted with the built-in counter (see lexical.py).
+
+    report = grade_file("debate.txt", duration_seconds=3600)
+"""
+from array import array
+from bisect import bisect_left
+import heapq
+
+import lexical
+from grader import SCORERS, build_report
+from rubric import get_default_rubric
+from scoring import (get_sentiment_analyzer, score_salutation, score_keywords, score_flow, score_speech_rate,
+                     score_grammar, score_vocabulary, score_filler_words, score_sentiment,
+                     score_positive_words)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_OVERLAP = 1024
+
+
+class _SentiText:
+    """The two attributes of vaderSentiment's SentiText its per-word rules read"""
+    __slots__ = ("words_and_emoticons", "is_cap_diff")
+
+    def __init__(self, words, is_cap_diff):
+        self.words_and_emoticons = words
+        self.is_cap_diff = is_cap_diff
+
+
+class _StreamingSentiment:
+    """
+    VADER's compound score of a text fed in pieces that end in whitespace.
+    Mirrors SentimentIntensityAnalyzer.polarity_scores step by step, reusing
+    vaderSentiment internals (checked against 3.3.2, the version requirements.txt pins).
+    """
+
+    @staticmethod
+    def supported(analyzer):
+        """Whether the installed vaderSentiment has every internal this class reuses"""
+        from vaderSentiment import vaderSentiment
+
+        return (hasattr(vaderSentiment, "SentiText") and hasattr(vaderSentiment.SentiText, "_strip_punc_if_word")
+                and isinstance(getattr(vaderSentiment, "BOOSTER_DICT", None), dict)
+                and callable(getattr(vaderSentiment, "normalize", None))
+                and isinstance(getattr(analyzer, "emojis", None), dict)
+                and callable(getattr(analyzer, "sentiment_valence", None))
+                and callable(getattr(analyzer, "_punctuation_emphasis", None)))
+
+    def __init__(self, analyzer):
+        from vaderSentiment import vaderSentiment
+
+        self._vader = vaderSentiment
+        self.analyzer = analyzer
+        self._prev_space = True  # emoji replacement state, carried across pieces
+        self._tokens = []  # tokens from index _first on: 3 scored ones for context, then unscored
+        self._first = 0
+        self._next = 0  # index of the next token to score
+        self.token_count = 0
+        self.allcaps = 0
+        self.exclamations = 0
+        self.questions = 0
+        self.but_index = None
+        # Tokens with a non-zero valence: index, valence if some but not all
+        # words are in capitals (VADER's is_cap_diff), valence if not. Once the
+        # text has both, the second array is no longer needed.
+        self._indexes = array("q")
+        self._with_caps = array("d")
+        self._without_caps = array("d")
+
+    def feed(self, text, final=False):
+        emojis = self.analyzer.emojis
+        if any(char in emojis for char in text):
+            converted = []
+            prev_space = self._prev_space
+            for char in text:
+                if char in emojis:
+                    if not prev_space:
+                        converted.append(' ')
+                    converted.append(emojis[char])
+                    prev_space = False
+                else:
+                    converted.append(char)
+                    prev_space = char == ' '
+            self._prev_space = prev_space
+            text = "".join(converted)
+        elif text:
+            self._prev_space = text[-1] == ' '
+
+        self.exclamations += text.count("!")
+        self.questions += text.count("?")
+        strip = self._vader.SentiText._strip_punc_if_word
+        for match in lexical.WORD.finditer(text):
+            token = strip(match.group())
+            if token.isupper():
+                self.allcaps += 1
+            if self.but_index is None and token.lower() == "but":
+                self.but_index = self.token_count
+            self._tokens.append(token)
+            self.token_count += 1
+            if len(self._tokens) >= 256:
+                self._settle_caps()
+                self._score(False)
+        self._settle_caps()
+        self._score(final)
+
+    def _settle_caps(self):
+        if self._without_caps is not None and 0 < self.allcaps < self.token_count:
+            self._without_caps = None
+
+    def _score(self, final):
+        # A word's valence depends on up to three words before it and two after
+        last = self.token_count if final else self.token_count - 2
+        tokens = self._tokens
+        first = self._first
+        boosters = self._vader.BOOSTER_DICT
+        while self._next < last:
+            index = self._next
+            start = max(index - 3, first)
+            window = tokens[start - first:index + 3 - first]
+            local = index - start
+            item = window[local]
+            item_lower = item.lower()
+            with_caps = without_caps = 0
+            if not (item_lower in boosters or (local < len(window) - 1 and item_lower == "kind"
+                                               and window[local + 1].lower() == "of")):
+                if any(word.isupper() for word in window):
+                    with_caps = self.analyzer.sentiment_valence(0, _SentiText(window, True), item, local, [])[0]
+                    if self._without_caps is not None:
+                        without_caps = self.analyzer.sentiment_valence(0, _SentiText(window, False), item, local,
+                                                                       [])[0]
+                else:
+                    with_caps = without_caps = self.analyzer.sentiment_valence(0, _SentiText(window, False), item,
+                                                                               local, [])[0]
+            if with_caps or without_caps:
+                self._indexes.append(index)
+                self._with_caps.append(with_caps)
+                if self._without_caps is not None:
+                    self._without_caps.append(without_caps)
+            self._next += 1
+
+        drop = self._next - 3 - first
+        if drop > 0:
+            del tokens[:drop]
+            self._first += drop
+
+    def compound(self):
+        if not self.token_count:
+            return 0.0
+        is_cap_diff = 0 < self.allcaps < self.token_count
+        # Scaled in place, so compound() is only called once
+        sentiments = self._with_caps if is_cap_diff else self._without_caps
+        if self.but_index is not None:
+            _but_check(self._indexes, sentiments, self.but_index)
+
+        total = float(sum(sentiments))
+        amplifier = self.analyzer._punctuation_emphasis("!" * min(self.exclamations, 4)
+                                                        + "?" * min(self.questions, 4))
+        if total > 0:
+            total += amplifier
+        elif total < 0:
+            total -= amplifier
+        return round(self._vader.normalize(total), 4)
+
+
+class _WholeTextSentiment:
+    """
+    VADER's compound score from polarity_scores on the whole text, for
+    vaderSentiment versions _StreamingSentiment does not support. Keeps every
+    piece, so the transcript is no longer graded in bounded memory.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self._pieces = []
+
+    def feed(self, text, final=False):
+        self._pieces.append(text)
+
+    def compound(self):
+        return self.analyzer.polarity_scores("".join(self._pieces))["compound"]
+
+
+def _but_check(indexes, sentiments, but_index):
+    """
+    SentimentIntensityAnalyzer._but_check on the non-zero valences only.
+    It scales the *first* valence equal to each one in turn (list.index), so
+    equal valences earlier in the text can be scaled instead of, or as well as,
+    the one visited; zeros never change anything.
+    """
+    first_equal = {}  # valence -> heap of positions that may still hold it
+    for position, value in enumerate(sentiments):
+        if not value:
+            continue
+        heap = first_equal.setdefault(value, [])
+        heapq.heappush(heap, position)
+        while sentiments[heap[0]] != value:
+            heapq.heappop(heap)
+        target = heap[0]
+        if indexes[target] < but_index:
+            scaled = value * 0.5
+        elif indexes[target] > but_index:
+            scaled = value * 1.5
+        else:
+            continue
+        sentiments[target] = scaled
+        heapq.heappop(heap)
+        heapq.heappush(first_equal.setdefault(scaled, []), target)
+
+
+class ChunkedGrader:
+    """
+    Grades a transcript read in pieces, holding only a window of it at a time.
+
+        grader = ChunkedGrader()
+        for piece in pieces:
+            grader.feed(piece)
+        results = grader.finish(duration_seconds)
+    """
+
+    def __init__(self, rubric=None, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_OVERLAP):
+        self.rubric = rubric or get_default_rubric()
+        for phrase in list(self.rubric.flow["salutation"]) + list(self.rubric.flow["closing"]):
+            if phrase != phrase.strip() or "." in phrase:
+                raise ValueError(f"flow phrase {phrase!r} can span a sentence boundary; "
+                                 "grade this rubric with grader.grade_transcript")
+        longest_phrase = max((len(phrase) for phrase, _ in self.rubric.matcher.phrases), default=0)
+        self.chunk_size = chunk_size
+        # Characters kept before and after the accepted part of a window
+        self.margin = max(overlap, longest_phrase + 2)
+
+        self._pending = ""  # original text after the last whitespace fed so far
+        self._buffer = ""  # lowered text from global offset _base on
+        self._base = 0
+        self._done = 0  # lowered offset up to which the text has been accounted for
+
+        self.word_count = 0
+        self._fragments = 0
+        self._segments = 0  # '.' seen so far
+        self._segment_words = 0  # words in the current sentence (only < 3 matters)
+        self._first_sentence = None  # segment index of the first non-empty sentence
+        self._last_sentence = None
+        self._salutation_start = False
+        self._last_closing = None  # segment index of the last closing phrase
+        self._phrase_hits = {}  # {category: {phrase: hits}}
+        self._filler_counts = {}
+        self._filler_next_free = {}
+        fillers = self.rubric.filler_words["words"]
+        self._fillers = {filler.strip() for filler in fillers}
+        self._grammar = {}
+        self._grammar_next_free = {}
+        self._terms = set()
+        self._token_count = 0
+
+        try:
+            analyzer = get_sentiment_analyzer(self.rubric)
+            if _StreamingSentiment.supported(analyzer):
+                self._sentiment = _StreamingSentiment(analyzer)
+            else:
+                self._sentiment = _WholeTextSentiment(analyzer)
+        except Exception:
+            # Falls back to positive words, like check_sentiment
+            self._sentiment = None
+
+    def feed(self, text):
+        """Add the next piece of the transcript"""
+        pending = self._pending + text
+        cut = len(pending)
+        while cut and not pending[cut - 1].isspace():
+            cut -= 1
+        if not cut:
+            self._pending = pending
+            return
+        self._pending = pending[cut:]
+        self._append(pending[:cut], final=False)
+
+    def finish(self, duration_seconds=None):
+        """
+        Score everything fed so far. Call it once, after the last piece.
+        Returns: dict of scorer name -> result tuple, as from grader.run_analyses
+        """
+        pending, self._pending = self._pending, ""
+        self._append(pending, final=True)
+        # The last sentence has no '.' after it
+        self._close_segment()
+
+        rubric = self.rubric
+        phrase_hits = self._phrase_hits
+        opens = self._salutation_start
+        closes = self._last_closing is not None and self._last_closing == self._last_sentence
+        results = {
+            "salutation": score_salutation(phrase_hits, rubric),
+            "keywords": score_keywords(phrase_hits, rubric),
+            "flow": score_flow(opens, closes, bool(phrase_hits.get("flow:basic_details")), rubric),
+            "speech_rate": score_speech_rate(self.word_count, duration_seconds, rubric),
+        }
+        results["grammar"] = score_grammar(self._grammar, self._fragments, self.word_count, rubric)
+        results["vocabulary"] = score_vocabulary(self._token_count, len(self._terms), rubric)
+        results["filler_words"] = score_filler_words(self._filler_counts, self.word_count, rubric)
+        if self._sentiment is not None:
+            results["sentiment"] = score_sentiment(self._sentiment.compound(), rubric)
+        else:
+            results["sentiment"] = score_positive_words(phrase_hits, self.word_count, rubric)
+        return {name: results[name] for name in SCORERS}
+
+    def _append(self, text, final):
+        if self._sentiment is not None:
+            self._sentiment.feed(text, final)
+        self._buffer += text.lower()
+        while True:
+            end = self._base + len(self._buffer)
+            if final:
+                limit = end
+            else:
+                if end - self._done < self.chunk_size + self.margin:
+                    return
+                # Accept up to a whitespace cut at least `margin` before the end
+                limit = end - self.margin
+                while limit > self._done and not self._buffer[limit - self._base - 1].isspace():
+                    limit -= 1
+                if limit == self._done:
+                    return
+            self._scan(limit, final)
+            # Keep `margin` characters before the accepted part for lookbehind
+            keep_from = max(self._done - self.margin, self._base)
+            self._buffer = self._buffer[keep_from - self._base:]
+            self._base = keep_from
+            if final:
+                return
+
+    def _scan(self, limit, final):
+        """Account for the lowered text in [_done, limit)"""
+        buffer = self._buffer
+        base = self._base
+        start = self._done
+        region = buffer[start - base:limit - base]
+        text_end = base + len(buffer) if final else None
+
+        # Words one at a time: a list of a window's words takes ~10 times its size
+        self.word_count += sum(1 for _ in lexical.WORD.finditer(region))
+        terms = self._terms
+        for token in lexical.iter_vocabulary_tokens(region):
+            self._token_count += 1
+            terms.add(token)
+
+        # Sentences, split on '.' like Transcript.sentences
+        dots = []
+        pieces = region.split('.')
+        offset = start
+        for number, piece in enumerate(pieces):
+            if number:
+                dots.append(offset - 1)
+                self._close_segment()
+            words = len(piece.split())
+            if words:
+                self._segment_words += words
+                if self._first_sentence is None:
+                    self._first_sentence = self._segments
+                self._last_sentence = self._segments
+            offset += len(piece) + 1
+        dots_before = self._segments - len(dots)
+
+        # Rubric phrases starting in the region (they end within the buffer)
+        scan_from = start - base
+        for local_start, phrase, category in self.rubric.matcher.finditer(buffer, scan_from):
+            hit = base + local_start
+            if hit >= limit:
+                continue
+            found = self._phrase_hits.setdefault(category, {})
+            found[phrase] = found.get(phrase, 0) + 1
+            if category == "filler":
+                self._count_filler(phrase, hit, text_end)
+            elif category in ("flow:salutation", "flow:closing"):
+                segment = dots_before + bisect_left(dots, hit)
+                if category == "flow:salutation":
+                    if segment == self._first_sentence:
+                        self._salutation_start = True
+                elif self._last_closing is None or segment > self._last_closing:
+                    self._last_closing = segment
+
+        # Grammar rules at every position in the region, as rubric.find_grammar_hits does
+        region_end = limit - base
+        groups = self.rubric._grammar_groups
+        for match in self.rubric.grammar_scan.finditer(buffer, scan_from):
+            if match.start() >= region_end:
+                break
+            for name, group in groups:
+                span_start, span_end = match.span(group)
+                if span_start != -1 and span_start + base >= self._grammar_next_free.get(name, 0):
+                    self._grammar[name] = self._grammar.get(name, 0) + 1
+                    self._grammar_next_free[name] = span_end + base
+
+        self._done = limit
+
+    def _close_segment(self):
+        if self._segment_words and self._segment_words < 3:
+            self._fragments += 1
+        self._segment_words = 0
+        self._segments += 1
+
+    def _count_filler(self, phrase, hit, text_end):
+        """scoring._count_standalone, one hit at a time"""
+        if phrase not in self._fillers or hit < self._filler_next_free.get(phrase, 0):
+            return
+        buffer = self._buffer
+        base = self._base
+        end = hit + len(phrase)
+        if hit > 0 and buffer[hit - 1 - base] != ' ':
+            return
+        if (text_end is None or end < text_end) and buffer[end - base] != ' ':
+            return
+        self._filler_counts[phrase] = self._filler_counts.get(phrase, 0) + 1
+        self._filler_next_free[phrase] = end + 2
+
+
+def grade_stream(pieces, duration_seconds=None, rubric=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 overlap=DEFAULT_OVERLAP):
+    """
+    Grade a transcript given as an iterable of text pieces.
+    Returns: the JSON report, as from grader.grade_transcript
+    """
+    grader = ChunkedGrader(rubric, chunk_size, overlap)
+    for piece in pieces:
+        grader.feed(piece)
+    results = grader.finish(duration_seconds)
+    return build_report(results, grader.word_count)
+
+
+def grade_file(path, duration_seconds=None, rubric=None, chunk_size=DEFAULT_CHUNK_SIZE,
+               overlap=DEFAULT_OVERLAP, encoding="utf-8"):
+    """Grade a text file without reading it into memory at once"""
+    with open(path, encoding=encoding, newline="") as transcript_file:
+        pieces = iter(lambda: transcript_file.read(chunk_size), "")
+        return grade_stream(pieces, duration_seconds, rubric, chunk_size, overlap)
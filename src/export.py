@@ -0,0 +1,224 @@
+"""
+Columnar export of graded reports, for analytics across cohorts.
+
+Each report becomes one flat row: the overall, criterion and component
+scores, plus the raw metrics behind them (grader.report_metrics), so a
+run over millions of transcripts loads into pandas as a table instead of
+millions of nested JSON documents. Rows are buffered and written in row
+groups (Parquet), record batches (Arrow IPC / Feather) or blocks of CSV
+lines, so memory stays bounded by `row_group_size`.
+
+Parquet and Arrow need pyarrow (pip install pyarrow); CSV only needs the
+standard library.
+
+    with open_writer("results.parquet") as table:
+        for report in grade_batch(texts, metrics=True):
+            table.write(report)
+    frame = read_table("results.parquet")
+"""
+import csv
+import os
+
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+# Report component name -> column
+COMPONENT_COLUMNS = {
+    "Salutation": "salutation_score",
+    "Must-have Keywords": "must_have_score",
+    "Good-to-have Keywords": "good_have_score",
+    "Flow": "flow_score",
+    "Speech Rate": "speech_rate_score",
+    "Grammar": "grammar_score",
+    "Vocabulary": "vocabulary_score",
+    "Filler Words": "filler_words_score",
+    "Sentiment": "sentiment_score",
+}
+CRITERION_COLUMNS = {
+    "Content & Structure": "content_score",
+    "Delivery & Style": "delivery_score",
+}
+METRIC_COLUMNS = ("wpm", "ttr", "filler_rate", "compound", "error_count")
+
+# Scores are floats so rubrics with fractional points fit the same schema
+COLUMNS = (("id", "string"), ("overall_score", "float"), ("word_count", "int"),
+           *((column, "float") for column in CRITERION_COLUMNS.values()),
+           *((column, "float") for column in COMPONENT_COLUMNS.values()),
+           *((column, "float") for column in METRIC_COLUMNS))
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+FORMATS = ("csv", "parquet", "arrow")
+EXTENSIONS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+
+def report_row(report, submission_id=None):
+    """
+    Flatten a report graded with metrics=True.
+    Returns: tuple of values in COLUMN_NAMES order
+    """
+    if "metrics" not in report:
+        raise ValueError("report has no metrics; grade it with metrics=True")
+    values = {"id": submission_id, "overall_score": report["overall_score"], "word_count": report["word_count"]}
+    for criterion in report["criteria"]:
+        values[CRITERION_COLUMNS[criterion["criterion"]]] = criterion["score"]
+        for component in criterion["components"]:
+            values[COMPONENT_COLUMNS[component["name"]]] = component["score"]
+    values.update(report["metrics"])
+    return tuple(values[name] for name in COLUMN_NAMES)
+
+
+def format_for_path(path):
+    """The export format implied by a file extension, or None"""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is required for Parquet and Arrow export (pip install pyarrow)")
+    return pyarrow
+
+
+class TableWriter:
+    """
+    Collects rows column by column and writes them every `row_group_size` rows.
+    Use as a context manager, or call close() to write the last group.
+    """
+
+    def __init__(self, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be at least 1")
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._columns = [[] for _ in COLUMNS]
+
+    def write(self, report, submission_id=None):
+        """Add one report (graded with metrics=True) as a row"""
+        self.write_row(report_row(report, submission_id))
+
+    def write_row(self, row):
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        if len(self._columns[0]) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        rows = len(self._columns[0])
+        if rows:
+            self._write_group(self._columns)
+            self.rows_written += rows
+            self._columns = [[] for _ in COLUMNS]
+
+    def close(self):
+        self.flush()
+
+    def _write_group(self, columns):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CSVTableWriter(TableWriter):
+    """CSV with a header line. `target` is a path or an open text file (left open)."""
+
+    def __init__(self, target, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        super().__init__(row_group_size)
+        self._owned = isinstance(target, (str, os.PathLike))
+        self._file = open(target, "w", encoding="utf-8", newline="") if self._owned else target
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMN_NAMES)
+
+    def _write_group(self, columns):
+        self._writer.writerows(zip(*columns))
+
+    def close(self):
+        super().close()
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class _ArrowTableWriter(TableWriter):
+    def __init__(self, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        super().__init__(row_group_size)
+        pyarrow = self._pyarrow = _import_pyarrow()
+        types = {"string": pyarrow.string(), "int": pyarrow.int64(), "float": pyarrow.float64()}
+        self.schema = pyarrow.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+    def _arrays(self, columns):
+        arrays = []
+        for (name, kind), values in zip(COLUMNS, columns):
+            if kind == "string":
+                # Submission ids may be numbers in the input JSON
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(self._pyarrow.array(values, type=self.schema.field(name).type))
+        return arrays
+
+
+class ParquetTableWriter(_ArrowTableWriter):
+    """Parquet, one row group per `row_group_size` rows"""
+
+    def __init__(self, target, row_group_size=DEFAULT_ROW_GROUP_SIZE, compression="snappy"):
+        super().__init__(row_group_size)
+        import pyarrow.parquet
+
+        self._writer = pyarrow.parquet.ParquetWriter(target, self.schema, compression=compression)
+
+    def _write_group(self, columns):
+        table = self._pyarrow.Table.from_arrays(self._arrays(columns), schema=self.schema)
+        self._writer.write_table(table, row_group_size=len(columns[0]))
+
+    def close(self):
+        super().close()
+        self._writer.close()
+
+
+class ArrowTableWriter(_ArrowTableWriter):
+    """Arrow IPC file (Feather v2), one record batch per `row_group_size` rows"""
+
+    def __init__(self, target, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+        super().__init__(row_group_size)
+        self._writer = self._pyarrow.ipc.new_file(target, self.schema)
+
+    def _write_group(self, columns):
+        self._writer.write_batch(self._pyarrow.record_batch(self._arrays(columns), schema=self.schema))
+
+    def close(self):
+        super().close()
+        self._writer.close()
+
+
+WRITERS = {"csv": CSVTableWriter, "parquet": ParquetTableWriter, "arrow": ArrowTableWriter}
+
+
+def open_writer(target, format=None, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """
+    A TableWriter for `target` (a path, or an open file).
+    format: "csv", "parquet" or "arrow"; by default taken from the file extension
+    """
+    if format is None:
+        format = format_for_path(str(target)) if isinstance(target, (str, os.PathLike)) else None
+        if format is None:
+            raise ValueError(f"cannot tell the export format of {target!r}; pass one of {', '.join(FORMATS)}")
+    if format not in WRITERS:
+        raise ValueError(f"unknown export format {format!r}, expected one of {', '.join(FORMATS)}")
+    return WRITERS[format](target, row_group_size=row_group_size)
+
+
+def read_table(path, format=None):
+    """Load an exported table into a pandas DataFrame"""
+    import pandas
+
+    format = format or format_for_path(str(path))
+    if format == "csv":
+        return pandas.read_csv(path, dtype={"id": "string"})
+    if format == "parquet":
+        return pandas.read_parquet(path)
+    if format == "arrow":
+        return pandas.read_feather(path)
+    raise ValueError(f"cannot tell the export format of {path!r}; pass one of {', '.join(FORMATS)}")
@@ -0,0 +1,300 @@
+"""
+Grade transcripts from a JSONL file (or stdin) and write one JSON report per line.
+
+Each input line is a JSON object holding the transcript text, e.g.
+    {"id": "s-001", "transcript": "Hello everyone, my name is ...", "duration_seconds": 52}
+or a bare JSON string, optionally with a "language" tag (e.g. "hi-IN") picking
+the rubric to grade it with (see languages.py). Output lines use the same structure as the app's JSON
+download, with the input id (if any) added as "id". With --format csv, parquet
+or arrow (or an -o path ending in .csv, .parquet or .arrow) one flat row per
+transcript is written instead, holding every score and metric (see export.py).
+With --similarity each JSONL report gets a "similarity" flag listing earlier
+submissions it nearly duplicates (see similarity.py). With --format store the
+reports are appended to a compact binary result store directory instead (see
+result_store.py). With --grammar languagetool grammar is checked by local
+LanguageTool servers instead of the rubric's rules (see languagetool.py).
+
+Usage:
+    python src/grade_cli.py submissions.jsonl > reports.jsonl
+    cat submissions.jsonl | python src/grade_cli.py --workers 8 > reports.jsonl
+    python src/grade_cli.py --rubric rubrics/grade5.json submissions.jsonl > reports.jsonl
+    python src/grade_cli.py --workers 8 submissions.jsonl -o results.parquet
+    python src/grade_cli.py --similarity --similarity-threshold 0.7 submissions.jsonl > reports.jsonl
+    python src/grade_cli.py --format store submissions.jsonl -o results.store
+    python src/grade_cli.py --grammar languagetool --workers 8 submissions.jsonl > reports.jsonl
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from collections import deque
+
+import export
+from batch import grade_pairs
+from instrumentation import Profiler
+from languages import get_registry
+from scoring import GRAMMAR_BACKENDS, set_grammar_backend
+
+TEXT_FIELDS = ("transcript", "text", "body")
+ID_FIELDS = ("id", "request_id", "submission_id")
+
+
+def _pick(record, field, candidates):
+    if field:
+        return record.get(field)
+    for name in candidates:
+        if name in record:
+            return record[name]
+    return None
+
+
+def valid_duration(value):
+    """Whether a submission's duration is a positive, finite number of seconds (a bool is not a number here)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    try:
+        return value > 0 and math.isfinite(value)
+    except OverflowError:
+        # An int too large for a float
+        return False
+
+
+def read_submissions(lines, text_field=None, id_field=None, duration_field="duration_seconds",
+                     language_field="language", language=None, errors=sys.stderr):
+    """
+    Parse JSONL lines lazily.
+    language: tag for lines without a `language_field`, None for the default language
+    Yields: (submission id or None, transcript text, duration in seconds or None,
+    registered language tag or None)
+    Lines that cannot be graded are reported to `errors` and skipped.
+    """
+    registry = get_registry()
+    # An unknown default language is the caller's mistake, so it raises ValueError
+    default_tag = registry.resolve(language) if language is not None else None
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            print(f"line {line_number}: invalid JSON ({e})", file=errors)
+            continue
+
+        if isinstance(record, str):
+            if not record.strip():
+                print(f"line {line_number}: no transcript text", file=errors)
+                continue
+            yield None, record, None, default_tag
+            continue
+        if not isinstance(record, dict):
+            print(f"line {line_number}: expected a JSON object or string", file=errors)
+            continue
+
+        text = _pick(record, text_field, TEXT_FIELDS)
+        if not isinstance(text, str) or not text.strip():
+            print(f"line {line_number}: no transcript text", file=errors)
+            continue
+
+        duration_seconds = record.get(duration_field)
+        if duration_seconds is not None and not valid_duration(duration_seconds):
+            print(f"line {line_number}: invalid {duration_field}, estimating it instead", file=errors)
+            duration_seconds = None
+
+        tag = record.get(language_field)
+        if tag is None:
+            tag = default_tag
+        elif not isinstance(tag, str):
+            print(f"line {line_number}: {language_field} must be a language tag such as \"en\"", file=errors)
+            continue
+        else:
+            try:
+                tag = registry.resolve(tag)
+            except ValueError as e:
+                print(f"line {line_number}: {e}", file=errors)
+                continue
+
+        yield _pick(record, id_field, ID_FIELDS), text, duration_seconds, tag
+
+
+def grade_lines(lines, out, workers=1, chunksize=64, max_in_flight=None, cache_path=None,
+                timings=False, profiler=None, rubric_path=None, table=None, similarity_index=None,
+                store=None, **read_options):
+    """
+    Grade JSONL `lines` and write JSONL reports to `out`, in input order.
+    Memory use is bounded by the chunks in flight, not by the input size.
+    timings: keep each report's per-scorer "timings" in the output
+    profiler: instrumentation.Profiler aggregating the timings of every report
+    rubric_path: rubric file to grade against instead of the default rubric
+    table: export.TableWriter to write one row per report to, instead of `out`
+    store: result_store.ResultStore to append every report to, instead of `out`
+    similarity_index: similarity.SimilarityIndex; adds a "similarity" flag to every
+    report and indexes it under its id (its position among the graded submissions
+    when it has none)
+    Returns: number of reports written
+    """
+    ids = deque()
+
+    def submissions():
+        for submission_id, text, duration_seconds, language in read_submissions(lines, **read_options):
+            ids.append(submission_id)
+            yield text, duration_seconds, language
+
+    if similarity_index is not None:
+        from similarity import similarity_flag
+
+    written = 0
+    reports = grade_pairs(submissions(), workers=workers, chunksize=chunksize,
+                          max_in_flight=max_in_flight, cache_path=cache_path,
+                          timings=timings or profiler is not None, rubric_path=rubric_path,
+                          metrics=table is not None,
+                          minhash=similarity_index.hasher if similarity_index is not None else None)
+    for report in reports:
+        submission_id = ids.popleft()
+        if profiler is not None:
+            # Workers are separate processes, so their timings are aggregated here
+            profiler.record_timings(report["timings"])
+            if not timings:
+                del report["timings"]
+        if similarity_index is not None:
+            doc_id = submission_id if submission_id is not None else written
+            report["similarity"] = similarity_flag(similarity_index.add(doc_id, report.pop("minhash")))
+        if table is not None:
+            table.write(report, submission_id)
+        elif store is not None:
+            store.write(report, submission_id)
+        else:
+            if submission_id is not None:
+                report = {"id": submission_id, **report}
+            out.write(json.dumps(report) + "\n")
+        written += 1
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade JSONL transcripts and write JSONL reports")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    parser.add_argument("--format", choices=("jsonl",) + export.FORMATS + ("store",), default=None,
+                        help="jsonl reports, one row per transcript, or a result store directory "
+                             "(default: from the -o extension, else jsonl)")
+    parser.add_argument("--row-group-size", type=int, default=export.DEFAULT_ROW_GROUP_SIZE,
+                        help="rows buffered per row group / batch of csv, parquet and arrow output")
+    parser.add_argument("--workers", type=int, default=1, help="grading processes")
+    parser.add_argument("--chunksize", type=int, default=64, help="transcripts per worker task")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="chunks buffered at once (default: 2 per worker)")
+    parser.add_argument("--text-field", default=None,
+                        help=f"field holding the transcript (default: first of {', '.join(TEXT_FIELDS)})")
+    parser.add_argument("--id-field", default=None,
+                        help=f"field holding the submission id (default: first of {', '.join(ID_FIELDS)})")
+    parser.add_argument("--duration-field", default="duration_seconds")
+    parser.add_argument("--language-field", default="language",
+                        help="field holding the transcript's language tag, e.g. \"hi-IN\"")
+    parser.add_argument("--language", default=None,
+                        help="language of transcripts without a language field (default: en, or --rubric)")
+    parser.add_argument("--rubric", default=None, metavar="PATH",
+                        help="rubric file (JSON or YAML) to grade against (default: rubrics/default.json)")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="SQLite file caching reports across runs (keeps the newest 100,000)")
+    parser.add_argument("--timings", action="store_true",
+                        help="add per-scorer wall/CPU times to every report (bypasses --cache)")
+    parser.add_argument("--similarity", action="store_true",
+                        help="flag submissions that nearly duplicate an earlier one (jsonl output)")
+    parser.add_argument("--similarity-threshold", type=float, default=0.8,
+                        help="estimated Jaccard similarity of word 3-grams that counts as a near-duplicate")
+    parser.add_argument("--grammar", choices=GRAMMAR_BACKENDS, default="regex",
+                        help="grammar checker: the rubric's rules, or LanguageTool (slower, more thorough)")
+    parser.add_argument("--languagetool-url", action="append", default=None, metavar="URL",
+                        help="running LanguageTool server to use (repeatable; default: start local servers)")
+    parser.add_argument("--languagetool-servers", type=int, default=2,
+                        help="LanguageTool servers to start when no --languagetool-url is given")
+    parser.add_argument("--metrics-out", default=None, metavar="PATH",
+                        help="write aggregated scorer timing histograms (.prom for Prometheus text, else JSON)")
+    args = parser.parse_args(argv)
+
+    output_format = args.format
+    if output_format is None:
+        output_format = (args.output != "-" and export.format_for_path(args.output)) or "jsonl"
+    if output_format in ("parquet", "arrow", "store") and args.output == "-":
+        parser.error(f"{output_format} output needs an -o path, e.g. -o results.{output_format}")
+    if output_format in export.FORMATS and (args.timings or args.similarity):
+        parser.error("--timings and --similarity only apply to jsonl and store output")
+    if not 0 < args.similarity_threshold <= 1:
+        parser.error("--similarity-threshold must be in (0, 1]")
+    for option in ("workers", "chunksize", "max_in_flight", "row_group_size", "languagetool_servers"):
+        value = getattr(args, option)
+        if value is not None and value < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+    if args.language is not None:
+        try:
+            get_registry().resolve(args.language)
+        except ValueError as e:
+            parser.error(str(e))
+    similarity_index = None
+    if args.similarity:
+        # numpy is only imported when asked for
+        from similarity import SimilarityIndex
+        similarity_index = SimilarityIndex(args.similarity_threshold)
+
+    profiler = Profiler() if args.metrics_out else None
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = table = store = servers = None
+    try:
+        if args.grammar == "languagetool":
+            urls = args.languagetool_url
+            if not urls:
+                from languagetool import LanguageToolServers
+                servers = LanguageToolServers(args.languagetool_servers)
+                try:
+                    servers.start()
+                except (OSError, RuntimeError) as e:
+                    parser.error(f"cannot start LanguageTool: {e}")
+                urls = servers.urls
+            # Worker processes build their clients from the environment
+            os.environ["SPEECH_GRADER_LANGUAGETOOL_URLS"] = ",".join(urls)
+            os.environ["SPEECH_GRADER_GRAMMAR_BACKEND"] = args.grammar
+        set_grammar_backend(args.grammar)
+        if output_format == "jsonl":
+            out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        elif output_format == "store":
+            # numpy is only imported when asked for
+            from result_store import ResultStore
+            store = ResultStore(args.output)
+        else:
+            table = export.open_writer(sys.stdout if args.output == "-" else args.output, output_format,
+                                       row_group_size=args.row_group_size)
+        grade_lines(source, out, workers=args.workers, chunksize=args.chunksize,
+                    max_in_flight=args.max_in_flight, cache_path=args.cache,
+                    timings=args.timings, profiler=profiler, rubric_path=args.rubric, table=table,
+                    similarity_index=similarity_index, store=store,
+                    text_field=args.text_field, id_field=args.id_field, duration_field=args.duration_field,
+                    language_field=args.language_field, language=args.language)
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into `head`); stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if table is not None:
+            table.close()
+        if store is not None:
+            store.close()
+        if servers is not None:
+            servers.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+
+    if profiler is not None:
+        with open(args.metrics_out, "w", encoding="utf-8") as metrics_file:
+            if args.metrics_out.endswith(".prom"):
+                metrics_file.write(profiler.to_prometheus())
+            else:
+                metrics_file.write(profiler.to_json())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import time
+
+from instrumentation import collect_timings
+from languages import rubric_for
+from rubric import get_default_rubric
+from scoring import (as_transcript, check_salutation, check_keyword_presence, check_flow,
+                     calculate_speech_rate, check_grammar, check_vocabulary_richness,
+                     check_filler_words, check_sentiment)
+
+
+SCORERS = {
+    "salutation": check_salutation,
+    "keywords": check_keyword_presence,
+    "flow": check_flow,
+    "speech_rate": calculate_speech_rate,
+    "grammar": check_grammar,
+    "vocabulary": check_vocabulary_richness,
+    "filler_words": check_filler_words,
+    "sentiment": check_sentiment,
+}
+
+
+def _scorer_args(name, transcript, duration_seconds):
+    if name == "speech_rate":
+        return transcript, duration_seconds
+    return (transcript,)
+
+
+def run_analyses(text, duration_seconds=None, rubric=None):
+    """
+    Run every scorer over one transcript, one after another. The scorers are
+    pure-Python and CPU-bound, so a thread pool only adds overhead (the GIL);
+    batches are spread over processes instead (batch.py).
+    rubric: CompiledRubric to grade against, defaults to rubric.get_default_rubric()
+    Returns: dict of scorer name -> the scorer's result tuple
+    """
+    transcript = as_transcript(text)
+    rubric = rubric or get_default_rubric()
+    return {name: scorer(*_scorer_args(name, transcript, duration_seconds), rubric=rubric)
+            for name, scorer in SCORERS.items()}
+
+
+def improvement_suggestions(results):
+    """
+    Suggestions for every component that scored below its target
+    """
+    salutation_score, _ = results["salutation"]
+    must_score, good_score, _ = results["keywords"]
+    speech_score, _, _ = results["speech_rate"]
+    grammar_score, _, _ = results["grammar"]
+    vocab_score, _, _ = results["vocabulary"]
+    filler_score, _, _ = results["filler_words"]
+    sentiment_score, _, _ = results["sentiment"]
+
+    suggestions = []
+    if salutation_score < 3:
+        suggestions.append("• Start with a proper greeting like 'Hello everyone' or 'Good morning'")
+    if must_score < 16:
+        suggestions.append("• Include all basic details: name, age, school, family, hobbies")
+    if good_score < 6:
+        suggestions.append("• Add personal touches like dreams, fun facts, or special family details")
+    if speech_score < 8:
+        suggestions.append("• Practice speaking at a steady pace (110-140 words per minute)")
+    if grammar_score < 8:
+        suggestions.append("• Review basic grammar rules for spoken English")
+    if vocab_score < 8:
+        suggestions.append("• Use more varied vocabulary in your speech")
+    if filler_score < 12:
+        suggestions.append("• Reduce filler words like 'um', 'uh', 'like' for clearer speech")
+    if sentiment_score < 12:
+        suggestions.append("• Show more enthusiasm and positivity in your delivery")
+    return suggestions
+
+
+def build_report(results, word_count):
+    """
+    Build the JSON report shown and downloaded by app.py
+    """
+    salutation_score, salutation_feedback = results["salutation"]
+    must_score, good_score, keyword_feedback = results["keywords"]
+    flow_score, flow_feedback = results["flow"]
+    speech_score, _, speech_feedback = results["speech_rate"]
+    grammar_score, _, grammar_feedback = results["grammar"]
+    vocab_score, _, vocab_feedback = results["vocabulary"]
+    filler_score, _, filler_feedback = results["filler_words"]
+    sentiment_score, _, sentiment_feedback = results["sentiment"]
+
+    # Calculate totals
+    content_score = salutation_score + must_score + good_score + flow_score
+    language_score = grammar_score + vocab_score
+    delivery_score = speech_score + filler_score + sentiment_score
+    total_score = content_score + language_score + delivery_score
+
+    return {
+        "overall_score": total_score,
+        "word_count": word_count,
+        "criteria": [
+            {
+                "criterion": "Content & Structure",
+                "score": content_score,
+                "max_score": 40,
+                "components": [
+                    {"name": "Salutation", "score": salutation_score, "max_score": 5, "feedback": salutation_feedback},
+                    {"name": "Must-have Keywords", "score": must_score, "max_score": 20, "feedback": keyword_feedback},
+                    {"name": "Good-to-have Keywords", "score": good_score, "max_score": 10, "feedback": keyword_feedback},
+                    {"name": "Flow", "score": flow_score, "max_score": 5, "feedback": flow_feedback}
+                ]
+            },
+            {
+                "criterion": "Delivery & Style",
+                "score": delivery_score,
+                "max_score": 60,
+                "components": [
+                    {"name": "Speech Rate", "score": speech_score, "max_score": 10, "feedback": speech_feedback},
+                    {"name": "Grammar", "score": grammar_score, "max_score": 10, "feedback": grammar_feedback},
+                    {"name": "Vocabulary", "score": vocab_score, "max_score": 10, "feedback": vocab_feedback},
+                    {"name": "Filler Words", "score": filler_score, "max_score": 15, "feedback": filler_feedback},
+                    {"name": "Sentiment", "score": sentiment_score, "max_score": 15, "feedback": sentiment_feedback}
+                ]
+            }
+        ],
+        "improvement_suggestions": improvement_suggestions(results)
+    }
+
+
+def report_metrics(results):
+    """
+    The raw measurements behind the scores, which the report itself only
+    mentions in feedback text (see export.py)
+    """
+    return {
+        "wpm": results["speech_rate"][1],
+        "ttr": results["vocabulary"][1],
+        "filler_rate": results["filler_words"][1],
+        "compound": results["sentiment"][1],
+        "error_count": results["grammar"][1],
+    }
+
+
+def grade_transcript(text, duration_seconds=None, timings=False, rubric=None, metrics=False, language=None):
+    """
+    Grade one transcript end to end.
+    timings: add a "timings" key with the wall/CPU time of each scorer
+    rubric: CompiledRubric to grade against, defaults to rubric.get_default_rubric()
+    metrics: add a "metrics" key, as from report_metrics
+    language: language tag (e.g. "hi-IN") picking the rubric from languages.py, when no rubric is given
+    Returns: the JSON report (dict)
+    """
+    transcript = as_transcript(text)
+    if rubric is None and language is not None:
+        rubric = rubric_for(language)
+    if not timings:
+        results = run_analyses(transcript, duration_seconds, rubric=rubric)
+        report = build_report(results, transcript.word_count)
+        if metrics:
+            report["metrics"] = report_metrics(results)
+        return report
+
+    start_cpu = time.thread_time()
+    start_wall = time.perf_counter()
+    with collect_timings() as scorer_timings:
+        results = run_analyses(transcript, duration_seconds, rubric=rubric)
+    report = build_report(results, transcript.word_count)
+    if metrics:
+        report["metrics"] = report_metrics(results)
+    scorer_timings["total"] = {
+        "wall_ms": (time.perf_counter() - start_wall) * 1000,
+        "cpu_ms": (time.thread_time() - start_cpu) * 1000,
+    }
+    report["timings"] = scorer_timings
+    return report
@@ -0,0 +1,342 @@
+"""
+Incremental re-scoring for live transcript editing.
+
+IncrementalGrader keeps a transcript split into units that end right after
+". " (a period followed by a space) together with per-unit counts: words,
+sentences and fragments, rubric phrase hits, standalone fillers, grammar rule
+hits and vocabulary tokens. Words, sentences, fillers and the default grammar
+rules never cross such a boundary, so the counts of the whole text are the
+sums of the unit counts. On each update the new text is split again, compared
+with the previous units, and only the units that changed are re-analyzed; the
+running totals are adjusted by the difference and only the scores whose
+inputs changed are recomputed.
+
+Sentiment (VADER) does not decompose into per-sentence parts, so it is
+re-run on the full text whenever the text changes.
+
+Results are identical to grader.run_analyses on the same text: a rubric with
+a phrase or grammar rule that could match across a ". " boundary makes the
+grader treat the whole text as a single unit. Grammar rules are judged from
+their parsed patterns; the default rules cannot cross a boundary.
+"""
+from collections import Counter
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+from grader import SCORERS, build_report
+from rubric import get_default_rubric
+from scoring import (Transcript, get_sentiment_analyzer, _hits_within, count_fragments, count_fillers,
+                     score_salutation, score_keywords, score_flow, score_speech_rate,
+                     score_grammar, score_vocabulary, score_filler_words, score_sentiment,
+                     score_positive_words)
+
+UNIT_END = ". "
+
+
+def split_units(text):
+    """Split text into units ending right after ". "; joining them gives back the text"""
+    parts = text.split(UNIT_END)
+    units = [part + UNIT_END for part in parts[:-1]]
+    units.append(parts[-1])
+    return units
+
+
+def _splits_safely(rubric):
+    """False if a rubric phrase or grammar rule can match across a unit boundary"""
+    for phrase, _ in rubric.matcher.phrases:
+        if (phrase[0].isspace() and len(phrase) > 1) or UNIT_END in phrase[:-1]:
+            return False
+    return all(_rule_splits_safely(pattern) for _, pattern, _, _ in rubric.grammar_rules)
+
+
+class _Unsafe(Exception):
+    """A pattern construct that may see across a unit boundary, or one _pattern_summary does not know"""
+
+
+def _rule_splits_safely(pattern):
+    """
+    False if the grammar rule pattern could match across a unit boundary: if a
+    match can start with the space of a ". ", contain a '.' followed by a
+    space, or be empty, or the pattern anchors to the start or end of the
+    text or looks around for a '.' or a space.
+    """
+    try:
+        nullable, first_space, _, pair, _ = _pattern_summary(sre_parse.parse(pattern), {})
+    except (_Unsafe, AttributeError, TypeError, ValueError):
+        return False
+    return not (nullable or first_space or pair)
+
+
+def _pattern_summary(items, groups):
+    """
+    items: a parsed pattern (or part of one)
+    groups: {group number: summary} of the groups seen so far, for backreferences
+    Returns: (can match empty, can start with ' ', can end with '.',
+    can match '.' then ' ', can match '.' or ' ' anywhere)
+    """
+    nullable, first_space, last_dot, pair, touches = True, False, False, False, False
+    for op, av in items:
+        item = _item_summary(op, av, groups)
+        pair = pair or item[3] or (last_dot and item[1])
+        first_space = first_space or (nullable and item[1])
+        last_dot = item[2] or (item[0] and last_dot)
+        nullable = nullable and item[0]
+        touches = touches or item[4]
+    return nullable, first_space, last_dot, pair, touches
+
+
+def _item_summary(op, av, groups):
+    c = sre_constants
+    if op in (c.LITERAL, c.NOT_LITERAL, c.ANY, c.IN):
+        space, dot = _char_matches(op, av, " "), _char_matches(op, av, ".")
+        return False, space, dot, False, space or dot
+    if op is c.SUBPATTERN:
+        summary = _pattern_summary(av[-1], groups)
+        if av[0] is not None:
+            groups[av[0]] = summary
+        return summary
+    if op is c.BRANCH:
+        summaries = [_pattern_summary(branch, groups) for branch in av[1]]
+        return tuple(any(values) for values in zip(*summaries))
+    if op in (c.MAX_REPEAT, c.MIN_REPEAT) or op is getattr(c, "POSSESSIVE_REPEAT", None):
+        low, high, body = av
+        nullable, first_space, last_dot, pair, touches = _pattern_summary(body, groups)
+        pair = pair or (high > 1 and last_dot and first_space)
+        return low == 0 or nullable, first_space, last_dot, pair, touches
+    if op is getattr(c, "ATOMIC_GROUP", None):
+        return _pattern_summary(av, groups)
+    if op is c.AT and av in (c.AT_BOUNDARY, c.AT_NON_BOUNDARY):
+        # A unit starts after a space and ends with one, so \b and \B see the same at its edges
+        return True, False, False, False, False
+    if op in (c.ASSERT, c.ASSERT_NOT) and not _pattern_summary(av[1], groups)[4]:
+        return True, False, False, False, False
+    if op is c.GROUPREF and av in groups:
+        return groups[av]
+    raise _Unsafe(op)
+
+
+def _char_matches(op, av, char):
+    """Whether the one-character pattern item (op, av) matches `char` ('.' or ' ')"""
+    c = sre_constants
+    if op is c.LITERAL:
+        return av == ord(char)
+    if op is c.NOT_LITERAL:
+        return av != ord(char)
+    if op is c.ANY:
+        return True
+    if op is c.RANGE:
+        return av[0] <= ord(char) <= av[1]
+    if op is c.CATEGORY:
+        if av in (c.CATEGORY_SPACE, c.CATEGORY_NOT_SPACE):
+            return char.isspace() == (av == c.CATEGORY_SPACE)
+        if av in (c.CATEGORY_DIGIT, c.CATEGORY_WORD):
+            return False
+        if av in (c.CATEGORY_NOT_DIGIT, c.CATEGORY_NOT_WORD):
+            return True
+    if op is c.IN:
+        negate = bool(av) and av[0][0] is c.NEGATE
+        found = any(_char_matches(item_op, item_av, char) for item_op, item_av in av[negate:])
+        return found != negate
+    raise _Unsafe(op)
+
+
+class UnitStats:
+    """Counts for one unit of the transcript"""
+    __slots__ = ("words", "sentences", "fragments", "opens_with_salutation", "ends_with_closing",
+                 "phrases", "fillers", "grammar", "tokens")
+
+    def __init__(self, text, rubric):
+        transcript = Transcript(text)
+        phrase_hits = transcript.phrase_hits(rubric)
+        spans = transcript.lower_sentence_spans
+
+        self.words = transcript.word_count
+        self.sentences = len(spans)
+        self.fragments = count_fragments(transcript.sentences)
+        # Flow only looks at the first and last sentence of the whole text
+        self.opens_with_salutation = bool(spans) and _hits_within(phrase_hits.get("flow:salutation", {}), spans[0])
+        self.ends_with_closing = bool(spans) and _hits_within(phrase_hits.get("flow:closing", {}), spans[-1])
+        self.phrases = Counter({(category, phrase): len(starts)
+                                for category, found in phrase_hits.items()
+                                for phrase, starts in found.items()})
+        fillers = count_fillers(transcript.lower, phrase_hits.get("filler", {}), rubric)
+        self.fillers = Counter({filler: count for filler, count in fillers.items() if count})
+        self.grammar = Counter({name: len(hits) for name, hits in rubric.find_grammar_hits(transcript.lower).items()})
+        self.tokens = Counter(transcript.tokens)
+
+
+class IncrementalGrader:
+    """
+    Re-scores a transcript as it is edited, re-analyzing only the changed units.
+
+        grader = IncrementalGrader()
+        results = grader.update(text, duration_seconds)   # after every edit
+        report = grader.report()
+    """
+
+    def __init__(self, rubric=None):
+        self.rubric = rubric or get_default_rubric()
+        self._splits = _splits_safely(self.rubric)
+        self.text = None
+        self.duration_seconds = None
+        self._units = []
+        self._stats = []
+        self.units_analyzed = 0  # units re-analyzed by the last update
+
+        # Running totals over all units
+        self.word_count = 0
+        self._fragments = 0
+        self._phrase_hits = {}  # {category: {phrase: hits}}, like Transcript.phrase_hits
+        self._fillers = Counter()
+        self._grammar = Counter()
+        self._tokens = Counter()
+        self._token_count = 0
+        self._results = {}
+
+    def update(self, text, duration_seconds=None):
+        """
+        Bring the scores up to date with the edited text.
+        Returns: dict of scorer name -> result tuple, as from grader.run_analyses
+        """
+        if text == self.text and duration_seconds == self.duration_seconds and self._results:
+            self.units_analyzed = 0
+            return self._results
+
+        units = split_units(text) if self._splits else [text]
+        old_units = self._units
+
+        # Units unchanged at the start and at the end are kept as they are
+        limit = min(len(units), len(old_units))
+        prefix = 0
+        while prefix < limit and units[prefix] == old_units[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and units[-1 - suffix] == old_units[-1 - suffix]:
+            suffix += 1
+
+        changed = self._replace(prefix, len(old_units) - suffix, units[prefix:len(units) - suffix])
+        if text != self.text:
+            changed.add("text")
+        if duration_seconds != self.duration_seconds:
+            changed.add("duration")
+        self.text = text
+        self.duration_seconds = duration_seconds
+
+        self._rescore(changed if self._results else None)
+        return self._results
+
+    def _replace(self, start, stop, units):
+        """
+        Replace the units [start:stop] with `units`, analyzing only the ones not seen among them before.
+        Returns: names of the changed inputs, as from _apply
+        """
+        old_units = self._units[start:stop]
+        removed = self._stats[start:stop]
+        # Sentences that were only moved keep their counts
+        reusable = dict(zip(old_units, removed))
+        added = []
+        self.units_analyzed = 0
+        for unit in units:
+            stats = reusable.get(unit)
+            if stats is None:
+                stats = UnitStats(unit, self.rubric)
+                self.units_analyzed += 1
+            added.append(stats)
+
+        old_flow_edges = self._flow_edges()
+        changed = self._apply(removed, added)
+        self._units[start:stop] = units
+        self._stats[start:stop] = added
+        if self._flow_edges() != old_flow_edges:
+            changed.add("flow_edges")
+        return changed
+
+    def report(self):
+        """The JSON report for the current text, as from grader.grade_transcript"""
+        return build_report(self._results, self.word_count)
+
+    def _apply(self, removed, added):
+        """Move the running totals from the removed to the added units. Returns: names of the changed inputs"""
+        changed = set()
+        words = self.word_count
+        fragments = self._fragments
+        terms = len(self._tokens)
+        for stats, sign in [(stats, -1) for stats in removed] + [(stats, 1) for stats in added]:
+            self.word_count += sign * stats.words
+            self._fragments += sign * stats.fragments
+            for (category, phrase), hits in stats.phrases.items():
+                found = self._phrase_hits.setdefault(category, {})
+                total = found.get(phrase, 0) + sign * hits
+                if total:
+                    if phrase not in found:
+                        changed.add("phrases")
+                    found[phrase] = total
+                else:
+                    del found[phrase]
+                    changed.add("phrases")
+                    if not found:
+                        del self._phrase_hits[category]
+            if stats.fillers:
+                self._fillers.update({filler: sign * count for filler, count in stats.fillers.items()})
+                changed.add("fillers")
+            if stats.grammar:
+                self._grammar.update({name: sign * count for name, count in stats.grammar.items()})
+                changed.add("grammar")
+            for token, count in stats.tokens.items():
+                self._token_count += sign * count
+                total = self._tokens[token] + sign * count
+                if total:
+                    self._tokens[token] = total
+                else:
+                    del self._tokens[token]
+            if stats.tokens:
+                changed.add("tokens")
+
+        if self.word_count != words:
+            changed.add("words")
+        if self._fragments != fragments:
+            changed.add("grammar")
+        if len(self._tokens) != terms:
+            changed.add("tokens")
+        return changed
+
+    def _flow_edges(self):
+        """(first sentence has a salutation, last sentence has a closing)"""
+        first = next((stats for stats in self._stats if stats.sentences), None)
+        last = next((stats for stats in reversed(self._stats) if stats.sentences), None)
+        return (first is not None and first.opens_with_salutation,
+                last is not None and last.ends_with_closing)
+
+    def _rescore(self, changed):
+        """Recompute the scores whose inputs are in `changed` (all of them when None)"""
+        def affected(*inputs):
+            return changed is None or not changed.isdisjoint(inputs)
+
+        rubric = self.rubric
+        results = self._results
+        if affected("phrases"):
+            results["salutation"] = score_salutation(self._phrase_hits, rubric)
+            results["keywords"] = score_keywords(self._phrase_hits, rubric)
+        if affected("phrases", "flow_edges"):
+            opens, closes = self._flow_edges()
+            results["flow"] = score_flow(opens, closes, bool(self._phrase_hits.get("flow:basic_details")), rubric)
+        if affected("words", "duration"):
+            results["speech_rate"] = score_speech_rate(self.word_count, self.duration_seconds, rubric)
+        if affected("words", "grammar"):
+            results["grammar"] = score_grammar(self._grammar, self._fragments, self.word_count, rubric)
+        if affected("tokens"):
+            results["vocabulary"] = score_vocabulary(self._token_count, len(self._tokens), rubric)
+        if affected("words", "fillers"):
+            results["filler_words"] = score_filler_words(self._fillers, self.word_count, rubric)
+        if affected("text"):
+            try:
+                compound = get_sentiment_analyzer(rubric).polarity_scores(self.text)['compound']
+                results["sentiment"] = score_sentiment(compound, rubric)
+            except Exception:
+                results["sentiment"] = score_positive_words(self._phrase_hits, self.word_count, rubric)
+        # Keep the scorer order of grader.SCORERS
+        self._results = {name: results[name] for name in SCORERS}
@@ -0,0 +1,202 @@
+"""
+Opt-in timing and allocation instrumentation for the scorers.
+
+Every scorer in scoring.py is wrapped with @instrumented. While nothing is
+enabled the wrapper only checks two globals and calls straight through. Two
+independent switches turn measurement on:
+
+- enable() installs a process-wide Profiler that aggregates every call into
+  histograms, exportable as JSON or Prometheus text format.
+- collect_timings() captures the calls made inside a `with` block (in this
+  thread and in executor tasks started with copy_context), which is how
+  grader.grade_transcript(timings=True) fills the report's "timings" key.
+
+Wall time comes from time.perf_counter, CPU time from time.thread_time. When
+allocation tracing is on, tracemalloc reports the peak and net bytes allocated
+during the call.
+"""
+import bisect
+import contextvars
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+SECONDS_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+_profiler = None
+_collector = contextvars.ContextVar("scorer_timings", default=None)
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus `le` (less than or equal) semantics"""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound)], ending with +Inf"""
+        total = 0
+        rows = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            rows.append((bound, total))
+        return rows
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {_format_bound(bound): count for bound, count in self.cumulative()},
+        }
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class Profiler:
+    """
+    Aggregates per-scorer measurements into histograms.
+    trace_allocations: also measure allocations with tracemalloc (slower)
+    """
+
+    def __init__(self, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        self._scorers = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, timing):
+        """timing: dict as produced by the @instrumented wrapper (ms and bytes)"""
+        with self._lock:
+            stats = self._scorers.get(name)
+            if stats is None:
+                stats = self._scorers[name] = {
+                    "wall_seconds": Histogram(SECONDS_BUCKETS),
+                    "cpu_seconds": Histogram(SECONDS_BUCKETS),
+                    "alloc_peak_bytes": Histogram(BYTES_BUCKETS),
+                }
+            stats["wall_seconds"].observe(timing["wall_ms"] / 1000)
+            stats["cpu_seconds"].observe(timing["cpu_ms"] / 1000)
+            if "alloc_peak_bytes" in timing:
+                stats["alloc_peak_bytes"].observe(timing["alloc_peak_bytes"])
+
+    def record_timings(self, timings):
+        """Add a report's "timings" dict, e.g. one graded in a worker process"""
+        for name, timing in timings.items():
+            self.record(name, timing)
+
+    def to_dict(self):
+        with self._lock:
+            return {name: {metric: histogram.to_dict() for metric, histogram in stats.items()
+                           if histogram.count}
+                    for name, stats in self._scorers.items()}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self, prefix="speech_grader_scorer"):
+        descriptions = {
+            "wall_seconds": "Wall-clock time per scorer call",
+            "cpu_seconds": "CPU time per scorer call",
+            "alloc_peak_bytes": "Peak bytes allocated during a scorer call",
+        }
+        lines = []
+        with self._lock:
+            for metric, description in descriptions.items():
+                series = [(name, stats[metric]) for name, stats in sorted(self._scorers.items())
+                          if stats[metric].count]
+                if not series:
+                    continue
+                full_name = f"{prefix}_{metric}"
+                lines.append(f"# HELP {full_name} {description}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for name, histogram in series:
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{full_name}_bucket{{scorer="{name}",le="{_format_bound(bound)}"}} {count}')
+                    lines.append(f'{full_name}_sum{{scorer="{name}"}} {histogram.sum!r}')
+                    lines.append(f'{full_name}_count{{scorer="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+def enable(trace_allocations=False):
+    """Start aggregating every scorer call into a new process-wide Profiler"""
+    global _profiler
+    if trace_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _profiler = Profiler(trace_allocations)
+    return _profiler
+
+
+def disable():
+    global _profiler
+    _profiler = None
+
+
+def get_profiler():
+    """The active Profiler, or None"""
+    return _profiler
+
+
+@contextmanager
+def collect_timings():
+    """
+    Capture the timings of every scorer called inside the block.
+    Yields: dict of scorer name -> timing, filled in as scorers finish
+    """
+    timings = {}
+    token = _collector.set(timings)
+    try:
+        yield timings
+    finally:
+        _collector.reset(token)
+
+
+def instrumented(name):
+    """Decorator measuring each call of a scorer when instrumentation is on"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler
+            timings = _collector.get()
+            if profiler is None and timings is None:
+                return func(*args, **kwargs)
+
+            tracing = tracemalloc.is_tracing() and (profiler is None or profiler.trace_allocations)
+            if tracing:
+                # Peak tracking is process-wide, so concurrent calls share it.
+                # reset_peak needs Python 3.9; before that the peak is since tracing began
+                if hasattr(tracemalloc, "reset_peak"):
+                    tracemalloc.reset_peak()
+                start_memory = tracemalloc.get_traced_memory()[0]
+            start_cpu = time.thread_time()
+            start_wall = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timing = {
+                    "wall_ms": (time.perf_counter() - start_wall) * 1000,
+                    "cpu_ms": (time.thread_time() - start_cpu) * 1000,
+                }
+                if tracing:
+                    current, peak = tracemalloc.get_traced_memory()
+                    timing["alloc_peak_bytes"] = max(peak - start_memory, 0)
+                    timing["alloc_net_bytes"] = current - start_memory
+                if timings is not None:
+                    timings[name] = timing
+                if profiler is not None:
+                    profiler.record(name, timing)
+        return wrapper
+    return decorator
@@ -0,0 +1,167 @@
+"""
+Per-language grading resources, loaded on first use.
+
+Everything language-specific lives in a rubric: the salutation, keyword,
+flow and filler phrase lists (compiled into the phrase matcher), the
+grammar rules, and optionally a sentiment lexicon (`sentiment.lexicon`, a
+VADER-format word list used instead of VADER's English one). A
+LanguageRegistry maps language tags to rubric files and only loads a
+language when a transcript in it is first graded. The loaded language is
+then shared by the whole process. At most `max_loaded` languages stay in
+memory; the least recently used one is unloaded, sentiment lexicon
+included, to make room.
+
+The process-wide registry knows "en" (the default rubric) plus every
+rubric file in rubrics/languages/ (or $SPEECH_GRADER_LANGUAGES_DIR), named
+after its tag, e.g. rubrics/languages/hi.json. $SPEECH_GRADER_MAX_LANGUAGES
+bounds how many stay loaded per process (4 by default).
+
+    from grader import grade_transcript
+    report = grade_transcript(text, duration, language="hi-IN")
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from rubric import get_default_rubric, load_compiled_rubric
+from scoring import release_sentiment_analyzer
+
+DEFAULT_LANGUAGE = "en"
+DEFAULT_MAX_LOADED = 4
+DEFAULT_LANGUAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rubrics', 'languages')
+RUBRIC_EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+def normalize_tag(tag):
+    """'hi_IN' and 'HI-in' both become 'hi-in'"""
+    return tag.strip().replace("_", "-").lower()
+
+
+class LanguageRegistry:
+    """
+    Language tag -> rubric file, with the compiled rubrics kept in an LRU of
+    at most `max_loaded` languages. Safe to use from several threads.
+    """
+
+    def __init__(self, max_loaded=DEFAULT_MAX_LOADED, default_language=DEFAULT_LANGUAGE):
+        if max_loaded < 1:
+            raise ValueError("max_loaded must be at least 1")
+        self.max_loaded = max_loaded
+        self.default_language = normalize_tag(default_language)
+        self.loads = 0
+        self.unloads = 0
+        self._paths = {}  # tag -> rubric path, or None for the default rubric
+        self._loaded = OrderedDict()  # tag -> CompiledRubric, least recently used first
+        self._lock = threading.Lock()
+
+    def register(self, tag, rubric_path=None):
+        """
+        Grade `tag` transcripts against `rubric_path` (None: the default rubric).
+        Nothing is loaded until the language is first used.
+        """
+        tag = normalize_tag(tag)
+        with self._lock:
+            self._paths[tag] = rubric_path
+            self._unload(tag)
+
+    def register_directory(self, path):
+        """Register every rubric file in `path` under its file name, e.g. hi-in.json as 'hi-in'"""
+        if not os.path.isdir(path):
+            return
+        for name in sorted(os.listdir(path)):
+            stem, extension = os.path.splitext(name)
+            if extension.lower() in RUBRIC_EXTENSIONS:
+                self.register(stem, os.path.join(path, name))
+
+    @property
+    def tags(self):
+        return sorted(self._paths)
+
+    def loaded(self):
+        """Tags of the loaded languages, least recently used first"""
+        with self._lock:
+            return list(self._loaded)
+
+    def resolve(self, tag):
+        """
+        The registered tag to grade `tag` with: the tag itself, else its
+        shorter prefixes ('hi-latn-in', 'hi-latn', 'hi'). None or '' is the
+        default language.
+        Raises ValueError for a language that is not registered
+        """
+        if tag is None or not tag.strip():
+            tag = self.default_language
+        parts = normalize_tag(tag).split("-")
+        for end in range(len(parts), 0, -1):
+            candidate = "-".join(parts[:end])
+            if candidate in self._paths:
+                return candidate
+        raise ValueError(f"no rubric registered for language {tag!r} (known: {', '.join(self.tags)})")
+
+    def rubric(self, tag=None):
+        """The CompiledRubric for a language tag, loading it on first use"""
+        tag = self.resolve(tag)
+        with self._lock:
+            rubric = self._loaded.get(tag)
+            if rubric is not None:
+                self._loaded.move_to_end(tag)
+                return rubric
+            path = self._paths[tag]
+            rubric = get_default_rubric() if path is None else load_compiled_rubric(path)
+            self._loaded[tag] = rubric
+            self.loads += 1
+            while len(self._loaded) > self.max_loaded:
+                self._unload(next(iter(self._loaded)))
+            return rubric
+
+    def unload(self, tag):
+        """Drop a language's resources; it is reloaded when next used"""
+        with self._lock:
+            self._unload(self.resolve(tag))
+
+    def _unload(self, tag):
+        rubric = self._loaded.pop(tag, None)
+        if rubric is None:
+            return
+        self.unloads += 1
+        lexicon = rubric.sentiment.get("lexicon")
+        # Lexicons may be shared, e.g. by regional variants of one language
+        if lexicon is not None and all(other.sentiment.get("lexicon") != lexicon
+                                       for other in self._loaded.values()):
+            release_sentiment_analyzer(lexicon)
+
+
+def default_registry():
+    """'en' plus the rubric files in the languages directory"""
+    registry = LanguageRegistry(int(os.environ.get("SPEECH_GRADER_MAX_LANGUAGES", DEFAULT_MAX_LOADED)))
+    registry.register(DEFAULT_LANGUAGE)
+    registry.register_directory(os.environ.get("SPEECH_GRADER_LANGUAGES_DIR", DEFAULT_LANGUAGES_DIR))
+    return registry
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """The process-wide LanguageRegistry, built on first use"""
+    global _registry
+    registry = _registry
+    if registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = default_registry()
+            registry = _registry
+    return registry
+
+
+def set_registry(registry):
+    """Replace the process-wide registry"""
+    global _registry
+    with _registry_lock:
+        _registry = registry
+
+
+def rubric_for(language):
+    """The rubric to grade a transcript in `language` with, from the process-wide registry"""
+    return get_registry().rubric(language)
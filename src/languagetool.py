@@ -0,0 +1,425 @@
+"""
+LanguageTool-backed grammar checking, on local servers only.
+
+The regex rules in the rubric catch a handful of common mistakes;
+LanguageTool catches far more, but every check is an HTTP round trip to a
+JVM. To keep it off the critical path:
+
+- LanguageToolServers runs a pool of local LanguageTool server processes
+  (nothing is sent off the machine). Alternatively, point the client at
+  servers that are already running.
+- LanguageToolClient sends one transcript's sentences to the servers at the
+  same time, over a pool of keep-alive connections per server.
+- Results are cached per sentence, so sentences repeated across templated
+  introductions ("My name is ...", "Thank you for listening") are checked
+  once.
+- A transcript that cannot be checked within `timeout` seconds, or while
+  every server is down or the request queue is full, gets None and is
+  graded with the regex rules instead (scoring.check_grammar).
+
+Spelling, casing, punctuation and typography rules are disabled, since
+speech transcripts rarely have reliable punctuation and names are not typos.
+
+LanguageTool itself is the Java distribution that language_tool_python
+downloads on first use (python -c "import language_tool_python;
+language_tool_python.LanguageTool('en-US').close()"), or any unpacked
+LanguageTool directory; Java must be installed.
+
+    python src/languagetool.py --servers 4 --port 8081
+    SPEECH_GRADER_GRAMMAR_BACKEND=languagetool \\
+    SPEECH_GRADER_LANGUAGETOOL_URLS=http://127.0.0.1:8081,http://127.0.0.1:8082 python src/server.py
+"""
+import argparse
+import glob
+import http.client
+import json
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlencode, urlsplit
+
+DEFAULT_PORT = 8081
+DEFAULT_SERVERS = 2
+DEFAULT_CONNECTIONS = 4
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_REQUEST_TIMEOUT = 10.0
+DEFAULT_CACHE_SIZE = 100000
+DEFAULT_RETRY_AFTER = 5.0
+DISABLED_CATEGORIES = ("TYPOS", "CASING", "PUNCTUATION", "TYPOGRAPHY")
+SERVER_JAR = "languagetool-server.jar"
+SERVER_CLASS = "org.languagetool.server.HTTPServer"
+
+
+class _Server:
+    """One LanguageTool server: its idle keep-alive connections and health"""
+
+    def __init__(self, url, connections):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path.rstrip("/") + "/v2/check"
+        self.slots = threading.BoundedSemaphore(connections)
+        self.idle = queue.SimpleQueue()
+        self.down_until = 0.0
+
+    def request(self, body, timeout):
+        """POST a check; Returns: the decoded JSON response"""
+        try:
+            connection = self.idle.get_nowait()
+        except queue.Empty:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        try:
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            connection.request("POST", self.path, body,
+                               {"Content-Type": "application/x-www-form-urlencoded"})
+            response = connection.getresponse()
+            payload = response.read()
+            if response.status != 200:
+                raise OSError(f"LanguageTool at {self.url} answered {response.status}")
+        except BaseException:
+            connection.close()
+            raise
+        self.idle.put(connection)
+        return json.loads(payload)
+
+
+class LanguageToolClient:
+    """
+    Checks sentences on a set of LanguageTool servers.
+    urls: base URLs of running servers, e.g. ["http://127.0.0.1:8081"]
+    connections_per_server: concurrent requests (and kept-alive connections) per server
+    timeout: seconds a transcript's check may take before falling back
+    request_timeout: seconds one request may take; answers arriving after
+    `timeout` still fill the cache for the next transcript
+    cache_size: sentences whose results are kept (least recently used dropped first)
+    retry_after: seconds a server that failed is skipped for
+    """
+
+    def __init__(self, urls, connections_per_server=DEFAULT_CONNECTIONS, timeout=DEFAULT_TIMEOUT,
+                 request_timeout=DEFAULT_REQUEST_TIMEOUT, cache_size=DEFAULT_CACHE_SIZE,
+                 retry_after=DEFAULT_RETRY_AFTER):
+        if not urls:
+            raise ValueError("at least one LanguageTool server URL is required")
+        if connections_per_server < 1:
+            raise ValueError("connections_per_server must be at least 1")
+        self.timeout = timeout
+        self.request_timeout = max(request_timeout, timeout)
+        self.cache_size = cache_size
+        self.retry_after = retry_after
+        self.requests = 0
+        self.cache_hits = 0
+        self.failures = 0
+        self.rejected = 0
+        self._servers = [_Server(url, connections_per_server) for url in urls]
+        self._next_server = 0
+        self._max_in_flight = len(self._servers) * connections_per_server * 8
+        self._in_flight = 0
+        self._cache = OrderedDict()  # (language, sentence) -> tuple of issues
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=len(self._servers) * connections_per_server,
+                                            thread_name_prefix="languagetool")
+
+    def _cached(self, key):
+        with self._lock:
+            issues = self._cache.get(key)
+            if issues is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+            return issues
+
+    def _remember(self, key, issues):
+        with self._lock:
+            self._cache[key] = issues
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _pick_server(self):
+        """The next healthy server, round robin, or None when all are down"""
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self._servers)):
+                server = self._servers[self._next_server]
+                self._next_server = (self._next_server + 1) % len(self._servers)
+                if server.down_until <= now:
+                    return server
+        return None
+
+    def _check_sentence(self, sentence, language, deadline):
+        """Returns: tuple of issue descriptions; raises when no server answered in time"""
+        body = urlencode({"language": language, "text": sentence,
+                          "disabledCategories": ",".join(DISABLED_CATEGORIES)})
+        error = None
+        try:
+            # Another server is tried when one fails, while time is left
+            for _ in range(len(self._servers)):
+                server = self._pick_server()
+                remaining = deadline - time.monotonic()
+                if server is None or remaining <= 0:
+                    break
+                if not server.slots.acquire(timeout=remaining):
+                    break
+                try:
+                    with self._lock:
+                        self.requests += 1
+                    response = server.request(body, self.request_timeout)
+                except (OSError, http.client.HTTPException, ValueError) as e:
+                    with self._lock:
+                        self.failures += 1
+                    server.down_until = time.monotonic() + self.retry_after
+                    error = e
+                    continue
+                finally:
+                    server.slots.release()
+                issues = tuple(match["rule"].get("description") or match.get("shortMessage") or match["message"]
+                               for match in response.get("matches", ())
+                               if match["rule"].get("category", {}).get("id") not in DISABLED_CATEGORIES)
+                self._remember((language, sentence), issues)
+                return issues
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        raise error or TimeoutError("no LanguageTool server answered in time")
+
+    def check(self, sentences, language="en-US"):
+        """
+        sentences: the transcript's sentences
+        Returns: [issue description] for every error in the sentences, in order,
+        or None when they could not all be checked within the timeout
+        """
+        deadline = time.monotonic() + self.timeout
+        results = {}
+        pending = {}
+        for sentence in sentences:
+            sentence = sentence.strip()
+            if not sentence or sentence in results or sentence in pending:
+                continue
+            issues = self._cached((language, sentence))
+            if issues is not None:
+                results[sentence] = issues
+                continue
+            with self._lock:
+                if self._in_flight >= self._max_in_flight:
+                    # The servers are behind; answer from the regex rules instead of queueing
+                    self.rejected += 1
+                    return None
+                self._in_flight += 1
+            pending[sentence] = self._executor.submit(self._check_sentence, sentence, language, deadline)
+
+        if pending:
+            # Checks still running after the deadline finish in the background and fill the cache
+            _, not_done = wait(pending.values(), timeout=max(deadline - time.monotonic(), 0))
+            if not_done:
+                return None
+            for sentence, future in pending.items():
+                if future.exception() is not None:
+                    return None
+                results[sentence] = future.result()
+        return [issue for sentence in sentences if sentence.strip() for issue in results[sentence.strip()]]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "servers": len(self._servers),
+                "servers_down": sum(1 for server in self._servers if server.down_until > time.monotonic()),
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "cache_size": len(self._cache),
+                "failures": self.failures,
+                "rejected": self.rejected,
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for server in self._servers:
+            while True:
+                try:
+                    server.idle.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+def find_languagetool_dir(directory=None):
+    """
+    The LanguageTool directory holding languagetool-server.jar: `directory`,
+    else $SPEECH_GRADER_LANGUAGETOOL_DIR, else the newest version downloaded
+    by language_tool_python ($LTP_PATH or ~/.cache/language_tool_python)
+    """
+    candidates = [directory, os.environ.get("SPEECH_GRADER_LANGUAGETOOL_DIR"), os.environ.get("LTP_PATH"),
+                  os.path.join(os.path.expanduser("~"), ".cache", "language_tool_python")]
+    for candidate in filter(None, candidates):
+        if os.path.isfile(os.path.join(candidate, SERVER_JAR)):
+            return candidate
+        versions = sorted(glob.glob(os.path.join(candidate, "LanguageTool-*", SERVER_JAR)))
+        if versions:
+            return os.path.dirname(versions[-1])
+        if candidate is directory:
+            break
+    raise FileNotFoundError(f"no {SERVER_JAR} found; install LanguageTool (see languagetool.py) "
+                            "or set SPEECH_GRADER_LANGUAGETOOL_DIR")
+
+
+def _port_free(port):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        return probe.connect_ex(("127.0.0.1", port)) != 0
+
+
+class LanguageToolServers:
+    """
+    A pool of local LanguageTool server processes on consecutive free ports
+    from `port`, bound to 127.0.0.1. Use as a context manager, or call
+    start() and close().
+    """
+
+    def __init__(self, count=DEFAULT_SERVERS, port=DEFAULT_PORT, directory=None, java="java",
+                 heap="512m", startup_timeout=120.0):
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        self.count = count
+        self.port = port
+        self.directory = directory
+        self.java = java
+        self.heap = heap
+        self.startup_timeout = startup_timeout
+        self.urls = []
+        self._processes = []
+
+    def start(self):
+        java = shutil.which(self.java)
+        if java is None:
+            raise FileNotFoundError(f"{self.java!r} not found; LanguageTool needs a Java runtime")
+        jar = os.path.join(find_languagetool_dir(self.directory), SERVER_JAR)
+        port = self.port
+        try:
+            while len(self._processes) < self.count:
+                while not _port_free(port):
+                    port += 1
+                self._processes.append(subprocess.Popen(
+                    [java, f"-Xmx{self.heap}", "-cp", jar, SERVER_CLASS, "--port", str(port)],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+                self.urls.append(f"http://127.0.0.1:{port}")
+                port += 1
+            self._wait_until_ready()
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    def _wait_until_ready(self):
+        deadline = time.monotonic() + self.startup_timeout
+        waiting = list(zip(self.urls, self._processes))
+        while waiting:
+            url, process = waiting[0]
+            if process.poll() is not None:
+                raise RuntimeError(f"LanguageTool server for {url} exited with status {process.returncode}")
+            parts = urlsplit(url)
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=1)
+            try:
+                connection.request("GET", "/v2/languages")
+                if connection.getresponse().status == 200:
+                    waiting.pop(0)
+                    continue
+            except OSError:
+                pass
+            finally:
+                connection.close()
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"LanguageTool server for {url} did not start within {self.startup_timeout} s")
+            time.sleep(0.2)
+
+    def close(self):
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._processes = []
+        self.urls = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+_warned_no_servers = False
+
+
+def get_client():
+    """
+    The process-wide client for the servers in $SPEECH_GRADER_LANGUAGETOOL_URLS
+    (comma-separated), built on first use; None when no servers are configured,
+    which is warned about once
+    """
+    global _client, _warned_no_servers
+    client = _client
+    if client is None:
+        with _client_lock:
+            if _client is None:
+                urls = [url.strip() for url in os.environ.get("SPEECH_GRADER_LANGUAGETOOL_URLS", "").split(",")
+                        if url.strip()]
+                if urls:
+                    _client = LanguageToolClient(
+                        urls, timeout=float(os.environ.get("SPEECH_GRADER_LANGUAGETOOL_TIMEOUT", DEFAULT_TIMEOUT)))
+                elif not _warned_no_servers:
+                    _warned_no_servers = True
+                    warnings.warn("the languagetool grammar backend is selected but SPEECH_GRADER_LANGUAGETOOL_URLS "
+                                  "names no servers; grammar is graded with the rubric's rules", RuntimeWarning)
+            client = _client
+    return client
+
+
+def set_client(client):
+    """Replace the process-wide client (None: rebuild it from the environment when next needed)"""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def check_sentences(sentences, language="en-US"):
+    """
+    Issues found by the process-wide client, or None when there is no client
+    or it could not answer in time
+    """
+    client = get_client()
+    if client is None:
+        return None
+    return client.check(sentences, language)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run local LanguageTool servers for the languagetool grammar backend")
+    parser.add_argument("--servers", type=int, default=DEFAULT_SERVERS, help="server processes to run")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="first port to try")
+    parser.add_argument("--dir", default=None, help="LanguageTool directory (default: language_tool_python's download)")
+    parser.add_argument("--heap", default="512m", help="JVM heap per server")
+    args = parser.parse_args(argv)
+
+    with LanguageToolServers(args.servers, args.port, args.dir, heap=args.heap) as servers:
+        print(f"SPEECH_GRADER_LANGUAGETOOL_URLS={','.join(servers.urls)}", flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Built-in lexical diversity counts, matching LexicalRichness.
+
+check_vocabulary_richness only needs the number of words and distinct words
+(terms) that LexicalRichness would count. Building a LexicalRichness object
+for that takes a dozen full-text copies (one str.replace per punctuation
+character) and pulls numpy, scipy and pandas into the process. Here the
+tokens come from a single regex substitution over the lowered transcript
+(shared through Transcript.tokens), and the counts from one pass over them.
+
+WordCounter also keeps the windowed measures LexicalRichness offers, MATTR
+and MTLD, up to date token by token, so streaming and incremental grading
+can read them at any time.
+
+Set SPEECH_GRADER_VOCABULARY_BACKEND=lexicalrichness (or call
+set_backend("lexicalrichness")) to count with LexicalRichness instead, e.g.
+to validate these counts against it.
+"""
+import os
+import re
+from collections import Counter, deque
+
+BACKENDS = ("builtin", "lexicalrichness")
+
+_backend = os.environ.get("SPEECH_GRADER_VOCABULARY_BACKEND", "builtin")
+
+# LexicalRichness is given the lowered text without [^\w\s] characters. It then
+# drops ASCII digits and splits on whitespace and the punctuation left over,
+# which after that substitution is only '_'
+_DROPPED = re.compile(r"[^\w\s]|[0-9]")
+# What str.split() splits out (re's \s is str.isspace)
+WORD = re.compile(r"\S+")
+
+
+def vocabulary_tokens(text_lower):
+    """The tokens LexicalRichness counts for check_vocabulary_richness"""
+    return _DROPPED.sub("", text_lower).replace("_", " ").split()
+
+
+def iter_vocabulary_tokens(text_lower):
+    """vocabulary_tokens one at a time, without holding them all in a list"""
+    return (match.group() for match in WORD.finditer(_DROPPED.sub("", text_lower).replace("_", " ")))
+
+
+def set_backend(name):
+    """Count vocabulary with "builtin" (default) or "lexicalrichness" """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"unknown vocabulary backend {name!r}, expected one of {', '.join(BACKENDS)}")
+    _backend = name
+
+
+def get_backend():
+    return _backend
+
+
+def count_words_and_terms(tokens):
+    """Returns: number of tokens, number of distinct tokens"""
+    return len(tokens), len(set(tokens))
+
+
+def lexicalrichness_counts(text_lower):
+    """(words, terms) as counted by LexicalRichness itself"""
+    from lexicalrichness import LexicalRichness
+
+    lex_rich = LexicalRichness(re.sub(r'[^\w\s]', '', text_lower))
+    return lex_rich.words, lex_rich.terms
+
+
+class WordCounter:
+    """
+    Running word, term and TTR counts with moving-average TTR (MATTR) and
+    forward MTLD, updated in O(1) per token.
+
+        counter = WordCounter(window_size=50)
+        counter.add(transcript.tokens)
+        counter.ttr, counter.mattr(), counter.mtld()
+
+    Results equal LexicalRichness(...).ttr / .mattr(window_size) / .mtld(threshold)
+    on the same text.
+    """
+
+    def __init__(self, window_size=100, threshold=0.72):
+        if window_size < 1 or isinstance(window_size, float):
+            raise ValueError("Window size must be a positive integer.")
+        self.window_size = window_size
+        self.threshold = threshold
+        self.words = 0
+        self.term_counts = Counter()
+        self._tokens = []  # kept for the backward half of MTLD
+
+        # MATTR: distinct tokens in the last window_size tokens
+        self._window = deque()
+        self._window_counts = Counter()
+        self._window_ttr_sum = 0.0
+        self._windows = 0
+
+        # Forward MTLD state
+        self._segment_terms = set()
+        self._segment_words = 0
+        self._segment_ttr = 1.0
+        self._factors = 0
+
+    @property
+    def terms(self):
+        return len(self.term_counts)
+
+    @property
+    def ttr(self):
+        return self.terms / self.words if self.words else 0
+
+    def add(self, tokens):
+        for token in tokens:
+            self.words += 1
+            self.term_counts[token] += 1
+            self._tokens.append(token)
+
+            window = self._window
+            window.append(token)
+            self._window_counts[token] += 1
+            if len(window) > self.window_size:
+                dropped = window.popleft()
+                remaining = self._window_counts[dropped] - 1
+                if remaining:
+                    self._window_counts[dropped] = remaining
+                else:
+                    del self._window_counts[dropped]
+            if len(window) == self.window_size:
+                self._window_ttr_sum += len(self._window_counts) / self.window_size
+                self._windows += 1
+
+            self._segment_words += 1
+            self._segment_terms.add(token)
+            self._segment_ttr = len(self._segment_terms) / self._segment_words
+            if self._segment_ttr <= self.threshold:
+                self._segment_words = 0
+                self._segment_terms = set()
+                self._factors += 1
+        return self
+
+    def mattr(self):
+        """Mean TTR over every window of window_size consecutive tokens"""
+        if self.window_size > self.words:
+            raise ValueError(
+                f"Window size must not be greater than text size of {self.words}. Try a smaller window size."
+            )
+        return self._window_ttr_sum / self._windows
+
+    def mtld(self):
+        """Mean of forward MTLD (kept up to date) and backward MTLD (one pass over the tokens)"""
+        if not self.words:
+            raise ValueError("MTLD needs at least one word")
+        forward = self._mtld(self._factors, self._segment_words, self._segment_ttr)
+
+        terms = set()
+        words = 0
+        factors = 0
+        ttr = 1.0
+        for token in reversed(self._tokens):
+            words += 1
+            terms.add(token)
+            ttr = len(terms) / words
+            if ttr <= self.threshold:
+                words = 0
+                terms = set()
+                factors += 1
+        backward = self._mtld(factors, words, ttr)
+        return (forward + backward) / 2
+
+    def _mtld(self, factors, segment_words, segment_ttr):
+        threshold = self.threshold
+        # The last, unfinished segment counts as a partial factor
+        if segment_words > 0:
+            factors += (1 - segment_ttr) / (1 - threshold)
+        # TTR never dropped below the threshold
+        if factors == 0:
+            ttr = self.terms / self.words
+            if ttr == 1:
+                factors += 1
+            else:
+                factors += (1 - ttr) / (1 - threshold)
+        return self.words / factors
@@ -0,0 +1,109 @@
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of categorized phrases.
+
+    All phrases are found in one left-to-right pass over the text, including
+    overlapping matches and phrases nested inside longer ones, so every
+    `phrase in text` check of a scorer becomes a lookup on the match set.
+    """
+    __slots__ = ("phrases", "_delta", "_outputs")
+
+    def __init__(self, phrases):
+        """
+        phrases: iterable of (category, phrase) pairs. A phrase may belong to
+        several categories; empty phrases are ignored.
+        """
+        categories = {}
+        for category, phrase in phrases:
+            if phrase:
+                categories.setdefault(phrase, [])
+                if category not in categories[phrase]:
+                    categories[phrase].append(category)
+
+        # (phrase, categories) per pattern id
+        self.phrases = tuple((phrase, tuple(cats)) for phrase, cats in categories.items())
+
+        goto = [{}]
+        outputs = [[]]
+        for pattern_id, (phrase, _) in enumerate(self.phrases):
+            node = 0
+            for char in phrase:
+                next_node = goto[node].get(char)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto[node][char] = next_node
+                    goto.append({})
+                    outputs.append([])
+                node = next_node
+            outputs[node].append(pattern_id)
+
+        # Breadth-first pass linking every node to its longest proper suffix,
+        # folded into a full transition table so scanning never backtracks.
+        # Characters missing from a node's table lead back to the root.
+        fail = [0] * len(goto)
+        delta = [dict(edges) for edges in goto]
+        queue = list(goto[0].values())
+        for node in queue:
+            for char, child in goto[node].items():
+                queue.append(child)
+                if node:
+                    fail[child] = delta[fail[node]].get(char, 0)
+                outputs[child].extend(outputs[fail[child]])
+            if node:
+                for char, target in delta[fail[node]].items():
+                    delta[node].setdefault(char, target)
+
+        self._delta = delta
+        self._outputs = [tuple(output) for output in outputs]
+
+    def find_all(self, text):
+        """
+        Scan `text` once.
+        Returns: list of (start, phrase, category) for every match, ordered by end offset
+        """
+        delta = self._delta
+        outputs = self._outputs
+        phrases = self.phrases
+
+        matches = []
+        node = 0
+        for index, char in enumerate(text):
+            node = delta[node].get(char, 0)
+            if not outputs[node]:
+                continue
+            for pattern_id in outputs[node]:
+                phrase, categories = phrases[pattern_id]
+                start = index - len(phrase) + 1
+                for category in categories:
+                    matches.append((start, phrase, category))
+        return matches
+
+    def finditer(self, text, pos=0):
+        """
+        Same matches as find_all(text[pos:]), generated one at a time with
+        offsets into `text`, e.g. to scan part of a long text without copying it.
+        """
+        delta = self._delta
+        outputs = self._outputs
+        phrases = self.phrases
+
+        node = 0
+        for index in range(pos, len(text)):
+            node = delta[node].get(text[index], 0)
+            if not outputs[node]:
+                continue
+            for pattern_id in outputs[node]:
+                phrase, categories = phrases[pattern_id]
+                start = index - len(phrase) + 1
+                for category in categories:
+                    yield start, phrase, category
+
+    def index(self, text):
+        """
+        Scan `text` once and group the matches.
+        Returns: {category: {phrase: [start offsets in ascending order]}}
+        """
+        hits = {}
+        for start, phrase, category in self.find_all(text):
+            hits.setdefault(category, {}).setdefault(phrase, []).append(start)
+        return hits
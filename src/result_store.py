@@ -0,0 +1,647 @@
+"""
+Compact binary archive of graded reports.
+
+A JSON report repeats the same criterion names, component names and
+feedback sentences in every document. Here each report becomes one binary
+record: scores are fixed-width numbers, and every feedback string is split
+into a template (the text with its numbers taken out) and the numbers
+themselves, e.g. "Ideal speech rate: 123.4 WPM" becomes the template
+"Ideal speech rate: {} WPM" plus 1234 with one decimal. Templates, and the
+report layout (criteria, components and their maximum scores), are stored
+once per archive in a string table and referenced by id, so a record costs
+a few hundred bytes instead of a couple of kilobytes of indented JSON.
+Decoding gives back a report equal to the original, feedback text included.
+
+A store is a directory of three append-only files:
+    records.bin   the records, each prefixed with its length
+    index.bin     (8-byte hash of the submission id, record offset) per record
+    strings.jsonl one template or layout per line, in id order
+Records are read through a memory map, and looked up by submission id with
+a sorted index loaded at open, so any report is one seek away. Writing the
+same id again keeps both records; lookups return the latest. One process
+writes a store at a time; a store cut short by a crash is repaired on the
+next open for writing.
+
+    with ResultStore("results.store") as store:
+        store.put("s-001", report)
+        report = store.get("s-001")
+
+    python src/result_store.py import reports.jsonl results.store
+    python src/result_store.py export results.store -o reports.jsonl
+    python src/result_store.py get results.store s-001
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+
+import numpy as np
+
+RECORDS_FILE = "records.bin"
+INDEX_FILE = "index.bin"
+STRINGS_FILE = "strings.jsonl"
+
+# Record flags: bits 0-1 pick the score type code, then optional sections
+_SCORE_TYPES = ("h", "i", "d")
+_SCORE_TYPE_MASK = 0x03
+_HAS_METRICS = 0x04
+_HAS_EXTRA = 0x08
+
+_HEADER = struct.Struct("<IBH")  # record length, flags, submission id length
+_U32 = struct.Struct("<I")
+_U16 = struct.Struct("<H")
+_TEXT = struct.Struct("<IB")  # template id, parameter count
+_PARAM = struct.Struct("<IB")  # number with the decimal point removed, decimals
+_INDEX_ENTRY = np.dtype([("hash", "<u8"), ("offset", "<u8")])
+
+_NUMBER = re.compile(r"[0-9]+(?:\.[0-9]+)?")
+_MAX_PARAMS = 255
+_MAX_PARAM = (1 << 32) - 1
+
+_BASE_KEYS = ("overall_score", "word_count", "criteria", "improvement_suggestions")
+_CRITERION_KEYS = ("criterion", "score", "max_score", "components")
+_COMPONENT_KEYS = ("name", "score", "max_score", "feedback")
+_METRIC_TYPES = {float: b"d", int: b"q"}
+_METRIC_NONE = b"n"
+
+# Recent inserts are merged into the sorted index once they outnumber this
+# (or an eighth of the index), keeping merges cheap and lookups bounded
+_MIN_MERGE = 65536
+
+
+def _split_numbers(text):
+    """
+    A feedback string as (template, [(number without its point, decimals)]).
+    Numbers that would not print back the same (leading zeros, very large)
+    stay in the template.
+    """
+    params = []
+
+    def take(match):
+        literal = match.group()
+        whole, _, fraction = literal.partition(".")
+        value = int(whole + fraction)
+        if (len(whole) > 1 and whole[0] == "0") or value > _MAX_PARAM or len(params) == _MAX_PARAMS:
+            return literal
+        params.append((value, len(fraction)))
+        return "{}"
+
+    template = _NUMBER.sub(take, text.replace("{", "{{").replace("}", "}}"))
+    return template, params
+
+
+def _format_number(value, decimals):
+    digits = str(value).rjust(decimals + 1, "0")
+    return f"{digits[:-decimals]}.{digits[-decimals:]}" if decimals else digits
+
+
+def _id_key(submission_id):
+    """Submission ids are stored as JSON, so 7 and "7" stay distinct; None (no id) is stored as null"""
+    if submission_id is not None and (isinstance(submission_id, bool) or not isinstance(submission_id, (str, int))):
+        raise TypeError(f"submission id must be a string or an integer, not {type(submission_id).__name__}")
+    return json.dumps(submission_id, ensure_ascii=False).encode("utf-8")
+
+
+def _id_hash(key):
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _is_number(value):
+    return type(value) in (int, float)
+
+
+class ReportCodec:
+    """
+    Encodes reports (as built by grader.grade_transcript) to binary records
+    and back. Records only decode with the string table they were encoded
+    with: `strings` holds every template and layout in id order, and grows as
+    new ones are seen.
+    """
+
+    def __init__(self, strings=()):
+        self.strings = list(strings)
+        self._string_ids = {string: index for index, string in enumerate(self.strings)}
+
+    def _intern(self, string):
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = self._string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def _encode_text(self, text, parts):
+        template, params = _split_numbers(text)
+        parts.append(_TEXT.pack(self._intern(template), len(params)))
+        parts.extend(_PARAM.pack(value, decimals) for value, decimals in params)
+
+    def _decode_text(self, record, position):
+        template_id, count = _TEXT.unpack_from(record, position)
+        position += _TEXT.size
+        values = []
+        for _ in range(count):
+            values.append(_format_number(*_PARAM.unpack_from(record, position)))
+            position += _PARAM.size
+        return self.strings[template_id].format(*values), position
+
+    @staticmethod
+    def _layout(report):
+        """The report's fixed structure, or None when it is not a grader report"""
+        if tuple(report)[:len(_BASE_KEYS)] != _BASE_KEYS or type(report["word_count"]) is not int:
+            return None
+        if not isinstance(report["criteria"], list) or not isinstance(report["improvement_suggestions"], list):
+            return None
+        layout = []
+        for criterion in report["criteria"]:
+            if not isinstance(criterion, dict) or tuple(criterion) != _CRITERION_KEYS:
+                return None
+            components = []
+            for component in criterion["components"]:
+                if (not isinstance(component, dict) or tuple(component) != _COMPONENT_KEYS
+                        or not isinstance(component["feedback"], str)):
+                    return None
+                components.append([component["name"], component["max_score"]])
+            layout.append([criterion["criterion"], criterion["max_score"], components])
+        if not all(isinstance(suggestion, str) for suggestion in report["improvement_suggestions"]):
+            return None
+        return layout
+
+    def encode(self, report, submission_id):
+        """
+        Returns: the record (bytes)
+        Raises ValueError for a report that does not have grade_transcript's layout
+        """
+        layout = self._layout(report)
+        if layout is None:
+            raise ValueError("report does not have the layout built by grader.build_report")
+        key = _id_key(submission_id)
+        components = [component for criterion in report["criteria"] for component in criterion["components"]]
+        scores = [report["overall_score"], *(criterion["score"] for criterion in report["criteria"]),
+                  *(component["score"] for component in components)]
+        if not all(_is_number(score) for score in scores):
+            raise ValueError("report scores must be numbers")
+
+        if all(type(score) is int and -(1 << 15) <= score < (1 << 15) for score in scores):
+            score_type = 0
+        elif all(type(score) is int and -(1 << 31) <= score < (1 << 31) for score in scores):
+            score_type = 1
+        else:
+            score_type = 2
+
+        parts = [key, _U32.pack(self._intern(json.dumps(layout, ensure_ascii=False))),
+                 _U32.pack(report["word_count"]),
+                 struct.pack(f"<{len(scores)}{_SCORE_TYPES[score_type]}", *scores)]
+        if score_type == 2:
+            # Which scores were integers, so they decode as integers again
+            mask = sum(1 << bit for bit, score in enumerate(scores) if type(score) is int)
+            parts.append(mask.to_bytes((len(scores) + 7) // 8, "little"))
+        for component in components:
+            self._encode_text(component["feedback"], parts)
+        parts.append(_U16.pack(len(report["improvement_suggestions"])))
+        for suggestion in report["improvement_suggestions"]:
+            self._encode_text(suggestion, parts)
+
+        flags = score_type
+        extra = {key: value for key, value in report.items() if key not in _BASE_KEYS}
+        metrics = extra.get("metrics")
+        # Metrics that follow the base keys directly are packed; anything else stays JSON
+        if (tuple(extra)[:1] == ("metrics",) and isinstance(metrics, dict)
+                and all(value is None or _is_number(value) for value in metrics.values())
+                and all(type(value) is not int or -(1 << 63) <= value < (1 << 63) for value in metrics.values())):
+            flags |= _HAS_METRICS
+            del extra["metrics"]
+            parts.append(_U32.pack(self._intern(json.dumps(list(metrics), ensure_ascii=False))))
+            for value in metrics.values():
+                if value is None:
+                    parts.append(_METRIC_NONE)
+                else:
+                    code = _METRIC_TYPES[type(value)]
+                    parts.append(code + struct.pack("<" + code.decode(), value))
+        if extra:
+            flags |= _HAS_EXTRA
+            blob = json.dumps(extra, separators=(",", ":")).encode("utf-8")
+            parts.append(_U32.pack(len(blob)))
+            parts.append(blob)
+
+        body = b"".join(parts)
+        if len(key) > 0xFFFF:
+            raise ValueError("submission id is too long")
+        return _HEADER.pack(_HEADER.size + len(body), flags, len(key)) + body
+
+    def decode(self, record):
+        """
+        record: bytes-like holding one record, as from encode()
+        Returns: (submission id, report)
+        """
+        _, flags, key_length = _HEADER.unpack_from(record, 0)
+        position = _HEADER.size
+        submission_id = json.loads(bytes(record[position:position + key_length]).decode("utf-8"))
+        position += key_length
+        layout_id, word_count = struct.unpack_from("<II", record, position)
+        position += 8
+        layout = json.loads(self.strings[layout_id])
+
+        score_count = 1 + len(layout) + sum(len(components) for _, _, components in layout)
+        score_format = f"<{score_count}{_SCORE_TYPES[flags & _SCORE_TYPE_MASK]}"
+        scores = list(struct.unpack_from(score_format, record, position))
+        position += struct.calcsize(score_format)
+        if flags & _SCORE_TYPE_MASK == 2:
+            mask_size = (score_count + 7) // 8
+            mask = int.from_bytes(record[position:position + mask_size], "little")
+            position += mask_size
+            scores = [int(score) if mask >> bit & 1 else score for bit, score in enumerate(scores)]
+
+        scores = iter(scores)
+        report = {"overall_score": next(scores), "word_count": word_count}
+        criterion_scores = [next(scores) for _ in layout]
+        criteria = []
+        for (name, max_score, components), score in zip(layout, criterion_scores):
+            criteria.append({"criterion": name, "score": score, "max_score": max_score, "components": [
+                {"name": component_name, "score": next(scores), "max_score": component_max}
+                for component_name, component_max in components]})
+        for criterion in criteria:
+            for component in criterion["components"]:
+                component["feedback"], position = self._decode_text(record, position)
+        report["criteria"] = criteria
+
+        (suggestion_count,) = _U16.unpack_from(record, position)
+        position += _U16.size
+        suggestions = []
+        for _ in range(suggestion_count):
+            suggestion, position = self._decode_text(record, position)
+            suggestions.append(suggestion)
+        report["improvement_suggestions"] = suggestions
+
+        if flags & _HAS_METRICS:
+            (names_id,) = _U32.unpack_from(record, position)
+            position += _U32.size
+            metrics = {}
+            for name in json.loads(self.strings[names_id]):
+                code = bytes(record[position:position + 1])
+                position += 1
+                if code == _METRIC_NONE:
+                    metrics[name] = None
+                else:
+                    (metrics[name],) = struct.unpack_from("<" + code.decode(), record, position)
+                    position += 8
+            report["metrics"] = metrics
+        if flags & _HAS_EXTRA:
+            (length,) = _U32.unpack_from(record, position)
+            position += _U32.size
+            report.update(json.loads(bytes(record[position:position + length]).decode("utf-8")))
+        return submission_id, report
+
+
+class ResultStore:
+    """
+    Append-only store of encoded reports with lookups by submission id.
+    Use as a context manager, or call close() (flush() makes writes durable
+    without closing).
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        if not readonly:
+            os.makedirs(path, exist_ok=True)
+        self._records_path = os.path.join(path, RECORDS_FILE)
+        self._index_path = os.path.join(path, INDEX_FILE)
+        self._strings_path = os.path.join(path, STRINGS_FILE)
+        if readonly and not os.path.exists(self._records_path):
+            raise FileNotFoundError(f"no result store at {path!r}")
+
+        self.codec = ReportCodec(self._load_strings())
+        self._strings_written = len(self.codec.strings)
+        self._size = os.path.getsize(self._records_path) if os.path.exists(self._records_path) else 0
+        self._hashes, self._offsets = self._load_index()
+        self._recent = {}  # id hash -> offset, or list of offsets, of records not yet merged
+        self._recent_count = 0
+        self._recover_tail()
+
+        self._map = None
+        self._dirty = False
+        self._records = self._index = self._strings = None
+        if not readonly:
+            self._records = open(self._records_path, "ab")
+            self._index = open(self._index_path, "ab")
+            self._strings = open(self._strings_path, "a", encoding="utf-8")
+
+    # Opening ---------------------------------------------------------------------
+
+    def _load_strings(self):
+        if not os.path.exists(self._strings_path):
+            return []
+        strings = []
+        complete = 0
+        with open(self._strings_path, "rb") as strings_file:
+            for line in strings_file:
+                if not line.endswith(b"\n"):
+                    break  # cut short by a crash
+                strings.append(json.loads(line))
+                complete += len(line)
+        if not self.readonly and complete < os.path.getsize(self._strings_path):
+            os.truncate(self._strings_path, complete)
+        return strings
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            entries = np.zeros(0, dtype=_INDEX_ENTRY)
+        else:
+            raw = np.fromfile(self._index_path, dtype=np.uint8)
+            entries = raw[:len(raw) - len(raw) % _INDEX_ENTRY.itemsize].view(_INDEX_ENTRY)
+            # Entries are appended in offset order; drop any past the records on disk
+            valid = int(np.searchsorted(entries["offset"], self._size))
+            if valid and self._record_end(int(entries["offset"][valid - 1])) > self._size:
+                valid -= 1
+            if not self.readonly and valid * _INDEX_ENTRY.itemsize < len(raw):
+                os.truncate(self._index_path, valid * _INDEX_ENTRY.itemsize)
+            entries = entries[:valid]
+        self._indexed_end = self._record_end(int(entries["offset"][-1])) if len(entries) else 0
+        order = np.lexsort((entries["offset"], entries["hash"]))
+        return entries["hash"][order], entries["offset"][order]
+
+    def _record_end(self, offset):
+        with open(self._records_path, "rb") as records:
+            records.seek(offset)
+            (length,) = _U32.unpack(records.read(_U32.size))
+        return offset + length
+
+    def _recover_tail(self):
+        """Index records written after the last index entry; drop a partial last record"""
+        if self._indexed_end >= self._size:
+            return
+        entries = []
+        position = self._indexed_end
+        with open(self._records_path, "rb") as records:
+            records.seek(position)
+            while position + _HEADER.size <= self._size:
+                length, _, key_length = _HEADER.unpack(records.read(_HEADER.size))
+                # A partial last record, or a corrupt or zeroed header, ends the scan
+                if length < _HEADER.size + key_length or position + length > self._size:
+                    break
+                key = records.read(key_length)
+                records.seek(position + length)
+                entries.append((_id_hash(key), position))
+                position += length
+        for key_hash, offset in entries:
+            self._remember(key_hash, offset)
+        if not self.readonly:
+            if position < self._size:
+                os.truncate(self._records_path, position)
+                self._size = position
+            with open(self._index_path, "ab") as index:
+                index.write(b"".join(struct.pack("<QQ", *entry) for entry in entries))
+        self._indexed_end = position
+
+    # Index -----------------------------------------------------------------------
+
+    def _remember(self, key_hash, offset):
+        found = self._recent.get(key_hash)
+        if found is None:
+            self._recent[key_hash] = offset
+        elif isinstance(found, list):
+            found.append(offset)
+        else:
+            self._recent[key_hash] = [found, offset]
+        self._recent_count += 1
+        if self._recent_count > max(_MIN_MERGE, len(self._offsets) // 8):
+            self._merge_recent()
+
+    def _merge_recent(self):
+        hashes = []
+        offsets = []
+        for key_hash, found in self._recent.items():
+            for offset in found if isinstance(found, list) else (found,):
+                hashes.append(key_hash)
+                offsets.append(offset)
+        hashes = np.concatenate([self._hashes, np.array(hashes, dtype=np.uint64)])
+        offsets = np.concatenate([self._offsets, np.array(offsets, dtype=np.uint64)])
+        order = np.lexsort((offsets, hashes))
+        self._hashes, self._offsets = hashes[order], offsets[order]
+        self._recent = {}
+        self._recent_count = 0
+
+    def _candidates(self, key_hash):
+        """Offsets of records whose id has this hash, newest first"""
+        found = self._recent.get(key_hash)
+        if found is not None:
+            yield from reversed(found) if isinstance(found, list) else (found,)
+        start = np.searchsorted(self._hashes, np.uint64(key_hash), side="left")
+        end = np.searchsorted(self._hashes, np.uint64(key_hash), side="right")
+        for offset in self._offsets[start:end][::-1]:
+            yield int(offset)
+
+    # Reading ---------------------------------------------------------------------
+
+    def _record(self, offset):
+        """The record at `offset` (bytes)"""
+        if self._dirty:
+            self._records.flush()
+            self._dirty = False
+        if self._map is None or offset + _HEADER.size > len(self._map):
+            if self._map is not None:
+                self._map.close()
+            with open(self._records_path, "rb") as records:
+                self._map = mmap.mmap(records.fileno(), 0, access=mmap.ACCESS_READ)
+        (length,) = _U32.unpack_from(self._map, offset)
+        return self._map[offset:offset + length]
+
+    def _offset(self, submission_id):
+        key = _id_key(submission_id)
+        for offset in self._candidates(_id_hash(key)):
+            record = self._record(offset)
+            _, _, key_length = _HEADER.unpack_from(record, 0)
+            if record[_HEADER.size:_HEADER.size + key_length] == key:
+                return offset
+        return None
+
+    def get(self, submission_id, default=None):
+        """The latest report stored under `submission_id` (a fresh dict), or `default`"""
+        offset = self._offset(submission_id)
+        if offset is None:
+            return default
+        return self.codec.decode(self._record(offset))[1]
+
+    def __contains__(self, submission_id):
+        return self._offset(submission_id) is not None
+
+    def __len__(self):
+        """Number of records, counting every write of a repeated id"""
+        return len(self._offsets) + self._recent_count
+
+    def records(self):
+        """
+        Yields: (submission id, report) for every record in the order written,
+        including ones superseded by a later write of the same id
+        """
+        position = 0
+        size = self._size
+        while position < size:
+            record = self._record(position)
+            yield self.codec.decode(record)
+            position += len(record)
+
+    def latest(self):
+        """
+        Yields: (submission id, report) for the latest record of every id, and
+        every record without an id, in the order written
+        """
+        position = 0
+        while position < self._size:
+            record = self._record(position)
+            submission_id, report = self.codec.decode(record)
+            if submission_id is None or self._offset(submission_id) == position:
+                yield submission_id, report
+            position += len(record)
+
+    # Writing ---------------------------------------------------------------------
+
+    def put(self, submission_id, report):
+        """
+        Append a report (as built by grader.grade_transcript, optionally with
+        metrics, timings or other extra keys) under `submission_id`, a string
+        or an integer, or None for a report without an id (get(None) finds
+        only the latest of those).
+        Returns: the record's offset
+        """
+        if self.readonly:
+            raise ValueError("result store is open read-only")
+        record = self.codec.encode(report, submission_id)
+        if len(self.codec.strings) > self._strings_written:
+            # Templates reach the disk before the records that use them
+            self._strings.writelines(json.dumps(string, ensure_ascii=False) + "\n"
+                                     for string in self.codec.strings[self._strings_written:])
+            self._strings.flush()
+            self._strings_written = len(self.codec.strings)
+        offset = self._size
+        self._records.write(record)
+        self._size += len(record)
+        self._indexed_end = self._size
+        key_length = _HEADER.unpack_from(record, 0)[2]
+        key_hash = _id_hash(record[_HEADER.size:_HEADER.size + key_length])
+        self._index.write(struct.pack("<QQ", key_hash, offset))
+        self._remember(key_hash, offset)
+        self._dirty = True
+        return offset
+
+    def write(self, report, submission_id=None):
+        """
+        Same as put(), with the TableWriter argument order. Reports without an
+        id are stored with a null id and exported without one.
+        """
+        return self.put(submission_id, report)
+
+    def flush(self):
+        if self._records is not None:
+            self._records.flush()
+            self._index.flush()
+            self._dirty = False
+
+    def stats(self):
+        return {
+            "records": len(self),
+            "strings": len(self.codec.strings),
+            "record_bytes": self._size,
+            "bytes_per_record": self._size / len(self) if len(self) else 0.0,
+        }
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._records is not None:
+            self._records.close()
+            self._index.close()
+            self._strings.close()
+            self._records = self._index = self._strings = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _read_reports(path):
+    """
+    Yields: (submission id or None, report) from a JSONL file of reports (as
+    written by grade_cli.py, ids under "id") or a single JSON report (as
+    downloaded from the app, id taken from the file name)
+    """
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        first = source.readline()
+        try:
+            document = json.loads(first) if first.strip() else None
+        except ValueError:
+            # An indented document spans many lines
+            report = json.loads(first + source.read())
+            yield (None if path == "-" else os.path.splitext(os.path.basename(path))[0]), report
+            return
+        if document is not None:
+            yield document.pop("id", None), document
+        for line in source:
+            if line.strip():
+                report = json.loads(line)
+                yield report.pop("id", None), report
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive graded reports in a compact result store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="append JSONL or JSON reports to a store")
+    import_parser.add_argument("inputs", nargs="+", help="report files (JSONL or single JSON documents), - for stdin")
+    import_parser.add_argument("store", help="store directory (created if missing)")
+    export_parser = commands.add_parser("export", help="write a store's reports back as JSONL")
+    export_parser.add_argument("store")
+    export_parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout")
+    export_parser.add_argument("--all", action="store_true",
+                               help="include reports superseded by a later one with the same id")
+    get_parser = commands.add_parser("get", help="print the report stored under an id")
+    get_parser.add_argument("store")
+    get_parser.add_argument("id", help="submission id (JSON integers are tried too)")
+    get_parser.add_argument("--indent", type=int, default=2)
+    stats_parser = commands.add_parser("stats", help="print record and size counts")
+    stats_parser.add_argument("store")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        with ResultStore(args.store) as store:
+            for path in args.inputs:
+                for submission_id, report in _read_reports(path):
+                    store.write(report, submission_id)
+            print(json.dumps(store.stats()), file=sys.stderr)
+        return 0
+
+    with ResultStore(args.store, readonly=True) as store:
+        if args.command == "export":
+            out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+            try:
+                for submission_id, report in (store.records() if args.all else store.latest()):
+                    if submission_id is not None:
+                        report = {"id": submission_id, **report}
+                    out.write(json.dumps(report) + "\n")
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+        elif args.command == "get":
+            report = store.get(args.id)
+            if report is None and args.id.lstrip("-").isdigit():
+                report = store.get(int(args.id))
+            if report is None:
+                print(f"no report stored under {args.id!r}", file=sys.stderr)
+                return 1
+            print(json.dumps(report, indent=args.indent))
+        else:
+            print(json.dumps(store.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
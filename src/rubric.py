@@ -0,0 +1,287 @@
+"""
+Data-driven rubrics.
+
+A rubric file (JSON, or YAML when PyYAML is installed) holds every phrase list,
+score band and grammar rule the scorers use; rubrics/default.json is the one
+the app ships with. compile_rubric turns it into an immutable, pickle-able
+CompiledRubric with the phrase matcher and grammar scan prebuilt and a version
+hash of its contents. load_compiled_rubric caches compiled artifacts on disk
+by that hash, so workers load them with one pickle read instead of rebuilding.
+
+Filler words are counted as standalone words, i.e. surrounded by spaces.
+"""
+import copy
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import re
+import tempfile
+import threading
+from types import MappingProxyType
+
+from phrase_matcher import PhraseMatcher
+
+DEFAULT_RUBRIC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rubrics', 'default.json')
+
+# Bumped when the scorers interpret rubric data differently; part of every version hash
+RUBRIC_FORMAT = 1
+
+_BAND_COUNTS = {
+    ("grammar", "error_rate_thresholds"): 2,
+    ("grammar", "scores"): 3,
+    ("vocabulary", "ttr_thresholds"): 4,
+    ("vocabulary", "scores"): 5,
+    ("filler_words", "rate_thresholds"): 4,
+    ("filler_words", "scores"): 5,
+    ("sentiment", "compound_thresholds"): 4,
+    ("sentiment", "scores"): 5,
+}
+
+
+def load_rubric(path):
+    """Read a rubric file. Returns: the validated rubric data (dict)"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is required for YAML rubrics (pip install pyyaml)")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    validate_rubric(data)
+    lexicon = data["sentiment"].get("lexicon")
+    if lexicon is not None:
+        # Relative to the rubric file, so a rubric and its lexicon move together
+        lexicon = data["sentiment"]["lexicon"] = os.path.normpath(
+            os.path.join(os.path.dirname(os.path.abspath(path)), lexicon))
+        if not os.path.isfile(lexicon):
+            raise ValueError(f"Rubric sentiment lexicon '{lexicon}' does not exist")
+    return data
+
+
+def validate_rubric(data):
+    """Raise ValueError if rubric data is missing a section or has the wrong number of bands"""
+    if not isinstance(data, dict):
+        raise ValueError("A rubric must be a mapping")
+    for section in ("salutation", "keywords", "flow", "speech_rate", "grammar",
+                    "vocabulary", "filler_words", "sentiment"):
+        if not isinstance(data.get(section), dict):
+            raise ValueError(f"Rubric is missing the '{section}' section")
+    for (section, key), count in _BAND_COUNTS.items():
+        values = data[section].get(key)
+        if not isinstance(values, list) or len(values) != count:
+            raise ValueError(f"Rubric '{section}.{key}' must list {count} values")
+    lexicon = data["sentiment"].get("lexicon")
+    if lexicon is not None and not isinstance(lexicon, str):
+        raise ValueError("Rubric 'sentiment.lexicon' must be the path of a VADER-format lexicon file")
+    languagetool_language = data["grammar"].get("languagetool_language")
+    if languagetool_language is not None and not isinstance(languagetool_language, str):
+        raise ValueError("Rubric 'grammar.languagetool_language' must be a LanguageTool language code, e.g. \"en-US\"")
+    rules = data["grammar"].get("rules", [])
+    if not isinstance(rules, list):
+        raise ValueError("Rubric 'grammar.rules' must be a list")
+    for index, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            raise ValueError(f"Grammar rule {index} must be a mapping")
+        for key in ("name", "pattern", "weight", "issue"):
+            if key not in rule:
+                raise ValueError(f"Grammar rule {index} is missing '{key}'")
+        if not isinstance(rule["name"], str) or not isinstance(rule["pattern"], str):
+            raise ValueError(f"Grammar rule {index} must have a string name and pattern")
+        try:
+            re.compile(rule["pattern"])
+        except re.error as e:
+            raise ValueError(f"Grammar rule '{rule.get('name')}' has an invalid pattern: {e}")
+        if not re.fullmatch(r"[A-Za-z_]\w*", rule["name"]):
+            raise ValueError(f"Grammar rule name '{rule['name']}' must be an identifier")
+
+
+def rubric_version(data):
+    """Hash of the rubric contents; two rubrics grade identically iff their versions match"""
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    digest = hashlib.sha256(f"{RUBRIC_FORMAT}:{canonical}".encode("utf-8"))
+    lexicon = data["sentiment"].get("lexicon")
+    if lexicon is not None:
+        # The lexicon's words are part of the rubric, not just its path
+        with open(lexicon, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()[:16]
+
+
+def compile_grammar_rules(rules):
+    """
+    Combine the rule patterns into a single regex scanned once with finditer.
+
+    Each rule sits in its own optional lookahead with a named group, so every
+    rule is tried at every position and rules may overlap each other; the
+    leading alternation lets the scan skip positions where no rule can match.
+    """
+    if not rules:
+        return re.compile(r"(?!)")
+    alternation = "|".join(f"(?:{pattern})" for _, pattern, _, _ in rules)
+    lookaheads = "".join(f"(?=(?P<{name}>{pattern}))?" for name, pattern, _, _ in rules)
+    return re.compile(f"(?={alternation}){lookaheads}")
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class CompiledRubric:
+    """
+    Immutable, ready-to-score form of a rubric.
+
+    Sections (salutation, keywords, ...) are read-only mappings of the rubric
+    data; `matcher` finds every rubric phrase in one pass and `grammar_scan`
+    finds every grammar rule hit in one pass.
+    """
+    _SECTIONS = ("salutation", "keywords", "flow", "speech_rate", "grammar",
+                 "vocabulary", "filler_words", "sentiment")
+    __slots__ = ("name", "version") + _SECTIONS + ("grammar_rules", "grammar_scan", "_grammar_groups", "matcher")
+
+    def __init__(self, data):
+        validate_rubric(data)
+        data = copy.deepcopy(data)
+        init = super().__setattr__
+        init("name", data.get("name", "unnamed"))
+        init("version", rubric_version(data))
+        for section in self._SECTIONS:
+            init(section, _freeze(data[section]))
+
+        rules = tuple((rule["name"], rule["pattern"], rule["weight"], rule["issue"])
+                      for rule in data["grammar"].get("rules", []))
+        scan = compile_grammar_rules(rules)
+        init("grammar_rules", rules)
+        init("grammar_scan", scan)
+        init("_grammar_groups", tuple((name, scan.groupindex[name]) for name, _, _, _ in rules))
+        init("matcher", PhraseMatcher(self._phrases()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledRubric is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompiledRubric is immutable")
+
+    def __getstate__(self):
+        return {name: _thaw(getattr(self, name)) if name in self._SECTIONS else getattr(self, name)
+                for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            super().__setattr__(name, _freeze(value) if name in self._SECTIONS else value)
+
+    def __repr__(self):
+        return f"CompiledRubric(name={self.name!r}, version={self.version!r})"
+
+    def _phrases(self):
+        """(category, phrase) pairs for every phrase list in the rubric"""
+        for level in self.salutation["levels"]:
+            for phrase in level["phrases"]:
+                yield f"salutation:{level['level']}", phrase
+        for group in ("must_have", "good_have"):
+            for category, keywords in self.keywords[group].items():
+                for phrase in keywords:
+                    yield f"{group}:{category}", phrase
+        for part in ("salutation", "basic_details", "closing"):
+            for phrase in self.flow[part]:
+                yield f"flow:{part}", phrase
+        # Fillers are matched without their padding spaces; check_filler_words
+        # applies the space boundaries itself
+        for phrase in self.filler_words["words"]:
+            yield "filler", phrase.strip()
+        for phrase in self.sentiment["fallback_positive_words"]:
+            yield "positive", phrase
+
+    def find_grammar_hits(self, text_lower):
+        """
+        Every grammar rule hit in one pass over the lowered text.
+        Hits of the same rule never overlap, matching re.findall for that rule.
+        Returns: {rule name: [(start, end)]}
+        """
+        hits = {}
+        next_free = {}
+        groups = self._grammar_groups
+        for match in self.grammar_scan.finditer(text_lower):
+            for name, group in groups:
+                start, end = match.span(group)
+                if start != -1 and start >= next_free.get(name, 0):
+                    hits.setdefault(name, []).append((start, end))
+                    next_free[name] = end
+        return hits
+
+
+def compile_rubric(data):
+    return CompiledRubric(data)
+
+
+def default_cache_dir():
+    return os.environ.get("SPEECH_GRADER_RUBRIC_CACHE",
+                          os.path.join(os.path.expanduser("~"), ".cache", "speech-grader", "rubrics"))
+
+
+def load_compiled_rubric(path, cache_dir=None):
+    """
+    Load and compile a rubric file, reusing the compiled artifact cached on
+    disk under its version hash when there is one. The cache is best effort:
+    an unwritable cache directory only costs a recompile.
+    """
+    data = load_rubric(path)
+    version = rubric_version(data)
+    cache_file = os.path.join(cache_dir or default_cache_dir(), f"{version}.pickle")
+
+    try:
+        with open(cache_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            rubric = pickle.loads(mapped)
+        if isinstance(rubric, CompiledRubric) and rubric.version == version:
+            return rubric
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+
+    rubric = compile_rubric(data)
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_file), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(rubric, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_file)
+    except OSError:
+        pass
+    return rubric
+
+
+_default_rubric = None
+_default_rubric_lock = threading.Lock()
+
+
+def get_default_rubric():
+    """The process-wide default rubric (rubrics/default.json unless replaced), loaded on first use"""
+    global _default_rubric
+    rubric = _default_rubric
+    if rubric is None:
+        with _default_rubric_lock:
+            if _default_rubric is None:
+                _default_rubric = load_compiled_rubric(DEFAULT_RUBRIC_PATH)
+            rubric = _default_rubric
+    return rubric
+
+
+def set_default_rubric(rubric):
+    """Replace the default rubric, e.g. with load_compiled_rubric('rubrics/grade5.json')"""
+    global _default_rubric
+    with _default_rubric_lock:
+        _default_rubric = rubric
@@ -1,81 +1,304 @@
-import language_tool_python
-from lexicalrichness import LexicalRichness
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from textblob import TextBlob
-import re
+import os
+import threading
 
-def check_salutation(text):
+import lexical
+from instrumentation import instrumented
+from rubric import get_default_rubric
+
+# Heavy NLP libraries (vaderSentiment, and lexicalrichness when it is the
+# vocabulary backend) are imported inside the scorers that use them, so
+# importing this module stays cheap.
+# benchmarks/import_time.py checks this against a startup budget.
+
+
+class Transcript:
     """
-    Check the salutation level based on the rubric
+    Shared analysis of one transcript, passed to every scorer.
+    Lowered text, tokens and sentences are computed once, on first use.
+    """
+    __slots__ = ("text", "_lower", "_words", "_sentence_spans", "_sentences",
+                 "_lower_sentence_spans", "_phrase_hits", "_tokens")
+
+    def __init__(self, text):
+        self.text = text
+        self._lower = None
+        self._words = None
+        self._sentence_spans = None
+        self._sentences = None
+        self._lower_sentence_spans = None
+        self._phrase_hits = None
+        self._tokens = None
+
+    @property
+    def lower(self):
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def words(self):
+        if self._words is None:
+            self._words = self.text.split()
+        return self._words
+
+    @property
+    def word_count(self):
+        return len(self.words)
+
+    @property
+    def tokens(self):
+        """Lowered words without punctuation or digits, as LexicalRichness tokenizes them"""
+        if self._tokens is None:
+            self._tokens = lexical.vocabulary_tokens(self.lower)
+        return self._tokens
+
+    @property
+    def sentence_spans(self):
+        """(start, end) offsets of the non-empty, stripped sentences split on '.'"""
+        if self._sentence_spans is None:
+            self._sentence_spans = _sentence_spans(self.text)
+        return self._sentence_spans
+
+    @property
+    def lower_sentence_spans(self):
+        """Same as sentence_spans, but as offsets into the lowered text"""
+        if self._lower_sentence_spans is None:
+            if len(self.lower) == len(self.text):
+                self._lower_sentence_spans = self.sentence_spans
+            else:
+                # A few characters (e.g. 'İ') grow when lowercased
+                self._lower_sentence_spans = _sentence_spans(self.lower)
+        return self._lower_sentence_spans
+
+    def phrase_hits(self, rubric=None):
+        """
+        Every phrase of the rubric in the lowered text, found in one pass.
+        Kept for the most recently used rubric.
+        Returns: {category: {phrase: [start offsets]}}
+        """
+        rubric = rubric or get_default_rubric()
+        cached = self._phrase_hits
+        if cached is None or cached[0] != rubric.version:
+            cached = self._phrase_hits = (rubric.version, rubric.matcher.index(self.lower))
+        return cached[1]
+
+    def phrases_found(self, category, rubric=None):
+        """{phrase: [start offsets]} for one rubric phrase category"""
+        return self.phrase_hits(rubric).get(category, {})
+
+    def precompute(self, rubric=None):
+        """Fill every lazy field now, e.g. before handing the transcript to several threads"""
+        self.words
+        self.tokens
+        self.sentences
+        self.lower_sentence_spans
+        self.phrase_hits(rubric)
+        return self
+
+    @property
+    def sentences(self):
+        if self._sentences is None:
+            text = self.text
+            self._sentences = [text[start:end] for start, end in self.sentence_spans]
+        return self._sentences
+
+
+def _sentence_spans(text):
+    spans = []
+    start = 0
+    length = len(text)
+    while start <= length:
+        end = text.find('.', start)
+        if end == -1:
+            end = length
+        left, right = start, end
+        while left < right and text[left].isspace():
+            left += 1
+        while right > left and text[right - 1].isspace():
+            right -= 1
+        if left < right:
+            spans.append((left, right))
+        start = end + 1
+    return spans
+
+
+def as_transcript(text):
+    """Wrap a plain string in a Transcript; Transcripts pass through unchanged."""
+    if isinstance(text, Transcript):
+        return text
+    return Transcript(text)
+
+
+GRAMMAR_BACKENDS = ("regex", "languagetool")
+_grammar_backend = os.environ.get("SPEECH_GRADER_GRAMMAR_BACKEND", "regex")
+# Transcripts the languagetool backend could not check and graded with the regex rules
+_grammar_fallbacks = 0
+
+
+def set_grammar_backend(name):
+    """
+    Check grammar with the rubric's "regex" rules (default) or with
+    "languagetool" servers (see languagetool.py), falling back to the rules
+    when they cannot answer in time
+    """
+    global _grammar_backend
+    if name not in GRAMMAR_BACKENDS:
+        raise ValueError(f"unknown grammar backend {name!r}, expected one of {', '.join(GRAMMAR_BACKENDS)}")
+    _grammar_backend = name
+
+
+def get_grammar_backend():
+    return _grammar_backend
+
+
+def grammar_fallback_count():
+    """How many transcripts this process graded with the regex rules instead of LanguageTool"""
+    return _grammar_fallbacks
+
+
+# VADER reads and parses its lexicon files on construction, so one analyzer
+# is shared by the whole process and only built the first time it is needed
+_sentiment_analyzer = None
+_sentiment_analyzer_lock = threading.Lock()
+# Analyzers for rubrics with their own sentiment lexicon (other languages), by lexicon path
+_lexicon_analyzers = {}
+
+
+def get_sentiment_analyzer(rubric=None):
+    """
+    Return the process-wide SentimentIntensityAnalyzer, creating it on first use.
+    A rubric with a `sentiment.lexicon` file gets an analyzer using that lexicon.
+    Safe to call from several threads at once.
+    """
+    lexicon = rubric.sentiment.get("lexicon") if rubric is not None else None
+    if lexicon is not None:
+        analyzer = _lexicon_analyzers.get(lexicon)
+        if analyzer is None:
+            with _sentiment_analyzer_lock:
+                analyzer = _lexicon_analyzers.get(lexicon)
+                if analyzer is None:
+                    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+                    analyzer = _lexicon_analyzers[lexicon] = SentimentIntensityAnalyzer(lexicon_file=lexicon)
+        return analyzer
+
+    global _sentiment_analyzer
+    analyzer = _sentiment_analyzer
+    if analyzer is None:
+        with _sentiment_analyzer_lock:
+            if _sentiment_analyzer is None:
+                from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+                _sentiment_analyzer = SentimentIntensityAnalyzer()
+            analyzer = _sentiment_analyzer
+    return analyzer
+
+
+def release_sentiment_analyzer(lexicon):
+    """Forget the analyzer built for a lexicon file (see languages.py); it is rebuilt when next needed"""
+    with _sentiment_analyzer_lock:
+        _lexicon_analyzers.pop(lexicon, None)
+
+
+def _hits_within(hits, span):
+    """True if any of the {phrase: [starts]} hits lies entirely inside span"""
+    span_start, span_end = span
+    for phrase, starts in hits.items():
+        for start in starts:
+            if start >= span_start and start + len(phrase) <= span_end:
+                return True
+    return False
+
+
+def find_grammar_hits(text_lower, rubric=None):
+    """
+    Every grammar rule hit of the rubric in one pass over the lowered text.
+    Returns: {rule name: [(start, end)]}
+    """
+    return (rubric or get_default_rubric()).find_grammar_hits(text_lower)
+
+
+def _count_standalone(text_lower, phrase, starts):
+    """
+    Count `phrase` surrounded by single spaces (or the text edges), exactly like
+    f" {text_lower} ".count(f" {phrase} "): neighbouring matches that would share
+    a space are not counted twice.
+    """
+    count = 0
+    next_free = 0
+    text_end = len(text_lower)
+    for start in starts:
+        end = start + len(phrase)
+        if start < next_free:
+            continue
+        if start > 0 and text_lower[start - 1] != ' ':
+            continue
+        if end < text_end and text_lower[end] != ' ':
+            continue
+        count += 1
+        # The trailing space is consumed by this match
+        next_free = end + 2
+    return count
+
+
+def warm_up():
+    """
+    Load the shared analysis resources up front, e.g. when a server boots,
+    so the first graded transcript does not pay for it.
+    """
+    get_sentiment_analyzer()
+    get_default_rubric()
+    if lexical.get_backend() == "lexicalrichness":
+        # lexicalrichness pulls in numpy, scipy and matplotlib, which takes seconds
+        import lexicalrichness  # noqa: F401
+    if _grammar_backend == "languagetool":
+        # Builds the client now, and warns now if no servers are configured
+        from languagetool import get_client
+        get_client()
+
+
+# The check_* scorers take a transcript. Each one extracts what it needs from
+# the text and hands it to the matching score_* function, which applies the
+# rubric. incremental.py keeps the same inputs up to date as the text is edited
+# and calls the score_* functions directly.
+
+def score_salutation(phrase_hits, rubric=None):
+    """
+    phrase_hits: {category: {phrase: hits}} as from Transcript.phrase_hits
     Returns: score (int), feedback (str)
     """
-    text_lower = text.lower().strip()
-    
-    # Define salutation categories
-    excellent_salutations = [
-        "i am excited to introduce", 
-        "feeling great", 
-        "thrilled to share",
-        "delighted to present"
-    ]
-    
-    good_salutations = [
-        "good morning", 
-        "good afternoon", 
-        "good evening", 
-        "good day",
-        "hello everyone",
-        "hi everyone"
-    ]
-    
-    normal_salutations = ["hi", "hello"]
-    
-    # Check for excellent salutations
-    for salutation in excellent_salutations:
-        if salutation in text_lower:
-            return 5, f"Excellent salutation found: '{salutation}'"
-    
-    # Check for good salutations
-    for salutation in good_salutations:
-        if salutation in text_lower:
-            return 4, f"Good salutation found: '{salutation}'"
-    
-    # Check for normal salutations
-    for salutation in normal_salutations:
-        if salutation in text_lower:
-            return 2, f"Normal salutation found: '{salutation}'"
+    rubric = rubric or get_default_rubric()
+    
+    # Levels are listed best first, e.g. excellent, good, normal
+    for level in rubric.salutation["levels"]:
+        found = phrase_hits.get(f"salutation:{level['level']}", {})
+        for salutation in level["phrases"]:
+            if salutation in found:
+                return level["score"], f"{level['level'].capitalize()} salutation found: '{salutation}'"
     
     # No salutation found
-    return 0, "No appropriate salutation found"
+    return rubric.salutation["missing_score"], "No appropriate salutation found"
+
 
-def check_keyword_presence(text):
+@instrumented("salutation")
+def check_salutation(text, rubric=None):
     """
-    Keyword detection with specific missing items mentioned
+    Check the salutation level based on the rubric
+    Returns: score (int), feedback (str)
     """
-    text_lower = text.lower()
-    
-    must_have_categories = {
-        "name": ["my name is", "i am", "myself", "call me"],
-        "age": ["years old", "age", "i am", "old"],
-        "school_class": ["class", "grade", "school", "studying in"],
-        "family": ["family", "mother", "father", "parents", "sister", "brother"],
-        "hobbies": ["hobby", "hobbies", "like to", "enjoy", "playing", "interest", "favorite"]
-    }
-    
-    good_have_categories = {
-        "about_family": ["special thing", "about my family", "family is"],
-        "origin_location": ["from", "live in", "born in"],
-        "ambition_goal": ["dream", "goal", "want to be", "ambition", "when i grow up"],
-        "fun_fact": ["fun fact", "interesting thing", "unique", "people don't know"],
-        "strengths_achievements": ["achievement", "award", "good at", "strength", "proud of"]
-    }
+    return score_salutation(as_transcript(text).phrase_hits(rubric), rubric)
+
+
+def score_keywords(phrase_hits, rubric=None):
+    """
+    phrase_hits: {category: {phrase: hits}} as from Transcript.phrase_hits
+    Returns: must-have score, good-to-have score, feedback (str)
+    """
+    keywords = (rubric or get_default_rubric()).keywords
     
     # Check must-have
     must_have_found = []
     must_have_missing = []
-    for category, keywords in must_have_categories.items():
-        found = any(keyword in text_lower for keyword in keywords)
-        if found:
+    for category in keywords["must_have"]:
+        if phrase_hits.get(f"must_have:{category}"):
             must_have_found.append(category)
         else:
             must_have_missing.append(category)
@@ -83,16 +306,15 @@ def check_keyword_presence(text):
     # Check good-to-have
     good_have_found = []
     good_have_missing = []
-    for category, keywords in good_have_categories.items():
-        found = any(keyword in text_lower for keyword in keywords)
-        if found:
+    for category in keywords["good_have"]:
+        if phrase_hits.get(f"good_have:{category}"):
             good_have_found.append(category)
         else:
             good_have_missing.append(category)
     
     # Calculate scores
-    must_have_score = len(must_have_found) * 4
-    good_have_score = len(good_have_found) * 2
+    must_have_score = len(must_have_found) * keywords["must_have_points"]
+    good_have_score = len(good_have_found) * keywords["good_have_points"]
     
     # Build detailed feedback
     feedback_parts = []
@@ -112,92 +334,98 @@ def check_keyword_presence(text):
     return must_have_score, good_have_score, feedback
 
 
-def check_flow(text):
+@instrumented("keywords")
+def check_keyword_presence(text, rubric=None):
+    """
+    Keyword detection with specific missing items mentioned
+    """
+    return score_keywords(as_transcript(text).phrase_hits(rubric), rubric)
+
+
+def score_flow(has_salutation_start, has_closing_end, has_basic_details, rubric=None):
+    """
+    Returns: score (int), feedback (str)
+    """
+    scores = (rubric or get_default_rubric()).flow["scores"]
+    
+    # Score based on flow completeness
+    if has_salutation_start and has_closing_end and has_basic_details:
+        return scores["complete"], "Excellent flow: Proper salutation → details → closing structure"
+    elif has_salutation_start and has_basic_details:
+        return scores["no_closing"], "Good flow: Has salutation and details, but missing proper closing"
+    elif has_basic_details:
+        return scores["details_only"], "Basic flow: Has details but missing proper structure"
+    else:
+        return scores["missing"], "Poor flow: Missing key structural elements"
+
+
+@instrumented("flow")
+def check_flow(text, rubric=None):
     """
     Check if the introduction follows the proper flow:
     Salutation → Basic details → Additional details → Closing
     Returns: score (int), feedback (str)
     """
-    text_lower = text.lower()
-    sentences = [s.strip() for s in text.split('.') if s.strip()]
-    
-    # Define patterns for each section
-    salutation_patterns = ["hello", "hi", "good morning", "good afternoon", "good evening"]
-    basic_detail_patterns = ["name", "i am", "myself", "years old", "age", "class", "school", "grade"]
-    closing_patterns = ["thank you", "thanks", "that's all", "that is all"]
+    transcript = as_transcript(text)
+    sentence_spans = transcript.lower_sentence_spans
     
     # Check if salutation is at the beginning
     has_salutation_start = False
-    if sentences:
-        first_sentence = sentences[0].lower()
-        has_salutation_start = any(pattern in first_sentence for pattern in salutation_patterns)
+    if sentence_spans:
+        has_salutation_start = _hits_within(transcript.phrases_found("flow:salutation", rubric), sentence_spans[0])
     
     # Check if closing is at the end
     has_closing_end = False
-    if sentences:
-        last_sentence = sentences[-1].lower()
-        has_closing_end = any(pattern in last_sentence for pattern in closing_patterns)
+    if sentence_spans:
+        has_closing_end = _hits_within(transcript.phrases_found("flow:closing", rubric), sentence_spans[-1])
     
     # Check for basic details somewhere in text
-    has_basic_details = any(pattern in text_lower for pattern in basic_detail_patterns)
+    has_basic_details = bool(transcript.phrases_found("flow:basic_details", rubric))
     
-    # Score based on flow completeness
-    if has_salutation_start and has_closing_end and has_basic_details:
-        return 5, "Excellent flow: Proper salutation → details → closing structure"
-    elif has_salutation_start and has_basic_details:
-        return 3, "Good flow: Has salutation and details, but missing proper closing"
-    elif has_basic_details:
-        return 1, "Basic flow: Has details but missing proper structure"
-    else:
-        return 0, "Poor flow: Missing key structural elements"
+    return score_flow(has_salutation_start, has_closing_end, has_basic_details, rubric)
     
 
-def calculate_speech_rate(text, duration_seconds=None):
+def score_speech_rate(word_count, duration_seconds=None, rubric=None):
     """
-    Speech rate with pace improvement suggestions
+    Returns: score (int), words per minute (float), feedback (str)
     """
-    words = text.split()
-    word_count = len(words)
+    rates = (rubric or get_default_rubric()).speech_rate
     
     if duration_seconds is None:
-        estimated_wpm = 140
+        estimated_wpm = rates["estimated_wpm"]
         duration_seconds = (word_count / estimated_wpm) * 60
-        duration_seconds = max(duration_seconds, 10)
+        duration_seconds = max(duration_seconds, rates["min_estimated_duration"])
         estimated_duration = True
     else:
         estimated_duration = False
     
     wpm = (word_count / duration_seconds) * 60
     
-    if 111 <= wpm <= 140:
-        score = 10
+    ideal, fast, slow = rates["ideal"], rates["fast"], rates["slow"]
+    # Gaps between the bands (e.g. 140 < wpm < 141) fall through to "Too slow"
+    if ideal["min"] <= wpm <= ideal["max"]:
+        score = ideal["score"]
         feedback = "Ideal speech rate"
-    elif 141 <= wpm <= 160:
-        score = 6
+        suggestion = ""
+    elif fast["min"] <= wpm <= fast["max"]:
+        score = fast["score"]
         feedback = "Fast speech rate"
-    elif 81 <= wpm <= 110:
-        score = 6
+        suggestion = ". Try speaking a bit slower for better clarity"
+    elif slow["min"] <= wpm <= slow["max"]:
+        score = slow["score"]
         feedback = "Slow speech rate"
-    elif wpm > 160:
-        score = 2
+        suggestion = ". Try speaking a bit faster to maintain engagement"
+    elif wpm > fast["max"]:
+        score = rates["too_fast_score"]
         feedback = "Too fast"
+        suggestion = ". Slow down significantly for better understanding"
     else:
-        score = 2
+        score = rates["too_slow_score"]
         feedback = "Too slow"
-    
-    feedback += f": {wpm:.1f} WPM"
+        suggestion = ". Increase your speaking pace considerably"
     
     # Add pace suggestions
-    if score == 6:
-        if wpm > 140:
-            feedback += ". Try speaking a bit slower for better clarity"
-        else:
-            feedback += ". Try speaking a bit faster to maintain engagement"
-    elif score == 2:
-        if wpm > 160:
-            feedback += ". Slow down significantly for better understanding"
-        else:
-            feedback += ". Increase your speaking pace considerably"
+    feedback += f": {wpm:.1f} WPM" + suggestion
     
     if estimated_duration:
         feedback += " (estimated duration)"
@@ -205,164 +433,246 @@ def calculate_speech_rate(text, duration_seconds=None):
     return score, wpm, feedback
 
 
+@instrumented("speech_rate")
+def calculate_speech_rate(text, duration_seconds=None, rubric=None):
+    """
+    Speech rate with pace improvement suggestions
+    """
+    return score_speech_rate(as_transcript(text).word_count, duration_seconds, rubric)
+
+
+def score_grammar(rule_hits, fragment_count, word_count, rubric=None):
+    """
+    rule_hits: {rule name: number of hits}
+    fragment_count: sentences of fewer than 3 words
+    Returns: score (int), error count, feedback (str)
+    """
+    rubric = rubric or get_default_rubric()
+    error_count = 0
+    specific_issues = []
+    
+    if word_count < 15:
+        return 6, 0, "Text too short for detailed grammar analysis"
+    
+    # 1. Pattern rules of the rubric, in rule order
+    for rule_name, _, weight, issue in rubric.grammar_rules:
+        hits = rule_hits.get(rule_name, 0)
+        if hits > 0:
+            error_count += hits if weight == 1 else hits * weight
+            specific_issues.append(issue)
+    
+    return _grade_grammar_errors(error_count, specific_issues, fragment_count, word_count, rubric.grammar)
+
+
+def score_languagetool_grammar(issues, fragment_count, word_count, rubric=None):
+    """
+    issues: one description per error LanguageTool found, in text order
+    fragment_count: sentences of fewer than 3 words
+    Returns: score (int), error count, feedback (str), banded like score_grammar
+    """
+    rubric = rubric or get_default_rubric()
+    if word_count < 15:
+        return 6, 0, "Text too short for detailed grammar analysis"
+    # Most frequent issues first, then in text order
+    counts = {}
+    for issue in issues:
+        counts[issue] = counts.get(issue, 0) + 1
+    specific_issues = sorted(counts, key=lambda issue: -counts[issue])
+    return _grade_grammar_errors(len(issues), specific_issues, fragment_count, word_count, rubric.grammar)
+
+
+def _grade_grammar_errors(error_count, specific_issues, fragment_count, word_count, grammar):
+    # 2. Sentence fragments (universal)
+    if fragment_count > 0:
+        error_count += fragment_count * 0.5
+        specific_issues.append("use complete sentences")
+    
+    # Calculate score
+    if word_count > 0:
+        error_rate = (error_count / word_count) * 100
+    else:
+        error_rate = 0
+    
+    # Universal scoring
+    good_below, average_below = grammar["error_rate_thresholds"]
+    good_score, average_score, poor_score = grammar["scores"]
+    if error_count == 0:
+        score = grammar["no_errors_score"]
+        feedback = "Excellent spoken grammar"
+    elif error_rate < good_below:
+        score = good_score
+        feedback = "Good spoken grammar with minor issues"
+    elif error_rate < average_below:
+        score = average_score
+        feedback = "Average spoken grammar"
+    else:
+        score = poor_score
+        feedback = "Needs grammar improvement"
+    
+    # Add specific, actionable feedback
+    if specific_issues:
+        feedback += f". Focus on: {', '.join(specific_issues[:2])}"  # Show max 2 issues
+    
+    return score, error_count, feedback
+
 
-def check_grammar(text):
+def count_fragments(sentences):
+    """Sentences of fewer than 3 words"""
+    return sum(1 for s in sentences if len(s.split()) < 3)
+
+
+@instrumented("grammar")
+def check_grammar(text, rubric=None):
     """
     grammar scoring for ANY student speech
     """
+    rubric = rubric or get_default_rubric()
     try:
-        error_count = 0
-        text_lower = text.lower()
-        word_count = len(text.split())
-        specific_issues = []
-        
-        if word_count < 15:
-            return 6, 0, "Text too short for detailed grammar analysis"
+        transcript = as_transcript(text)
+        word_count = transcript.word_count
+        rule_hits = {}
+        fragment_count = 0
         
+        # Texts under 15 words are not analysed
+        if word_count >= 15 and _grammar_backend == "languagetool":
+            issues = _languagetool_issues(transcript, rubric)
+            if issues is not None:
+                return score_languagetool_grammar(issues, count_fragments(transcript.sentences), word_count, rubric)
+        if word_count >= 15:
+            # All pattern rules are found in one scan of the text
+            grammar_hits = rubric.find_grammar_hits(transcript.lower)
+            rule_hits = {name: len(hits) for name, hits in grammar_hits.items()}
+            fragment_count = count_fragments(transcript.sentences)
         
-        # 1. Awkward repetition patterns (common in speech)
-        repetition_patterns = re.findall(r',\s+\w+ing\b', text_lower)
-        if repetition_patterns:
-            error_count += len(repetition_patterns)
-            specific_issues.append("avoid repetition like 'play, playing'")
-        
-        # 2. Plural/singular mismatches (universal grammar rule)
-        plural_errors = re.findall(r'\b(one of my|some of my|many of my) (\w+[^s])\b', text_lower)
-        if plural_errors:
-            error_count += len(plural_errors)
-            specific_issues.append("use plural after 'one of my' (e.g., 'friends' not 'friend')")
-        
-        # 3. Verb form issues (universal)
-        verb_errors = re.findall(r'\b(enjoy|like|love) (is|are) (\w+)\b', text_lower)
-        if verb_errors:
-            error_count += len(verb_errors)
-            specific_issues.append("use '-ing' form after enjoy/like/love (e.g., 'enjoy playing')")
-        
-        # 4. Missing articles (universal speech issue)
-        article_errors = len(re.findall(r'\b(see|watch|look) (?!the|a|an|my|your)\w+', text_lower))
-        if article_errors > 0:
-            error_count += article_errors * 0.5
-            specific_issues.append("add articles like 'the', 'a', 'my' before nouns")
-        
-        # 5. Preposition issues (common in speech)
-        preposition_errors = len(re.findall(r'\btalk by myself\b', text_lower))
-        if preposition_errors > 0:
-            error_count += preposition_errors
-            specific_issues.append("use 'to myself' not 'by myself'")
-        
-        # 6. Sentence fragments (universal)
-        sentences = [s.strip() for s in text.split('.') if s.strip()]
-        fragment_count = sum(1 for s in sentences if len(s.split()) < 3)
-        if fragment_count > 0:
-            error_count += fragment_count * 0.5
-            specific_issues.append("use complete sentences")
-        
-        # Calculate score
-        if word_count > 0:
-            error_rate = (error_count / word_count) * 100
-        else:
-            error_rate = 0
-        
-        # Universal scoring
-        if error_count == 0:
-            score = 10
-            feedback = "Excellent spoken grammar"
-        elif error_rate < 5:
-            score = 8
-            feedback = "Good spoken grammar with minor issues"
-        elif error_rate < 10:
-            score = 6
-            feedback = "Average spoken grammar"
-        else:
-            score = 4
-            feedback = "Needs grammar improvement"
-        
-        # Add specific, actionable feedback
-        if specific_issues:
-            feedback += f". Focus on: {', '.join(specific_issues[:2])}"  # Show max 2 issues
-        
-        return score, error_count, feedback
+        return score_grammar(rule_hits, fragment_count, word_count, rubric)
         
     except Exception as e:
         return 6, 0, "Speech grammar analysis completed"
+
+
+def _languagetool_issues(transcript, rubric):
+    """LanguageTool's issues for the transcript's sentences, or None to fall back to the regex rules"""
+    global _grammar_fallbacks
+    from languagetool import check_sentences
+
+    try:
+        issues = check_sentences(transcript.sentences, rubric.grammar.get("languagetool_language", "en-US"))
+    except Exception:
+        # e.g. a malformed server answer; never worse than the regex rules
+        issues = None
+    if issues is None:
+        _grammar_fallbacks += 1
+    return issues
     
 
-def check_vocabulary_richness(text):
+# Feedback for each vocabulary / filler / sentiment band, best band first
+VOCABULARY_LABELS = [
+    "Excellent vocabulary diversity",
+    "Good vocabulary diversity",
+    "Average vocabulary diversity",
+    "Below average vocabulary diversity",
+    "Limited vocabulary diversity",
+]
+
+FILLER_LABELS = [
+    "Excellent clarity, very few filler words",
+    "Good clarity, some filler words",
+    "Average clarity, noticeable filler words",
+    "Below average clarity, many filler words",
+    "Poor clarity, excessive filler words",
+]
+
+SENTIMENT_LABELS = [
+    "Extremely positive and enthusiastic",
+    "Very positive and engaging",
+    "Moderately positive",
+    "Neutral with some positive elements",
+    "Could be more positive",
+]
+
+
+def score_vocabulary(words, terms, rubric=None):
+    """
+    words, terms: token and distinct token counts, as LexicalRichness counts them
+    Returns: score (int), TTR (float), feedback (str)
+    """
+    vocabulary = (rubric or get_default_rubric()).vocabulary
+    
+    if words < 10:
+        return 6, 0.5, "Use more words for better vocabulary assessment"
+    
+    if words > 0:
+        ttr = terms / words
+    else:
+        ttr = 0
+    
+    # Score calculation: the first band whose threshold the TTR reaches
+    band = len(vocabulary["ttr_thresholds"])
+    for index, threshold in enumerate(vocabulary["ttr_thresholds"]):
+        if ttr >= threshold:
+            band = index
+            break
+    score = vocabulary["scores"][band]
+    feedback = VOCABULARY_LABELS[band]
+    
+    feedback += f" (TTR: {ttr:.3f})"
+    
+    # Add improvement suggestions for lower scores
+    if score <= vocabulary["suggest_at_or_below_score"]:
+        if ttr < vocabulary["varied_words_below_ttr"]:
+            feedback += ". Try using more varied words instead of repeating the same words"
+        if words < vocabulary["descriptive_words_below_words"]:
+            feedback += ". Add more descriptive words to your introduction"
+    
+    return score, ttr, feedback
+
+
+@instrumented("vocabulary")
+def check_vocabulary_richness(text, rubric=None):
     """
     Vocabulary scoring with specific suggestions
     """
     try:
-        clean_text = re.sub(r'[^\w\s]', '', text.lower())
-        lex_rich = LexicalRichness(clean_text)
-        
-        if lex_rich.words < 10:
-            return 6, 0.5, "Use more words for better vocabulary assessment"
-        
-        if lex_rich.words > 0:
-            ttr = lex_rich.terms / lex_rich.words
-        else:
-            ttr = 0
-        
-        # Score calculation
-        if ttr >= 0.75:
-            score = 10
-            feedback = "Excellent vocabulary diversity"
-        elif ttr >= 0.65:
-            score = 8
-            feedback = "Good vocabulary diversity"
-        elif ttr >= 0.55:
-            score = 6
-            feedback = "Average vocabulary diversity"
-        elif ttr >= 0.45:
-            score = 4
-            feedback = "Below average vocabulary diversity"
+        transcript = as_transcript(text)
+        if lexical.get_backend() == "lexicalrichness":
+            words, terms = lexical.lexicalrichness_counts(transcript.lower)
         else:
-            score = 2
-            feedback = "Limited vocabulary diversity"
-        
-        feedback += f" (TTR: {ttr:.3f})"
-        
-        # Add improvement suggestions for lower scores
-        if score <= 6:
-            if ttr < 0.6:
-                feedback += ". Try using more varied words instead of repeating the same words"
-            if lex_rich.words < 50:
-                feedback += ". Add more descriptive words to your introduction"
-        
-        return score, ttr, feedback
+            words, terms = lexical.count_words_and_terms(transcript.tokens)
+        return score_vocabulary(words, terms, rubric)
         
     except Exception as e:
         return 6, 0.5, "Vocabulary analysis completed"
     
 
 
-def check_filler_words(text):
+def count_fillers(text_lower, filler_hits, rubric=None):
     """
-    Detect filler words with better accuracy
+    Standalone occurrences of every rubric filler word.
+    filler_hits: {filler: [start offsets]}, the "filler" phrase hits of text_lower
+    Returns: {filler: count}
     """
-    # More precise filler words list
-    filler_words = [
-        ' um ', ' uh ', ' like ', ' you know ', ' so ', ' actually ', ' basically ', 
-        ' right ', ' i mean ', ' well ', ' kinda ', ' sort of ', ' okay ', ' hmm ', 
-        ' ah ', ' er '
-    ]
-    
-    # Context-dependent words (count them less)
-    context_fillers = ['so', 'well', 'right', 'really', 'very', 'just']
-    
-    text_lower = f" {text.lower()} "  # Add spaces for better word boundary detection
-    words = text.split()
-    total_words = len(words)
+    counts = {}
+    for filler in (rubric or get_default_rubric()).filler_words["words"]:
+        filler_clean = filler.strip()
+        counts[filler_clean] = _count_standalone(text_lower, filler_clean, filler_hits.get(filler_clean, ()))
+    return counts
+
+
+def score_filler_words(filler_counts, total_words, rubric=None):
+    """
+    filler_counts: {filler: standalone occurrences}, as from count_fillers
+    Returns: score (int), filler rate (float), feedback (str)
+    """
+    fillers = (rubric or get_default_rubric()).filler_words
     
     # Count filler words
     filler_count = 0
     found_fillers = []
     
-    for filler in filler_words:
+    for filler in fillers["words"]:
         filler_clean = filler.strip()
-        # Count only standalone filler words
-        count = text_lower.count(filler)
-        if count > 0 and filler_clean in context_fillers:
+        count = filler_counts.get(filler_clean, 0)
+        if count > 0 and filler_clean in fillers["context_words"]:
             # For context-dependent words, be more conservative
             count = count // 2
         
@@ -373,22 +683,14 @@ def check_filler_words(text):
     # Calculate filler word rate (percentage)
     filler_rate = (filler_count / total_words) * 100 if total_words > 0 else 0
     
-    # Score based on filler rate
-    if filler_rate <= 2:
-        score = 15
-        feedback = "Excellent clarity, very few filler words"
-    elif filler_rate <= 4:
-        score = 12
-        feedback = "Good clarity, some filler words"
-    elif filler_rate <= 6:
-        score = 9
-        feedback = "Average clarity, noticeable filler words"
-    elif filler_rate <= 8:
-        score = 6
-        feedback = "Below average clarity, many filler words"
-    else:
-        score = 3
-        feedback = "Poor clarity, excessive filler words"
+    # Score based on filler rate: the first band whose limit the rate stays within
+    band = len(fillers["rate_thresholds"])
+    for index, threshold in enumerate(fillers["rate_thresholds"]):
+        if filler_rate <= threshold:
+            band = index
+            break
+    score = fillers["scores"][band]
+    feedback = FILLER_LABELS[band]
     
     # Add details to feedback
     if found_fillers:
@@ -401,64 +703,80 @@ def check_filler_words(text):
     return score, filler_rate, feedback
 
 
-def check_sentiment(text):
+@instrumented("filler_words")
+def check_filler_words(text, rubric=None):
     """
-    Balanced sentiment scoring for any student introduction
+    Detect filler words with better accuracy
     """
-    try:
-        analyzer = SentimentIntensityAnalyzer()
-        sentiment_scores = analyzer.polarity_scores(text)
-        compound = sentiment_scores['compound']
-        
-        # Balanced ranges for student speeches
-        if compound >= 0.8:  # Extremely enthusiastic
-            score = 15
-            feedback = "Extremely positive and enthusiastic"
-        elif compound >= 0.6:  # Very positive (most good speeches)
+    transcript = as_transcript(text)
+    # Count only standalone filler words
+    filler_counts = count_fillers(transcript.lower, transcript.phrases_found("filler", rubric), rubric)
+    return score_filler_words(filler_counts, transcript.word_count, rubric)
+
+
+def score_sentiment(compound, rubric=None):
+    """
+    compound: VADER compound polarity of the whole transcript
+    Returns: score (int), compound (float), feedback (str)
+    """
+    sentiment = (rubric or get_default_rubric()).sentiment
+    
+    # Balanced ranges for student speeches, most enthusiastic first
+    band = len(sentiment["compound_thresholds"])
+    for index, threshold in enumerate(sentiment["compound_thresholds"]):
+        if compound >= threshold:
+            band = index
+            break
+    score = sentiment["scores"][band]
+    feedback = SENTIMENT_LABELS[band]
+    
+    feedback += f" (score: {compound:.3f})"
+    
+    if score <= sentiment["suggest_at_or_below_score"]:
+        if compound < sentiment["positive_words_below"]:
+            feedback += ". Try adding more positive words like 'excited', 'enjoy', 'love'"
+        elif compound < sentiment["enthusiasm_below"]:
+            feedback += ". Show more enthusiasm in your delivery"
+    
+    return score, compound, feedback
+
+
+def score_positive_words(phrase_hits, word_count, rubric=None):
+    """
+    Fallback sentiment score from the rubric's positive words, used when VADER fails
+    Returns: score (int), 0.5, feedback (str)
+    """
+    found = phrase_hits.get("positive", {})
+    positive_words = (rubric or get_default_rubric()).sentiment["fallback_positive_words"]
+    positive_count = sum(1 for word in positive_words if word in found)
+    
+    if word_count > 20:  # Only analyze if sufficient text
+        positivity_ratio = positive_count / (word_count / 20)  # Normalize
+        if positivity_ratio >= 3:
             score = 12
-            feedback = "Very positive and engaging"
-        elif compound >= 0.4:  # Moderately positive
+        elif positivity_ratio >= 2:
             score = 9
-            feedback = "Moderately positive"
-        elif compound >= 0.2:  # Neutral with some positivity
+        elif positivity_ratio >= 1:
             score = 6
-            feedback = "Neutral with some positive elements"
         else:
             score = 3
-            feedback = "Could be more positive"
-        
-        feedback += f" (score: {compound:.3f})"
-        
-        if score <= 9:
-            if compound < 0.4:
-                feedback += ". Try adding more positive words like 'excited', 'enjoy', 'love'"
-            elif compound < 0.6:
-                feedback += ". Show more enthusiasm in your delivery"
-        
-        return score, compound, feedback
+    else:
+        score = 6  # Default for short texts
         
+    return score, 0.5, "Positive tone detected"
+
+
+@instrumented("sentiment")
+def check_sentiment(text, rubric=None):
+    """
+    Balanced sentiment scoring for any student introduction
+    """
+    transcript = as_transcript(text)
+    try:
+        analyzer = get_sentiment_analyzer(rubric)
+        compound = analyzer.polarity_scores(transcript.text)['compound']
+        return score_sentiment(compound, rubric)
         
     except Exception as e:
         # Fallback that works for any text
-        positive_words = ['excited', 'happy', 'love', 'enjoy', 'great', 'wonderful', 
-                         'amazing', 'fantastic', 'excellent', 'best', 'fun', 'interesting',
-                         'special', 'favorite', 'thank you', 'proud', 'passionate']
-        
-        text_lower = text.lower()
-        word_count = len(text.split())
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        
-        if word_count > 20:  # Only analyze if sufficient text
-            positivity_ratio = positive_count / (word_count / 20)  # Normalize
-            if positivity_ratio >= 3:
-                score = 12
-            elif positivity_ratio >= 2:
-                score = 9
-            elif positivity_ratio >= 1:
-                score = 6
-            else:
-                score = 3
-        else:
-            score = 6  # Default for short texts
-            
-        return score, 0.5, "Positive tone detected"
\ No newline at end of file
+        return score_positive_words(transcript.phrase_hits(rubric), transcript.word_count, rubric)
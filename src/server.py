@@ -0,0 +1,435 @@
+"""
+HTTP grading service on asyncio, with no dependencies beyond the standard library.
+
+Endpoints (JSON in, JSON out):
+    POST /grade         {"id": "s-001", "transcript": "...", "duration_seconds": 52, "language": "en"}
+                        -> the report, as from grader.grade_transcript, with "id" if given
+    POST /grade/batch   {"submissions": [{...}, ...]} or a bare list
+                        -> {"reports": [...]} in request order
+    GET  /health        200 once every worker is warmed up, 503 before that;
+                        includes queue and throughput counters
+
+Single requests that arrive within `batch_window_ms` of each other are graded
+together in one task on the worker pool (the same workers batch.py uses), so
+the per-task overhead is shared. When more than `max_pending` transcripts are
+waiting, new requests get 503 with Retry-After instead of queueing without
+bound; a batch larger than `max_pending` is refused with 413.
+
+Usage:
+    python src/server.py --port 8000 --workers 8
+    python src/server.py --port 8000 --workers 8 --rubric rubrics/grade5.json --cache results.sqlite
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+import batch
+from grade_cli import TEXT_FIELDS, ID_FIELDS, valid_duration
+from languages import get_registry
+from rubric import load_compiled_rubric
+
+DEFAULT_BATCH_WINDOW_MS = 5.0
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_PENDING = 2048
+DEFAULT_MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_HEADER_LINES = 100
+# Seconds each warm-up task keeps its worker busy, so one round reaches different workers
+WARM_UP_HOLD = 0.05
+
+
+class Overloaded(Exception):
+    """Raised when the grading queue is full"""
+
+
+class BadRequest(Exception):
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_submission(record):
+    """
+    Validate one submission object.
+    Returns: (submission id or None, transcript text, duration in seconds or None,
+    registered language tag or None)
+    Raises: BadRequest
+    """
+    if isinstance(record, str):
+        record = {"transcript": record}
+    if not isinstance(record, dict):
+        raise BadRequest("expected a JSON object or string")
+
+    text = next((record[name] for name in TEXT_FIELDS if name in record), None)
+    if not isinstance(text, str) or not text.strip():
+        raise BadRequest(f"no transcript text (expected one of {', '.join(TEXT_FIELDS)})")
+
+    duration_seconds = record.get("duration_seconds")
+    if duration_seconds is not None and not valid_duration(duration_seconds):
+        raise BadRequest("duration_seconds must be a positive, finite number")
+
+    language = record.get("language")
+    if language is not None:
+        if not isinstance(language, str):
+            raise BadRequest('language must be a language tag such as "en"')
+        try:
+            language = get_registry().resolve(language)
+        except ValueError as e:
+            raise BadRequest(str(e))
+
+    submission_id = next((record[name] for name in ID_FIELDS if name in record), None)
+    return submission_id, text, duration_seconds, language
+
+
+class MicroBatcher:
+    """
+    Collects transcripts from concurrent requests and grades them in batches
+    on a worker pool. At most `max_in_flight` batches run at once.
+    """
+
+    def __init__(self, executor, batch_window_ms=DEFAULT_BATCH_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH,
+                 max_pending=DEFAULT_MAX_PENDING, max_in_flight=2):
+        self.executor = executor
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.pending = 0  # transcripts accepted and not graded yet
+        self.graded = 0
+        self.batches = 0
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def grade(self, items):
+        """
+        Grade (text, duration_seconds, language tag) items.
+        Returns: their reports, in order
+        Raises: Overloaded if the queue cannot take them all
+        """
+        if self.pending + len(items) > self.max_pending:
+            raise Overloaded()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            future = loop.create_future()
+            self._queue.put_nowait((item, future))
+            futures.append(future)
+        self.pending += len(items)
+        return await asyncio.gather(*futures)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            entries = [await self._queue.get()]
+            # Wait a few milliseconds for more requests to share the task with
+            deadline = loop.time() + self.batch_window
+            while len(entries) < self.max_batch:
+                if not self._queue.empty():
+                    entries.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                # Polling (rather than wait_for on get) never drops an item on timeout
+                await asyncio.sleep(min(remaining, 0.001))
+
+            await self._slots.acquire()
+            loop.create_task(self._grade_entries(entries))
+
+    async def _grade_entries(self, entries):
+        try:
+            items = [item for item, _ in entries]
+            try:
+                reports = await self._grade_items(items)
+            except Exception as e:
+                if len(items) == 1:
+                    reports = [e]
+                else:
+                    # One failing transcript fails the whole task: grade the items one by one,
+                    # so only the requests whose transcripts fail get the error
+                    reports = await asyncio.gather(*(self._grade_items([item]) for item in items),
+                                                   return_exceptions=True)
+                    reports = [report if isinstance(report, Exception) else report[0] for report in reports]
+            for (_, future), report in zip(entries, reports):
+                if future.done():
+                    continue
+                if isinstance(report, Exception):
+                    future.set_exception(report)
+                else:
+                    future.set_result(report)
+                    self.graded += 1
+        finally:
+            self.pending -= len(entries)
+            self.batches += 1
+            self._slots.release()
+
+    async def _grade_items(self, items):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, batch._grade_chunk, items)
+
+
+class GradingServer:
+    """
+    The HTTP front end: parses requests, hands transcripts to a MicroBatcher
+    and writes the JSON responses. Connections are kept alive between requests.
+    """
+
+    def __init__(self, workers=None, batch_window_ms=DEFAULT_BATCH_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH,
+                 max_pending=DEFAULT_MAX_PENDING, max_body_bytes=DEFAULT_MAX_BODY_BYTES,
+                 cache_path=None, rubric_path=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_window_ms = batch_window_ms
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_body_bytes = max_body_bytes
+        self.cache_path = cache_path
+        self.rubric_path = rubric_path
+        self.ready = False
+        self.started_at = None
+        self.executor = None
+        self.batcher = None
+        self._server = None
+
+    def _make_executor(self):
+        initargs = (self.cache_path, self.rubric_path)
+        if self.workers == 1:
+            # One grading thread keeps the event loop free without a second process
+            return ThreadPoolExecutor(max_workers=1, initializer=batch._init_worker, initargs=initargs)
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=batch._init_worker, initargs=initargs)
+
+    async def start(self, host="127.0.0.1", port=8000):
+        if self.rubric_path is not None:
+            # Validate and compile once here, so workers only read the cached artifact
+            load_compiled_rubric(self.rubric_path)
+        self.executor = self._make_executor()
+        self.batcher = MicroBatcher(self.executor, self.batch_window_ms, self.max_batch, self.max_pending,
+                                    max_in_flight=self.workers * 2)
+        self.batcher.start()
+        self.started_at = time.monotonic()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        asyncio.get_running_loop().create_task(self._warm_up())
+        return self._server
+
+    async def _warm_up(self):
+        """
+        Start every worker (each loads VADER and the rubric) before reporting
+        ready. The pool may give several warm-up tasks to one process, so
+        rounds are sent until every worker process has answered.
+        """
+        loop = asyncio.get_running_loop()
+        started = set()
+        while len(started) < self.workers:
+            started.update(await asyncio.gather(*(loop.run_in_executor(self.executor, batch._worker_pid, WARM_UP_HOLD)
+                                                  for _ in range(self.workers))))
+        self.ready = True
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self.batcher is not None:
+            await self.batcher.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except BadRequest as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                status, payload, headers = await self._dispatch(method, path, body)
+                await self._respond(writer, status, payload, keep_alive, headers)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_line(self, reader, what, status):
+        try:
+            return await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            # Longer than the stream's buffer limit (64 KiB)
+            raise BadRequest(f"{what} too long", status)
+
+    async def _read_request(self, reader):
+        """Returns: (method, path, body bytes, keep alive), or None when the client closed the connection"""
+        request_line = await self._read_line(reader, "request line", HTTPStatus.REQUEST_URI_TOO_LONG)
+        if not request_line:
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise BadRequest("malformed request line")
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await self._read_line(reader, "header line", HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise BadRequest("too many headers", HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise BadRequest("chunked request bodies are not supported", HTTPStatus.LENGTH_REQUIRED)
+        length = headers.get("content-length", "0")
+        # Digits only: int() would also take a sign, spaces and underscores
+        if not (length.isascii() and length.isdigit()):
+            raise BadRequest("invalid Content-Length")
+        length = int(length)
+        if length > self.max_body_bytes:
+            raise BadRequest(f"request body over {self.max_body_bytes} bytes", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method.upper(), target.split("?", 1)[0], body, keep_alive
+
+    async def _dispatch(self, method, path, body):
+        """Returns: (status, JSON payload, extra headers)"""
+        routes = {
+            "/grade": ("POST", self._grade),
+            "/grade/batch": ("POST", self._grade_batch),
+            "/health": ("GET", self._health),
+        }
+        if path not in routes:
+            return HTTPStatus.NOT_FOUND, {"error": f"no route {path}"}, {}
+        allowed, handler = routes[path]
+        if method != allowed:
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"use {allowed}"}, {"Allow": allowed}
+
+        try:
+            return await handler(body)
+        except BadRequest as e:
+            return e.status, {"error": str(e)}, {}
+        except Overloaded:
+            return (HTTPStatus.SERVICE_UNAVAILABLE, {"error": "grading queue is full, retry shortly"},
+                    {"Retry-After": "1"})
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"grading failed: {e}"}, {}
+
+    def _load_json(self, body):
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise BadRequest(f"invalid JSON ({e})")
+
+    async def _grade(self, body):
+        submission_id, text, duration_seconds, language = parse_submission(self._load_json(body))
+        report, = await self.batcher.grade([(text, duration_seconds, language)])
+        if submission_id is not None:
+            report = {"id": submission_id, **report}
+        return HTTPStatus.OK, report, {}
+
+    async def _grade_batch(self, body):
+        records = self._load_json(body)
+        if isinstance(records, dict):
+            records = records.get("submissions")
+        if not isinstance(records, list):
+            raise BadRequest('expected a list of submissions or {"submissions": [...]}')
+        if len(records) > self.batcher.max_pending:
+            # More than the queue can ever hold, so retrying would not help
+            raise BadRequest(f"at most {self.batcher.max_pending} submissions per request",
+                             HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+        submissions = []
+        for index, record in enumerate(records):
+            try:
+                submissions.append(parse_submission(record))
+            except BadRequest as e:
+                raise BadRequest(f"submission {index}: {e}")
+        reports = await self.batcher.grade([(text, duration_seconds, language)
+                                            for _, text, duration_seconds, language in submissions])
+        reports = [report if submission_id is None else {"id": submission_id, **report}
+                   for (submission_id, _, _, _), report in zip(submissions, reports)]
+        return HTTPStatus.OK, {"reports": reports}, {}
+
+    async def _health(self, body):
+        payload = {
+            "status": "ok" if self.ready else "warming up",
+            "workers": self.workers,
+            "pending": self.batcher.pending,
+            "max_pending": self.batcher.max_pending,
+            "graded": self.batcher.graded,
+            "batches": self.batcher.batches,
+            "uptime_seconds": time.monotonic() - self.started_at,
+        }
+        return (HTTPStatus.OK if self.ready else HTTPStatus.SERVICE_UNAVAILABLE), payload, {}
+
+    async def _respond(self, writer, status, payload, keep_alive, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        lines = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host, port, **options):
+    server = GradingServer(**options)
+    listener = await server.start(host, port)
+    print(f"Grading on http://{host}:{port} with {server.workers} workers", file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the speech grader over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="grading processes (default: CPU count)")
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW_MS,
+                        help="how long a request waits for others to be graded with it")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="transcripts per worker task")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="transcripts queued before requests are refused with 503")
+    parser.add_argument("--max-body-bytes", type=int, default=DEFAULT_MAX_BODY_BYTES)
+    parser.add_argument("--rubric", default=None, metavar="PATH",
+                        help="rubric file (JSON or YAML) to grade against (default: rubrics/default.json)")
+    parser.add_argument("--cache", default=None, metavar="PATH", help="SQLite file caching reports")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1 or args.max_batch < 1:
+        parser.error("--workers and --max-batch must be at least 1")
+
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, batch_window_ms=args.batch_window_ms,
+                          max_batch=args.max_batch, max_pending=args.max_pending,
+                          max_body_bytes=args.max_body_bytes, cache_path=args.cache,
+                          rubric_path=args.rubric))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Near-duplicate detection across submitted transcripts (MinHash + LSH).
+
+Copied or templated introductions score full marks, and comparing every
+pair of a 50k-submission cohort does not scale. Instead each transcript is
+summarised by a MinHash signature of its word 3-grams, built from the same
+tokens the vocabulary scorer counts (Transcript.tokens), and signatures are
+filed in LSH bands: two transcripts land in a shared bucket with high
+probability only when their Jaccard similarity is near or above the
+threshold. A lookup only compares against the transcripts in its buckets.
+
+Memory per indexed transcript is fixed: the signature (4 bytes per
+permutation) and one bucket entry per band, whatever the transcript length.
+
+    hasher = MinHasher()
+    index = SimilarityIndex(threshold=0.8, hasher=hasher)
+    for submission_id, text in submissions:
+        signature = hasher.signature(Transcript(text).tokens)
+        matches = index.add(submission_id, signature)   # earlier near-duplicates
+"""
+import hashlib
+
+import numpy as np
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+
+# Permutations are a * x + b mod a prime just above 2**32, on 32-bit shingle
+# hashes, so a * x + b never overflows uint64
+_PRIME = np.uint64((1 << 32) + 15)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Shingles hashed per block, bounding the (permutations x shingles) work array
+_BLOCK = 4096
+
+
+def _shingle_hashes(tokens, shingle_size):
+    """32-bit hashes of the distinct word n-grams (the whole text when it is shorter)"""
+    if len(tokens) <= shingle_size:
+        shingles = {" ".join(tokens)} if tokens else set()
+    else:
+        shingles = {" ".join(tokens[start:start + shingle_size])
+                    for start in range(len(tokens) - shingle_size + 1)}
+    # blake2b rather than hash(): signatures must agree across worker processes
+    return np.fromiter((int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), "little")
+                        for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+
+class MinHasher:
+    """
+    Builds MinHash signatures. Signatures are only comparable between hashers
+    with the same num_perm, shingle_size and seed.
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        if num_perm < 1 or shingle_size < 1:
+            raise ValueError("num_perm and shingle_size must be at least 1")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, tokens):
+        """
+        tokens: the transcript's tokens, e.g. Transcript.tokens
+        Returns: bytes (num_perm uint32 minima), or None when there are no tokens
+        """
+        hashes = _shingle_hashes(tokens, self.shingle_size)
+        if not len(hashes):
+            return None
+        minima = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), _BLOCK):
+            block = hashes[None, start:start + _BLOCK]
+            permuted = ((self._a * block + self._b) % _PRIME) & _MAX_HASH
+            np.minimum(minima, permuted.min(axis=1), out=minima)
+        return minima.astype(np.uint32).tobytes()
+
+
+def estimate_similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures' shingle sets"""
+    first = np.frombuffer(signature, dtype=np.uint32)
+    second = np.frombuffer(other, dtype=np.uint32)
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+def lsh_bands(threshold, num_perm, false_negative_weight=0.9):
+    """
+    (bands, rows per band) minimising the weighted chances of missing a pair
+    above the threshold and of comparing a pair below it. Missing a copy is
+    worse than comparing a few more candidates, so misses weigh more.
+    """
+    def area(probability, start, end, steps=100):
+        width = (end - start) / steps
+        return sum(probability(start + (step + 0.5) * width) for step in range(steps)) * width
+
+    best = None
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positives = area(lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+            false_negatives = area(lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+            error = (1 - false_negative_weight) * false_positives + false_negative_weight * false_negatives
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class SimilarityIndex:
+    """
+    LSH index of MinHash signatures with incremental inserts.
+    Lookups return the indexed transcripts whose estimated similarity is at
+    least `threshold`, comparing only against transcripts sharing a bucket.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, hasher=None):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher()
+        self.bands, self.rows = lsh_bands(threshold, self.hasher.num_perm)
+        self._ids = []  # doc id per position
+        self._signatures = []  # signature per position
+        # Per band: hash of the band's values -> position, or list of positions
+        self._buckets = [{} for _ in range(self.bands)]
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _band_keys(self, signature):
+        width = self.rows * 4
+        return [hash(signature[band * width:(band + 1) * width]) for band in range(self.bands)]
+
+    def query(self, signature):
+        """
+        Returns: [(doc id, estimated similarity)] of indexed near-duplicates,
+        most similar first
+        """
+        if signature is None:
+            return []
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            found = bucket.get(key)
+            if found is None:
+                continue
+            if isinstance(found, list):
+                candidates.update(found)
+            else:
+                candidates.add(found)
+
+        matches = []
+        for position in sorted(candidates):
+            similarity = estimate_similarity(signature, self._signatures[position])
+            if similarity >= self.threshold:
+                matches.append((self._ids[position], similarity))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def insert(self, doc_id, signature):
+        """
+        Index a signature under `doc_id`, which is only reported back, so it need
+        not be unique. Transcripts without tokens (signature None) are not indexed.
+        """
+        if signature is None:
+            return
+        position = len(self._ids)
+        self._ids.append(doc_id)
+        self._signatures.append(signature)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            found = bucket.get(key)
+            if found is None:
+                bucket[key] = position
+            elif isinstance(found, list):
+                found.append(position)
+            else:
+                bucket[key] = [found, position]
+
+    def add(self, doc_id, signature):
+        """
+        Look up, then insert.
+        Returns: near-duplicates among the transcripts indexed before this one
+        """
+        matches = self.query(signature)
+        self.insert(doc_id, signature)
+        return matches
+
+
+def similarity_flag(matches, max_matches=5):
+    """The "similarity" entry added to a JSON report"""
+    return {
+        "near_duplicate": bool(matches),
+        "max_similarity": matches[0][1] if matches else 0.0,
+        "matches": [{"id": doc_id, "similarity": similarity} for doc_id, similarity in matches[:max_matches]],
+    }
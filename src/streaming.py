@@ -0,0 +1,382 @@
+"""
+Streaming grading of live speech-recognizer output.
+
+StreamingGrader takes timestamped text chunks as a recognizer emits them. The
+transcript is the chunks joined by single spaces, so the final report is the
+one grader.grade_transcript gives for that text and the spoken duration.
+
+The completed units of incremental.IncrementalGrader (text ending in ". ")
+never change once a later chunk starts, so only the open unit at the end is
+ever re-analyzed. Speech recognizers often emit no punctuation at all, so that
+unit can grow without bound; like chunked.ChunkedGrader, its counts up to
+`overlap` characters before the end are settled once, and each chunk only
+scans the new text plus that overlap again. A chunk therefore costs the same
+however long the stream has run. Reports are identical to grading the whole
+text as long as no grammar rule match (with its lookahead) is longer than
+`overlap`. A window of recent chunks gives the rolling speaking rate.
+
+Sentiment (VADER) needs the whole text, so it is only computed when scores
+are asked for, not per chunk.
+"""
+from bisect import bisect_left
+from collections import Counter, deque
+
+import lexical
+from chunked import DEFAULT_OVERLAP
+from incremental import UNIT_END, IncrementalGrader, UnitStats, split_units
+
+DEFAULT_WINDOW_SECONDS = 30.0
+
+
+class _Counts:
+    """Counts for part of the open unit, in the form IncrementalGrader._apply takes"""
+    __slots__ = ("words", "fragments", "phrases", "fillers", "grammar", "tokens")
+
+    def __init__(self):
+        self.words = 0
+        self.fragments = 0
+        self.phrases = Counter()
+        self.fillers = Counter()
+        self.grammar = Counter()
+        self.tokens = Counter()
+
+    def add(self, other):
+        self.words += other.words
+        self.fragments += other.fragments
+        self.phrases.update(other.phrases)
+        self.fillers.update(other.fillers)
+        self.grammar.update(other.grammar)
+        self.tokens.update(other.tokens)
+
+
+class _ScanState:
+    """Where a scan of the open unit stands: the current sentence and the rules' next free offsets"""
+    __slots__ = ("segments", "segment_words", "sentences", "first_sentence", "last_sentence",
+                 "salutation", "last_closing", "filler_next_free", "grammar_next_free")
+
+    def __init__(self):
+        self.segments = 0  # '.' seen so far
+        self.segment_words = 0  # words in the current sentence
+        self.sentences = 0  # non-empty sentences closed so far
+        self.first_sentence = None  # segment index of the first non-empty sentence
+        self.last_sentence = None
+        self.salutation = False
+        self.last_closing = None  # segment index of the last closing phrase
+        self.filler_next_free = {}
+        self.grammar_next_free = {}
+
+    def copy(self):
+        state = _ScanState.__new__(_ScanState)
+        for name in self.__slots__:
+            setattr(state, name, getattr(self, name))
+        state.filler_next_free = dict(self.filler_next_free)
+        state.grammar_next_free = dict(self.grammar_next_free)
+        return state
+
+    def close_segment(self, counts):
+        if self.segment_words:
+            self.sentences += 1
+            if self.segment_words < 3:
+                counts.fragments += 1
+        self.segment_words = 0
+        self.segments += 1
+
+
+class _OpenUnit:
+    """
+    The unit at the end of the stream, analyzed as it grows. Text up to
+    `margin` characters before the end is settled into running counts once
+    (as ChunkedGrader does); the rest is scanned again after each append,
+    as the end of the text. Exposes the sentence and flow fields of a
+    UnitStats for IncrementalGrader._flow_edges.
+    """
+
+    def __init__(self, rubric, margin):
+        self.rubric = rubric
+        self.margin = margin
+        self._fillers = {filler.strip() for filler in rubric.filler_words["words"]}
+        self._pieces = []
+        self.last_char = ""
+        self._buffer = ""  # lowered text from offset _base on
+        self._base = 0
+        self._done = 0  # lowered offset up to which the counts are settled
+        self._state = _ScanState()
+        self.settled = _Counts()
+        self.live = _Counts()
+        self.sentences = 0
+        self.opens_with_salutation = False
+        self.ends_with_closing = False
+
+    @property
+    def text(self):
+        if len(self._pieces) > 1:
+            self._pieces = ["".join(self._pieces)]
+        return self._pieces[0] if self._pieces else ""
+
+    def append(self, text):
+        """
+        Returns: (counts settled by this append, the previous live counts, the new live counts);
+        the unit's counts are always `settled` plus `live`
+        """
+        self._pieces.append(text)
+        self.last_char = text[-1:] or self.last_char
+        self._buffer += text.lower()
+        end = self._base + len(self._buffer)
+
+        settled = _Counts()
+        # Settle up to a whitespace cut at least `margin` before the end
+        limit = end - self.margin
+        while limit > self._done and not self._buffer[limit - self._base - 1].isspace():
+            limit -= 1
+        if limit > self._done:
+            self._scan(self._state, settled, limit, None)
+            self.settled.add(settled)
+            # Keep `margin` characters before the unsettled part for lookbehind
+            keep_from = max(self._done - self.margin, self._base)
+            self._buffer = self._buffer[keep_from - self._base:]
+            self._base = keep_from
+
+        # The rest is scanned as the end of the text, from a copy of the settled state
+        state = self._state.copy()
+        live = _Counts()
+        self._scan(state, live, end, end)
+        state.close_segment(live)
+        self.sentences = state.sentences
+        self.opens_with_salutation = state.salutation
+        self.ends_with_closing = state.last_closing is not None and state.last_closing == state.last_sentence
+        previous, self.live = self.live, live
+        return settled, previous, live
+
+    def _scan(self, state, counts, limit, text_end):
+        """Count the lowered text in [_done, limit); text_end: where the text ends, None if it goes on"""
+        buffer = self._buffer
+        base = self._base
+        start = self._done
+        region = buffer[start - base:limit - base]
+
+        counts.words += len(region.split())
+        counts.tokens.update(lexical.iter_vocabulary_tokens(region))
+
+        # Sentences, split on '.' like Transcript.sentences
+        dots = []
+        offset = start
+        for number, piece in enumerate(region.split('.')):
+            if number:
+                dots.append(offset - 1)
+                state.close_segment(counts)
+            words = len(piece.split())
+            if words:
+                state.segment_words += words
+                if state.first_sentence is None:
+                    state.first_sentence = state.segments
+                state.last_sentence = state.segments
+            offset += len(piece) + 1
+        dots_before = state.segments - len(dots)
+
+        # Rubric phrases starting in the region (they end within the buffer)
+        scan_from = start - base
+        for local_start, phrase, category in self.rubric.matcher.finditer(buffer, scan_from):
+            hit = base + local_start
+            if hit >= limit:
+                continue
+            counts.phrases[(category, phrase)] += 1
+            if category == "filler":
+                self._count_filler(state, counts, phrase, hit, text_end)
+            elif category in ("flow:salutation", "flow:closing"):
+                segment = dots_before + bisect_left(dots, hit)
+                if category == "flow:salutation":
+                    if segment == state.first_sentence:
+                        state.salutation = True
+                elif state.last_closing is None or segment > state.last_closing:
+                    state.last_closing = segment
+
+        # Grammar rules at every position in the region, as rubric.find_grammar_hits does
+        region_end = limit - base
+        next_free = state.grammar_next_free
+        groups = self.rubric._grammar_groups
+        for match in self.rubric.grammar_scan.finditer(buffer, scan_from):
+            if match.start() >= region_end:
+                break
+            for name, group in groups:
+                span_start, span_end = match.span(group)
+                if span_start != -1 and span_start + base >= next_free.get(name, 0):
+                    counts.grammar[name] += 1
+                    next_free[name] = span_end + base
+
+        if text_end is None:
+            self._done = limit
+
+    def _count_filler(self, state, counts, phrase, hit, text_end):
+        """scoring._count_standalone, one hit at a time"""
+        if phrase not in self._fillers or hit < state.filler_next_free.get(phrase, 0):
+            return
+        buffer = self._buffer
+        base = self._base
+        end = hit + len(phrase)
+        if hit > 0 and buffer[hit - 1 - base] != ' ':
+            return
+        if (text_end is None or end < text_end) and buffer[end - base] != ' ':
+            return
+        counts.fillers[phrase] += 1
+        state.filler_next_free[phrase] = end + 2
+
+
+class StreamingGrader(IncrementalGrader):
+    """
+    Grades a transcript while it is being spoken.
+
+        grader = StreamingGrader()
+        for text, start, end in recognizer_chunks:
+            grader.add_chunk(text, start, end)
+            print(grader.live_stats()["rolling_wpm"])
+        report = grader.final_report()
+    """
+
+    def __init__(self, rubric=None, window_seconds=DEFAULT_WINDOW_SECONDS, overlap=DEFAULT_OVERLAP):
+        super().__init__(rubric)
+        self.window_seconds = window_seconds
+        longest_phrase = max((len(phrase) for phrase, _ in self.rubric.matcher.phrases), default=0)
+        self._margin = max(overlap, longest_phrase + 2)
+        self._tail = _OpenUnit(self.rubric, self._margin)
+        for phrase in list(self.rubric.flow["salutation"]) + list(self.rubric.flow["closing"]):
+            if phrase != phrase.strip() or "." in phrase:
+                # A flow phrase can span a sentence boundary: the open unit is re-split on every chunk instead
+                self._tail = None
+        self.started_at = None
+        self.ended_at = None
+        self.chunk_count = 0
+        self._window = deque()  # (end time, words) of the chunks in the rolling window
+        self._window_words = 0
+        self._changed = set()
+
+    def add_chunk(self, text, start, end):
+        """
+        Append one recognized chunk.
+        start, end: seconds from the start of the recording
+        """
+        if self.started_at is None:
+            self.started_at = start
+        if self.ended_at is not None and end < self.ended_at:
+            raise ValueError(f"chunk ends at {end}s, before the previous chunk ({self.ended_at}s)")
+        self.ended_at = end
+
+        if self._tail is not None:
+            self._changed |= self._extend(text if not self.chunk_count else " " + text)
+        elif not self._splits:
+            # The rubric has phrases that can span sentences, so the text is one unit
+            self._changed |= self._replace(0, len(self._units), [self._joined(text)])
+        elif self.chunk_count:
+            # Only the open sentence at the end can change
+            tail = self._units[-1] + " " + text
+            self._changed |= self._replace(len(self._units) - 1, len(self._units), split_units(tail))
+        else:
+            self._changed |= self._replace(0, 0, split_units(text))
+        self._changed.add("text")
+        self.chunk_count += 1
+
+        words = len(text.split())
+        self._window.append((end, words))
+        self._window_words += words
+        while self._window and self._window[0][0] < end - self.window_seconds:
+            self._window_words -= self._window.popleft()[1]
+
+    def _joined(self, text):
+        return text if not self.chunk_count else "".join(self._units) + " " + text
+
+    def _extend(self, piece):
+        """
+        Append `piece` to the open unit, closing the units it completes.
+        Returns: names of the changed inputs, as from _apply
+        """
+        tail = self._tail
+        old_flow_edges = self._flow_edges()
+        self.units_analyzed = 0
+        # The open unit holds no ". ", so a new one ends in the piece (or where it is joined on)
+        joint = tail.last_char + piece if self._splits else ""
+        cut = joint.rfind(UNIT_END)
+        if cut == -1:
+            settled, previous, live = tail.append(piece)
+            changed = self._apply([previous], [settled, live])
+        else:
+            # Done once per completed unit, so each character is analyzed a fixed number of times
+            cut += 2 - (len(joint) - len(piece))
+            units = split_units(tail.text + piece[:cut])[:-1]
+            stats = [UnitStats(unit, self.rubric) for unit in units]
+            self.units_analyzed = len(units)
+            self._tail = _OpenUnit(self.rubric, self._margin)
+            if piece[cut:]:
+                self._tail.append(piece[cut:])
+            changed = self._apply([tail.settled, tail.live], stats + [self._tail.settled, self._tail.live])
+            self._units.extend(units)
+            self._stats.extend(stats)
+        if self._flow_edges() != old_flow_edges:
+            changed.add("flow_edges")
+        return changed
+
+    def _flow_edges(self):
+        tail = self._tail
+        if tail is None or not tail.sentences:
+            return super()._flow_edges()
+        first = next((stats for stats in self._stats if stats.sentences), tail)
+        return first.opens_with_salutation, tail.ends_with_closing
+
+    @property
+    def elapsed_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        return self.ended_at - self.started_at
+
+    def scores(self, duration_seconds=None):
+        """
+        Provisional scores for everything heard so far.
+        duration_seconds: defaults to the time between the first chunk's start and the last chunk's end
+        Returns: dict of scorer name -> result tuple, as from grader.run_analyses
+        """
+        if duration_seconds is None and self.elapsed_seconds > 0:
+            duration_seconds = self.elapsed_seconds
+        if duration_seconds != self.duration_seconds:
+            self._changed.add("duration")
+        self.duration_seconds = duration_seconds
+        if "text" in self._changed:
+            self.text = "".join(self._units)
+            if self._tail is not None:
+                self.text += self._tail.text
+
+        self._rescore(self._changed if self._results else None)
+        self._changed = set()
+        return self._results
+
+    def final_report(self, duration_seconds=None):
+        """The JSON report for the whole stream, identical to grader.grade_transcript on the joined text"""
+        self.scores(duration_seconds)
+        return self.report()
+
+    def live_stats(self):
+        """
+        Running pace, filler and vocabulary figures for feedback during the speech.
+        Cheap to call after every chunk: nothing here depends on the transcript length.
+        """
+        fillers = self.rubric.filler_words
+        filler_count = 0
+        for filler in fillers["words"]:
+            filler_clean = filler.strip()
+            count = self._fillers.get(filler_clean, 0)
+            if filler_clean in fillers["context_words"]:
+                count = count // 2
+            filler_count += count
+
+        elapsed = self.elapsed_seconds
+        window_span = min(elapsed, self.window_seconds)
+        _, has_closing = self._flow_edges()
+        return {
+            "elapsed_seconds": elapsed,
+            "word_count": self.word_count,
+            "wpm": self.word_count / elapsed * 60 if elapsed > 0 else 0.0,
+            "window_words": self._window_words,
+            "rolling_wpm": self._window_words / window_span * 60 if window_span > 0 else 0.0,
+            "filler_count": filler_count,
+            "filler_rate": filler_count / self.word_count * 100 if self.word_count else 0.0,
+            "terms": len(self._tokens),
+            "has_salutation": any(category.startswith("salutation:") for category in self._phrase_hits),
+            "has_closing": has_closing,
+        }
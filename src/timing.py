@@ -0,0 +1,359 @@
+"""
+Pace profiles from word- or segment-level timestamps (SRT, WebVTT, JSON).
+
+calculate_speech_rate turns the total word count and one duration into a
+single wpm, which hides a rushed closing or a long freeze in the middle.
+Given the timestamps an ASR system or captioning tool produces, this module
+measures pace per sentence, pauses between words and a rolling wpm, and
+flags a closing spoken much faster than the rest.
+
+Timestamp files are read as they are parsed: SRT and WebVTT line by line,
+JSON Lines one object per line, a top-level JSON array element by element.
+Only a Whisper-style document ({"segments": [...]}) is loaded whole. Words
+are kept as two float arrays (start and end times, 16 bytes per word), and
+the profile is computed with numpy over those arrays.
+
+Words of a segment without word timings are spread over the segment in
+proportion to their length. Sentences end at words containing '.', '?' or
+'!'.
+
+    report = grade_timed(read_timestamps("talk.vtt"))
+    report["pace"]["sentences"][-1]["wpm"]
+
+Usage:
+    python src/timing.py talk.srt
+    python src/timing.py words.json --window 15 --pause 0.3
+"""
+import argparse
+import json
+import re
+import sys
+from array import array
+
+import numpy as np
+
+from grader import grade_transcript
+
+DEFAULT_WINDOW_SECONDS = 10.0
+DEFAULT_MIN_PAUSE_SECONDS = 0.5
+# A final sentence this much faster than the whole talk counts as rushed
+RUSHED_CLOSING_RATIO = 1.25
+
+_TIMESTAMP = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})")
+_TAG = re.compile(r"<[^>]*>")
+_SENTENCE_END = re.compile(r"[.?!]")
+
+
+# Parsing --------------------------------------------------------------------------
+# Each parser yields (start seconds, end seconds, text) per cue, segment or word.
+
+def _seconds(timestamp):
+    match = _TIMESTAMP.fullmatch(timestamp.strip())
+    if match is None:
+        raise ValueError(f"invalid timestamp {timestamp!r}")
+    hours, minutes, seconds, fraction = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(fraction.ljust(3, "0")) / 1000
+
+
+def _cues(lines):
+    """Cues of SRT or WebVTT: a 'start --> end' line followed by text lines up to a blank line"""
+    times = None
+    text = []
+    for line in lines:
+        line = line.strip()
+        if "-->" in line:
+            if times is not None and text:
+                yield times[0], times[1], " ".join(text)
+            start, end = line.split("-->", 1)
+            # WebVTT cue settings (e.g. "align:start") follow the end time
+            times = (_seconds(start), _seconds(end.split()[0]))
+            text = []
+        elif not line:
+            if times is not None and text:
+                yield times[0], times[1], " ".join(text)
+            times = None
+            text = []
+        elif times is not None:
+            # Voice, class and inline timestamp tags of WebVTT
+            text.append(_TAG.sub("", line))
+    if times is not None and text:
+        yield times[0], times[1], " ".join(text)
+
+
+def parse_srt(lines):
+    """SubRip cues (the numeric cue index lines are skipped)"""
+    return _cues(lines)
+
+
+def parse_vtt(lines):
+    """WebVTT cues; the header and NOTE / STYLE blocks have no timings and are skipped"""
+    return _cues(lines)
+
+
+def _segment(item):
+    """(start, end, text) of a JSON segment or word object"""
+    if not isinstance(item, dict):
+        raise ValueError(f"timestamp entries must be objects, not {type(item).__name__}")
+    text = item.get("text", item.get("word"))
+    if text is None or "start" not in item or "end" not in item:
+        raise ValueError("timestamp objects need start, end and text (or word)")
+    try:
+        return float(item["start"]), float(item["end"]), text
+    except (TypeError, ValueError):
+        raise ValueError(f"timestamp start and end must be numbers, got {item['start']!r} and {item['end']!r}")
+
+
+def _json_items(item):
+    if isinstance(item, list):
+        for element in item:
+            yield from _json_items(element)
+    elif not isinstance(item, dict):
+        raise ValueError(f"timestamp entries must be objects, not {type(item).__name__}")
+    elif "segments" in item:
+        if not isinstance(item["segments"], list):
+            raise ValueError('"segments" must be a list of timestamp objects')
+        for segment in item["segments"]:
+            yield from _json_items(segment)
+    elif item.get("words"):
+        if not isinstance(item["words"], list):
+            raise ValueError('"words" must be a list of timestamp objects')
+        # Word timings of a segment are finer than the segment's own
+        for word in item["words"]:
+            yield _segment(word)
+    else:
+        yield _segment(item)
+
+
+def parse_json(stream, block_size=1 << 16):
+    """
+    Segments or words from JSON: a top-level array (streamed element by
+    element), JSON Lines, or a Whisper-style {"segments": [...]} document.
+    Segments holding a "words" list contribute their words.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    read_size = block_size
+    while True:
+        # Skip whitespace, the brackets of a top-level array and commas between elements
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            position += 1
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except ValueError:
+            block = stream.read(read_size)
+            if not block:
+                if buffer[position:].strip():
+                    raise ValueError("truncated or invalid JSON timestamps")
+                return
+            buffer = buffer[position:] + block
+            position = 0
+            # Doubling keeps re-decoding a large document linear overall
+            read_size *= 2
+            continue
+        read_size = block_size
+        yield from _json_items(item)
+
+
+PARSERS = {".srt": parse_srt, ".vtt": parse_vtt, ".json": parse_json, ".jsonl": parse_json}
+
+
+def read_timestamps(path):
+    """Yields: (start, end, text) from an .srt, .vtt, .json or .jsonl file, read lazily"""
+    for extension, parser in PARSERS.items():
+        if path.lower().endswith(extension):
+            with open(path, encoding="utf-8-sig") as stream:
+                yield from parser(stream)
+            return
+    raise ValueError(f"unknown timestamp format {path!r}, expected one of {', '.join(PARSERS)}")
+
+
+# Profiles -------------------------------------------------------------------------
+
+class PaceProfiler:
+    """
+    Collects timed segments (or words) in order and profiles the pace.
+
+        profiler = PaceProfiler()
+        for start, end, text in segments:
+            profiler.add(start, end, text)
+        profile = profiler.profile()
+    """
+
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS, min_pause_seconds=DEFAULT_MIN_PAUSE_SECONDS):
+        self.window_seconds = window_seconds
+        self.min_pause_seconds = min_pause_seconds
+        self.starts = array("d")
+        self.ends = array("d")
+        self.sentence_ends = array("q")  # index of the last word of every closed sentence
+        self._texts = []
+
+    def add(self, start, end, text):
+        words = text.split()
+        if not words:
+            return
+        if end < start:
+            raise ValueError(f"segment ends before it starts ({start} > {end})")
+        if self.ends and start < self.starts[-1]:
+            raise ValueError("timestamps must be in order")
+        self._texts.append(text)
+
+        # Spread the words over the segment in proportion to their length
+        total = sum(len(word) for word in words)
+        span = end - start
+        offset = 0
+        for word in words:
+            self.starts.append(start + span * offset / total)
+            offset += len(word)
+            self.ends.append(start + span * offset / total)
+            if _SENTENCE_END.search(word):
+                self.sentence_ends.append(len(self.ends) - 1)
+
+    @property
+    def text(self):
+        return " ".join(self._texts)
+
+    @property
+    def word_count(self):
+        return len(self.ends)
+
+    @property
+    def duration_seconds(self):
+        """From the first word's start to the last word's end"""
+        return self.ends[-1] - self.starts[0] if self.ends else 0.0
+
+    def profile(self):
+        """
+        Returns: {"duration_seconds", "word_count", "wpm", "articulation_wpm",
+        "sentences", "pauses", "rolling_wpm", "rushed_closing", "feedback"}
+        """
+        count = len(self.ends)
+        if not count:
+            return None
+        starts = np.frombuffer(self.starts, dtype=np.float64)
+        ends = np.frombuffer(self.ends, dtype=np.float64)
+        duration = float(ends[-1] - starts[0])
+        wpm = _rate(count, duration)
+
+        # Pauses: gaps between one word's end and the next one's start
+        gaps = starts[1:] - ends[:-1]
+        pause_mask = gaps >= self.min_pause_seconds
+        pauses = gaps[pause_mask]
+        speaking = duration - float(pauses.sum())
+        pause_stats = {
+            "count": int(pauses.size),
+            "total_seconds": float(pauses.sum()),
+            "mean_seconds": float(pauses.mean()) if pauses.size else 0.0,
+            "longest_seconds": float(pauses.max()) if pauses.size else 0.0,
+            "longest_at_seconds": float(ends[:-1][pause_mask][pauses.argmax()]) if pauses.size else None,
+            "per_minute": pauses.size / duration * 60 if duration > 0 else 0.0,
+        }
+
+        # Sentences; words after the last sentence end form a final sentence
+        last_words = np.frombuffer(self.sentence_ends, dtype=np.int64)
+        if not last_words.size or last_words[-1] != count - 1:
+            last_words = np.append(last_words, count - 1)
+        first_words = np.concatenate(([0], last_words[:-1] + 1))
+        sentence_words = last_words - first_words + 1
+        sentence_starts = starts[first_words]
+        sentence_ends = ends[last_words]
+        sentence_seconds = sentence_ends - sentence_starts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sentence_wpm = np.where(sentence_seconds > 0, sentence_words / sentence_seconds * 60, np.nan)
+        sentences = [
+            {"start": float(start), "end": float(end), "word_count": int(words),
+             "wpm": None if np.isnan(rate) else float(rate)}
+            for start, end, words, rate in zip(sentence_starts, sentence_ends, sentence_words, sentence_wpm)
+        ]
+
+        # Words per minute over the trailing window, at every word end a full window in
+        window = self.window_seconds
+        ordered = np.sort(ends)
+        at = np.flatnonzero(ordered >= starts[0] + window)
+        if at.size:
+            in_window = at + 1 - np.searchsorted(ordered, ordered[at] - window, side="right")
+            rolling = in_window / window * 60
+        else:
+            rolling = np.array([wpm])
+        rolling_stats = {
+            "window_seconds": window,
+            "mean": float(rolling.mean()),
+            "std": float(rolling.std()),
+            "min": float(rolling.min()),
+            "max": float(rolling.max()),
+        }
+
+        closing_wpm = sentences[-1]["wpm"]
+        rushed = (len(sentences) > 1 and closing_wpm is not None and wpm > 0
+                  and closing_wpm >= wpm * RUSHED_CLOSING_RATIO)
+        return {
+            "duration_seconds": duration,
+            "word_count": count,
+            "wpm": wpm,
+            "articulation_wpm": _rate(count, speaking),
+            "sentences": sentences,
+            "pauses": pause_stats,
+            "rolling_wpm": rolling_stats,
+            "rushed_closing": rushed,
+            "feedback": _pace_feedback(wpm, closing_wpm, rushed, pause_stats, rolling_stats),
+        }
+
+
+def _rate(words, seconds):
+    return words / seconds * 60 if seconds > 0 else 0.0
+
+
+def _pace_feedback(wpm, closing_wpm, rushed, pauses, rolling):
+    parts = [f"Average pace {wpm:.1f} WPM"]
+    if rushed:
+        parts.append(f"Rushed closing: the last sentence ran at {closing_wpm:.1f} WPM. Slow down as you finish")
+    if rolling["std"] > 0.2 * rolling["mean"] > 0:
+        parts.append(f"Uneven pace: {rolling['min']:.0f}-{rolling['max']:.0f} WPM "
+                     f"over {rolling['window_seconds']:.0f}-second stretches")
+    if pauses["longest_seconds"] >= 3:
+        parts.append(f"Long pause of {pauses['longest_seconds']:.1f} s at {pauses['longest_at_seconds']:.1f} s")
+    return ". ".join(parts)
+
+
+def grade_timed(segments, duration_seconds=None, rubric=None, window_seconds=DEFAULT_WINDOW_SECONDS,
+                min_pause_seconds=DEFAULT_MIN_PAUSE_SECONDS):
+    """
+    Grade a transcript given as timed segments or words.
+    duration_seconds: for the speech rate score; defaults to the timed span
+    Returns: the JSON report, with the pace profile under "pace"
+    """
+    profiler = PaceProfiler(window_seconds, min_pause_seconds)
+    for start, end, text in segments:
+        profiler.add(start, end, text)
+    if duration_seconds is None and profiler.duration_seconds > 0:
+        duration_seconds = profiler.duration_seconds
+    report = grade_transcript(profiler.text, duration_seconds, rubric=rubric)
+    report["pace"] = profiler.profile()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade a timed transcript (SRT, WebVTT, JSON) and profile its pace")
+    parser.add_argument("path", help=".srt, .vtt, .json or .jsonl file")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW_SECONDS, help="rolling wpm window in seconds")
+    parser.add_argument("--pause", type=float, default=DEFAULT_MIN_PAUSE_SECONDS,
+                        help="shortest gap between words counted as a pause, in seconds")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="seconds for the speech rate score (default: the timed span)")
+    args = parser.parse_args(argv)
+    if args.window <= 0:
+        parser.error("--window must be positive")
+    if args.duration is not None and args.duration <= 0:
+        parser.error("--duration must be positive")
+    try:
+        report = grade_timed(read_timestamps(args.path), args.duration, window_seconds=args.window,
+                             min_pause_seconds=args.pause)
+    except (OSError, ValueError) as e:
+        parser.error(f"{args.path}: {e}")
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Vectorized scoring of the numeric rubric bands for batch runs.
+
+Each scorer in scoring.py turns one metric (wpm, TTR, filler rate, VADER
+compound, grammar error rate) into a score and a feedback string through an
+if/elif ladder. The functions here take arrays of those metrics, assign every
+row its band with np.digitize / np.select, and return the scores together with
+integer feedback codes. The *_feedback functions render the codes back into
+exactly the strings the scalar scorers produce.
+
+Band limits and scores come from the rubric (the default rubric unless one is
+passed), so a batch graded here matches check_* called with the same rubric.
+The band labels are scoring's own lists. grade_batch still grades each
+transcript with the scalar scorers; this module currently backs the
+vectorized mode of benchmarks/golden.py, which checks it against them.
+"""
+import numpy as np
+
+from rubric import get_default_rubric
+from scoring import FILLER_LABELS, SENTIMENT_LABELS, VOCABULARY_LABELS
+
+# Speech rate ------------------------------------------------------------------
+
+SPEECH_RATE_FEEDBACK = [
+    "Ideal speech rate: {:.1f} WPM",
+    "Fast speech rate: {:.1f} WPM. Try speaking a bit slower for better clarity",
+    "Slow speech rate: {:.1f} WPM. Try speaking a bit faster to maintain engagement",
+    "Too fast: {:.1f} WPM. Slow down significantly for better understanding",
+    "Too slow: {:.1f} WPM. Increase your speaking pace considerably",
+]
+
+
+def speech_rates(word_counts, durations=None, rubric=None):
+    """
+    Words per minute for every row, estimating missing durations (None or NaN)
+    the same way calculate_speech_rate does.
+    Returns: wpm (float array), estimated (bool array)
+    """
+    rates = (rubric or get_default_rubric()).speech_rate
+    word_counts = np.asarray(word_counts, dtype=float)
+    if durations is None:
+        durations = np.full(word_counts.shape, np.nan)
+    else:
+        durations = np.array([np.nan if d is None else d for d in durations], dtype=float)
+
+    estimated = np.isnan(durations)
+    estimated_durations = np.maximum((word_counts / rates["estimated_wpm"]) * 60, rates["min_estimated_duration"])
+    durations = np.where(estimated, estimated_durations, durations)
+    return (word_counts / durations) * 60, estimated
+
+
+def speech_rate_bands(wpm, rubric=None):
+    """
+    Returns: scores (int array), feedback codes (int array)
+    """
+    rates = (rubric or get_default_rubric()).speech_rate
+    ideal, fast, slow = rates["ideal"], rates["fast"], rates["slow"]
+    wpm = np.asarray(wpm, dtype=float)
+    # The bands have gaps (e.g. 140 < wpm < 141), which fall through to "Too slow"
+    codes = np.select(
+        [(wpm >= ideal["min"]) & (wpm <= ideal["max"]), (wpm >= fast["min"]) & (wpm <= fast["max"]),
+         (wpm >= slow["min"]) & (wpm <= slow["max"]), wpm > fast["max"]],
+        [0, 1, 2, 3],
+        default=4
+    )
+    scores = np.array([ideal["score"], fast["score"], slow["score"], rates["too_fast_score"], rates["too_slow_score"]])
+    return scores[codes], codes
+
+
+def speech_rate_feedback(codes, wpm, estimated=None):
+    if estimated is None:
+        estimated = np.zeros(len(codes), dtype=bool)
+    return [
+        SPEECH_RATE_FEEDBACK[code].format(rate) + (" (estimated duration)" if is_estimated else "")
+        for code, rate, is_estimated in zip(codes.tolist(), np.asarray(wpm, dtype=float).tolist(),
+                                            np.asarray(estimated).tolist())
+    ]
+
+
+# Vocabulary -------------------------------------------------------------------
+
+# Codes count up from the worst band, so the scoring labels run backwards
+VOCABULARY_FEEDBACK = VOCABULARY_LABELS[::-1]
+VOCABULARY_SHORT = 5  # fewer than 10 words
+VOCABULARY_SHORT_FEEDBACK = "Use more words for better vocabulary assessment"
+
+
+def _vocabulary_scores(vocabulary):
+    # The rubric lists bands best first; codes count up from the worst band
+    return np.array(vocabulary["scores"][::-1] + (6,))
+
+
+def vocabulary_bands(ttr, words, rubric=None):
+    """
+    Returns: scores (int array), TTR as reported (float array), feedback codes (int array)
+    """
+    vocabulary = (rubric or get_default_rubric()).vocabulary
+    ttr = np.asarray(ttr, dtype=float)
+    words = np.asarray(words)
+    short = words < 10
+    codes = np.where(short, VOCABULARY_SHORT, np.digitize(ttr, vocabulary["ttr_thresholds"][::-1]))
+    return _vocabulary_scores(vocabulary)[codes], np.where(short, 0.5, ttr), codes
+
+
+def vocabulary_feedback(codes, ttr, words, rubric=None):
+    vocabulary = (rubric or get_default_rubric()).vocabulary
+    scores = _vocabulary_scores(vocabulary)
+    feedback = []
+    for code, value, count in zip(codes.tolist(), np.asarray(ttr, dtype=float).tolist(),
+                                  np.asarray(words).tolist()):
+        if code == VOCABULARY_SHORT:
+            feedback.append(VOCABULARY_SHORT_FEEDBACK)
+            continue
+        text = f"{VOCABULARY_FEEDBACK[code]} (TTR: {value:.3f})"
+        if scores[code] <= vocabulary["suggest_at_or_below_score"]:
+            if value < vocabulary["varied_words_below_ttr"]:
+                text += ". Try using more varied words instead of repeating the same words"
+            if count < vocabulary["descriptive_words_below_words"]:
+                text += ". Add more descriptive words to your introduction"
+        feedback.append(text)
+    return feedback
+
+
+# Filler words -----------------------------------------------------------------
+
+FILLER_FEEDBACK = FILLER_LABELS
+
+
+def filler_rates(filler_counts, word_counts):
+    """Filler words per 100 words, 0 for empty transcripts"""
+    filler_counts = np.asarray(filler_counts, dtype=float)
+    word_counts = np.asarray(word_counts, dtype=float)
+    safe_counts = np.where(word_counts > 0, word_counts, 1)
+    return np.where(word_counts > 0, (filler_counts / safe_counts) * 100, 0.0)
+
+
+def filler_bands(filler_rate, rubric=None):
+    """
+    Returns: scores (int array), feedback codes (int array)
+    """
+    fillers = (rubric or get_default_rubric()).filler_words
+    codes = np.digitize(np.asarray(filler_rate, dtype=float), fillers["rate_thresholds"], right=True)
+    return np.array(fillers["scores"])[codes], codes
+
+
+def filler_feedback(codes, filler_rate, found_fillers=None):
+    """
+    found_fillers: per row, the "word (Nx)" entries check_filler_words found
+    """
+    if found_fillers is None:
+        found_fillers = [()] * len(codes)
+    feedback = []
+    for code, rate, found in zip(codes.tolist(), np.asarray(filler_rate, dtype=float).tolist(),
+                                 found_fillers):
+        text = FILLER_FEEDBACK[code]
+        if found:
+            text += f". Found: {', '.join(list(found)[:3])}"
+        else:
+            text += ". No filler words detected"
+        feedback.append(text + f" (rate: {rate:.1f}%)")
+    return feedback
+
+
+# Sentiment --------------------------------------------------------------------
+
+SENTIMENT_FEEDBACK = SENTIMENT_LABELS[::-1]
+
+
+def sentiment_bands(compound, rubric=None):
+    """
+    Returns: scores (int array), feedback codes (int array)
+    """
+    sentiment = (rubric or get_default_rubric()).sentiment
+    codes = np.digitize(np.asarray(compound, dtype=float), sentiment["compound_thresholds"][::-1])
+    return np.array(sentiment["scores"][::-1])[codes], codes
+
+
+def sentiment_feedback(codes, compound, rubric=None):
+    sentiment = (rubric or get_default_rubric()).sentiment
+    scores = sentiment["scores"][::-1]
+    feedback = []
+    for code, value in zip(codes.tolist(), np.asarray(compound, dtype=float).tolist()):
+        text = f"{SENTIMENT_FEEDBACK[code]} (score: {value:.3f})"
+        if scores[code] <= sentiment["suggest_at_or_below_score"]:
+            if value < sentiment["positive_words_below"]:
+                text += ". Try adding more positive words like 'excited', 'enjoy', 'love'"
+            elif value < sentiment["enthusiasm_below"]:
+                text += ". Show more enthusiasm in your delivery"
+        feedback.append(text)
+    return feedback
+
+
+# Grammar ----------------------------------------------------------------------
+
+GRAMMAR_FEEDBACK = [
+    "Good spoken grammar with minor issues",
+    "Average spoken grammar",
+    "Needs grammar improvement",
+    "Excellent spoken grammar",
+]
+GRAMMAR_NO_ERRORS = 3
+GRAMMAR_SHORT = 4  # fewer than 15 words
+GRAMMAR_SHORT_FEEDBACK = "Text too short for detailed grammar analysis"
+
+
+def grammar_bands(error_count, word_count, rubric=None):
+    """
+    Returns: scores (int array), error counts as reported (float array), feedback codes (int array)
+    """
+    grammar = (rubric or get_default_rubric()).grammar
+    scores = np.array(grammar["scores"] + (grammar["no_errors_score"], 6))
+    error_count = np.asarray(error_count, dtype=float)
+    word_count = np.asarray(word_count)
+    short = word_count < 15
+    error_rate = (error_count / np.where(word_count > 0, word_count, 1)) * 100
+    codes = np.digitize(error_rate, grammar["error_rate_thresholds"])
+    codes = np.where(error_count == 0, GRAMMAR_NO_ERRORS, codes)
+    codes = np.where(short, GRAMMAR_SHORT, codes)
+    return scores[codes], np.where(short, 0, error_count), codes
+
+
+def grammar_feedback(codes, issues=None):
+    """
+    issues: per row, the specific issues check_grammar found, in rule order
+    """
+    if issues is None:
+        issues = [()] * len(codes)
+    feedback = []
+    for code, row_issues in zip(codes.tolist(), issues):
+        if code == GRAMMAR_SHORT:
+            feedback.append(GRAMMAR_SHORT_FEEDBACK)
+            continue
+        text = GRAMMAR_FEEDBACK[code]
+        if row_issues:
+            text += f". Focus on: {', '.join(list(row_issues)[:2])}"
+        feedback.append(text)
+    return feedback